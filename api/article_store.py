@@ -0,0 +1,243 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from utils.sqlite_store import SQLiteDatabase
+from utils.metrics import CACHE_LOOKUPS
+
+# Query parameters that only track where a click came from; they never change the article
+TRACKING_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid', 'taid', 'ref'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Headline fields refreshed on every scrape; content fields are only written by set_content()
+HEADLINE_FIELDS = ('url', 'title', 'source', 'snippet', 'image_url')
+
+
+def canonical_url(url):
+    """
+    Normalizes an article URL so the same story always maps to the same id:
+    lower-cased scheme and host, default port and fragment removed, tracking parameters
+    dropped, remaining query parameters sorted and a trailing slash on the path removed.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in TRACKING_PARAMS))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def article_id_for_url(url):
+    """Deterministic article id derived from the canonical URL (stable across workers, refreshes and restarts)."""
+    return hashlib.sha256(canonical_url(url).encode('utf-8')).hexdigest()[:16]
+
+
+class ArticleRecord:
+    """
+    Compact in-memory form of an article row. __slots__ avoids a per-record __dict__, and the
+    scraped content record is held as (optionally zlib-compressed) JSON bytes until it is read.
+    """
+    __slots__ = ('id', 'url', 'title', 'source', 'snippet', 'image_url', 'scraped_at', '_content', '_compressed', 'cached_at', 'size')
+
+    def __init__(self, row, compress=True):
+        self.id = row['id']
+        self.url = row['url']
+        self.title = row['title']
+        self.source = row['source']
+        self.snippet = row['snippet']
+        self.image_url = row['image_url']
+        self.scraped_at = row['scraped_at']
+        content = row['content'].encode('utf-8') if row['content'] else None
+        self._compressed = bool(compress and content)
+        self._content = zlib.compress(content) if self._compressed else content
+        self.cached_at = time.monotonic()
+        self.size = sys.getsizeof(self) + sum(
+            sys.getsizeof(value) for value in (self.id, self.url, self.title, self.source, self.snippet, self.image_url, self._content)
+            if value is not None
+        )
+
+    @property
+    def has_content(self):
+        return self._content is not None
+
+    def content(self):
+        if self._content is None:
+            return None
+        raw = zlib.decompress(self._content) if self._compressed else self._content
+        return json.loads(raw)
+
+    def to_dict(self):
+        content = self.content()
+        return {
+            'id': self.id,
+            'url': self.url,
+            'title': self.title,
+            'source': self.source,
+            'snippet': self.snippet,
+            'image_url': self.image_url,
+            'content': content,
+            'scraped_at': self.scraped_at,
+            # 'description' is kept for compatibility with the original in-memory record layout
+            'description': content.get('description') if isinstance(content, dict) else None,
+        }
+
+
+class ArticleCache:
+    """
+    Bounded per-worker LRU cache of ArticleRecords in front of the SQLite store.
+    Entries are evicted when the cache exceeds max_entries or max_bytes (least recently used first)
+    or when they are older than ttl seconds, so a worker's footprint stays flat over long uptimes.
+    """
+
+    def __init__(self, max_entries=500, max_bytes=32 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._records = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, article_id):
+        with self._lock:
+            record = self._records.get(article_id)
+            if record is not None and time.monotonic() - record.cached_at > self.ttl:
+                self._remove(article_id)
+                record = None
+            if record is None:
+                self.misses += 1
+            else:
+                self._records.move_to_end(article_id)
+                self.hits += 1
+        CACHE_LOOKUPS.inc(cache='article', result='miss' if record is None else 'hit')
+        return record
+
+    def put(self, record):
+        with self._lock:
+            if record.id in self._records:
+                self._remove(record.id)
+            self._records[record.id] = record
+            self._bytes += record.size
+            while self._records and (len(self._records) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._records)))
+                self.evictions += 1
+
+    def discard(self, article_id):
+        with self._lock:
+            if article_id in self._records:
+                self._remove(article_id)
+
+    def _remove(self, article_id):
+        record = self._records.pop(article_id)
+        self._bytes -= record.size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._records),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class ArticleStore:
+    """
+    Article records shared by all gunicorn workers, persisted in SQLite (WAL mode).
+    Ids come from article_id_for_url(), so /api/news from one worker and /api/article/<id>
+    on another agree, and content scraped by any worker is reused by all of them.
+    Reads go through a bounded in-process ArticleCache; rows not refreshed for max_age seconds are pruned.
+    """
+
+    def __init__(self, path, cache=None, compress=True, max_age=7 * 24 * 3600):
+        self.cache = cache
+        self.compress = compress
+        self.max_age = max_age
+        self.db = SQLiteDatabase(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT,
+                source TEXT,
+                snippet TEXT,
+                image_url TEXT,
+                content TEXT,          -- JSON record returned by NewsScraper.scrape_article_content
+                updated_at REAL NOT NULL,
+                scraped_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_url ON articles (url);
+            CREATE INDEX IF NOT EXISTS idx_articles_updated_at ON articles (updated_at);
+        """)
+
+    def get(self, article_id, default=None):
+        record = self.cache.get(article_id) if self.cache else None
+        # Records without content are re-read, since another worker may have scraped it since
+        if record is None or not record.has_content:
+            row = self.db.execute('SELECT * FROM articles WHERE id = ?', (article_id,)).fetchone()
+            if row is None:
+                return default
+            record = ArticleRecord(row, self.compress)
+            if self.cache:
+                self.cache.put(record)
+        return record.to_dict()
+
+    def __getitem__(self, article_id):
+        record = self.get(article_id)
+        if record is None:
+            raise KeyError(article_id)
+        return record
+
+    def __contains__(self, article_id):
+        return self.db.execute('SELECT 1 FROM articles WHERE id = ?', (article_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def upsert_headlines(self, records):
+        """
+        Inserts or refreshes headline records ({'id', 'url', 'title', ...}) in one transaction.
+        Previously scraped content for an existing id is kept.
+        """
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO articles (id, url, title, source, snippet, image_url, updated_at)
+                VALUES (:id, :url, :title, :source, :snippet, :image_url, :updated_at)
+                ON CONFLICT(id) DO UPDATE SET
+                    url = excluded.url, title = excluded.title, source = excluded.source,
+                    snippet = excluded.snippet, image_url = excluded.image_url, updated_at = excluded.updated_at
+                """,
+                [dict({field: record.get(field) for field in HEADLINE_FIELDS}, id=record['id'], updated_at=now) for record in records],
+            )
+            # Articles that have dropped off every source's front page for max_age are removed
+            conn.execute('DELETE FROM articles WHERE updated_at < ?', (now - self.max_age,))
+
+    def set_content(self, article_id, content):
+        """Stores the scraped content record of an article."""
+        now = time.time()
+        self.db.execute(
+            'UPDATE articles SET content = ?, scraped_at = ?, updated_at = ? WHERE id = ?',
+            (json.dumps(content), now, now, article_id),
+        )
+        if self.cache:
+            self.cache.discard(article_id)
+
+    def stats(self):
+        """Row count of the shared store plus memory usage of this worker's cache."""
+        return {
+            'stored_articles': len(self),
+            'cache': self.cache.stats() if self.cache else None,
+        }
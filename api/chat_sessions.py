@@ -0,0 +1,71 @@
+import json
+import time
+from api.retrieval import estimate_tokens
+from utils.sqlite_store import SQLiteDatabase
+
+
+class ChatSessionStore:
+    """
+    Server-side chat history per (user, article), shared by all gunicorn workers (SQLite, WAL).
+    Each session keeps at most max_turns question/answer pairs, and only as many of the most recent
+    ones as fit in token_budget, so follow-up prompts stay bounded. Sessions idle for ttl seconds expire.
+    """
+
+    def __init__(self, path, max_turns=10, token_budget=1500, ttl=24 * 3600):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.ttl = ttl
+        self.db = SQLiteDatabase(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                user_id TEXT NOT NULL,
+                article_id TEXT NOT NULL,
+                history TEXT NOT NULL,     -- JSON list of {"role", "content"} messages
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (user_id, article_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated_at ON chat_sessions (updated_at);
+        """)
+
+    def history(self, user_id, article_id):
+        """Messages of the session so far (oldest first), or [] for a new or expired session."""
+        row = self.db.execute(
+            'SELECT history, updated_at FROM chat_sessions WHERE user_id = ? AND article_id = ?',
+            (user_id, article_id),
+        ).fetchone()
+        if row is None or time.time() - row['updated_at'] > self.ttl:
+            return []
+        return json.loads(row['history'])
+
+    def append(self, user_id, article_id, question, answer):
+        """Adds a question/answer pair to the session, dropping the oldest pairs beyond the limits."""
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                'SELECT history, updated_at FROM chat_sessions WHERE user_id = ? AND article_id = ?',
+                (user_id, article_id),
+            ).fetchone()
+            history = json.loads(row['history']) if row and now - row['updated_at'] <= self.ttl else []
+            history += [{'role': 'user', 'content': question}, {'role': 'assistant', 'content': answer}]
+            conn.execute(
+                'INSERT OR REPLACE INTO chat_sessions (user_id, article_id, history, updated_at) VALUES (?, ?, ?, ?)',
+                (user_id, article_id, json.dumps(self._trim(history)), now),
+            )
+            conn.execute('DELETE FROM chat_sessions WHERE updated_at < ?', (now - self.ttl,))
+
+    def clear(self, user_id, article_id):
+        self.db.execute('DELETE FROM chat_sessions WHERE user_id = ? AND article_id = ?', (user_id, article_id))
+
+    def _trim(self, history):
+        # Whole pairs are dropped from the front, so the history always starts with a user turn
+        pairs = [history[i:i + 2] for i in range(0, len(history), 2)][-self.max_turns:]
+        while len(pairs) > 1 and sum(estimate_tokens(m['content']) for pair in pairs for m in pair) > self.token_budget:
+            pairs.pop(0)
+        return [message for pair in pairs for message in pair]
+
+    def stats(self):
+        return {
+            'sessions': self.db.execute('SELECT COUNT(*) FROM chat_sessions WHERE updated_at >= ?', (time.time() - self.ttl,)).fetchone()[0],
+            'max_turns': self.max_turns,
+            'token_budget': self.token_budget,
+        }
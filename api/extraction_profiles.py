@@ -0,0 +1,245 @@
+import re
+import threading
+import soupsieve
+from urllib.parse import urlparse
+from api.html_parsing import HEADLINE_STRAINER, ARTICLE_CONTENT_CLASSES, build_article_strainer
+from api.text_extraction import TextExtractor
+
+# --- Declarative extraction profiles ---
+# Each NEWS_SOURCES entry references one of these by name ('profile' key). Profiles are compiled once
+# by NewsScraper.__init__ (see CompiledProfile), so the per-card and per-article hot paths only run
+# precompiled selectors and regexes.
+EXTRACTION_PROFILES = {
+    'reuters': {
+        # Elements that represent a complete news article card on the homepage.
+        # We prioritize elements that are likely to contain a title, link, and image together.
+        'card_selectors': [
+            'div.media-story-card', # The most common card for news stories
+            'div[data-testid="MediaStoryCard"]', # Alternative data-testid for story cards
+            'div.story-card', # A more generic story card class
+            'div[class*="FeedItem"]', # Common pattern for feed items
+            'div[class*="ArticleCard"]', # Common pattern for article cards
+            'div[data-testid="article-card"]', # Another potential data-testid
+            'li.story-item', # Sometimes list items are used for news feeds
+            'div.cluster-item', # For news clusters, might contain multiple stories
+            'div.basic-card', # Another generic card class
+        ],
+        # The primary link within a card: links that are likely headlines (within h2/h3 or with specific data-testids)
+        'link_selector': 'a[data-testid="Link"], h2 a, h3 a, a.media-story-card__heading__2g1Xp',
+        'snippet_selectors': [
+            'p.media-story-card__description__2g1Xp', # Specific class for description
+            'p[data-testid="Body"]', # Common data-testid for body text/snippet
+            'div.story-content p', # Paragraph within story content divs
+            'p.text__text__1FZLe', # Common text class
+            'div.article-excerpt p', # Paragraph within article excerpts
+            'div[class*="Description"] p', # Generic description div
+            'div[class*="Snippet"] p', # Generic snippet div
+        ],
+        'thumbnail_selectors': [
+            'img[data-testid="media-image"]',
+            'img.media-story-card__image__2g1Xp',
+            'img.media-object__image__3tY4J',
+            'img.image__image__1g1Xp', # Generic image class
+            'img[src*="thumb"]', # Images with 'thumb' in src
+            'img[src*="small"]', # Images with 'small' in src
+            'div.media-object__media__1g1Xp img', # Image within a common media object container
+            'div.Image_container img', # Another common image container
+            'div.MediaItem_image img', # Another common image container
+            'figure img', # General figure image
+            'img.reuters-asset-image', # A common class for Reuters images
+            'img[data-src]', # Sometimes images use data-src attribute (lazy loading)
+            'div.media-object__image-wrapper img', # Specific wrapper for images
+            'div.media-story-card__image-wrapper img', # Another specific wrapper
+            'img.w-full.h-full.object-cover', # Common Tailwind-like classes for images
+            'img[class*="Image"]', # Generic image class pattern
+        ],
+        # Valid news article links; helps filter out categories, special sections or author pages
+        'url_include_pattern': r'/(article|news|business|markets|world|technology|sports|lifestyle|science|health|legal|politics|economy|companies|commodities|deals|funds|currencies|wealth|arts|media|entertainment|environment|climate|innovation|space|gaming|oddly-enough)/',
+        'url_exclude_pattern': r'(photogallery|videos|elections|liveblog|tags|contact|about|privacy|terms|login|signup|#|javascript:|mailto:|/amp/|/web-stories/|/photos/|/videos|/live-updates|/topic|/authors|/rss|/sitemap|/subscribe|/apps|/partner|/advertise|/feedback|/careers|/terms-of-use|/privacy-policy|/cookie-policy|/disclaimer|/archive|/newsletter|/faq|/press-release|/events|/jobs|/deals|/shop|/gallery|/embed|/widget|/premium|/plus|/epaper|/contactus|/breakingnews|/authors/|/topics/|/search\?)',
+        # Tiny icons/placeholders that should never be used as a headline thumbnail
+        'thumbnail_exclude_pattern': r'(logo|icon|spacer|thumb-small|ads|gif|svg)\.(png|jpg|jpeg)',
+
+        # --- Article page ---
+        'title_selectors': [
+            'h1[data-testid="ArticleHeader_headline"]',
+            'h1.article-header__title',
+            'h1.Headline-headline-2FX_p',
+            'h1',
+        ],
+        'author_selectors': [
+            'p[data-testid="BylineBar_byline"]',
+            'div.byline__name',
+            'span.byline-name',
+        ],
+        # Last-resort author lookup: any div whose class mentions a byline
+        'author_class_pattern': r'byline|author|writer',
+        # Reuters often has a lead paragraph or a specific summary div at the start
+        'summary_selectors': [
+            'p[data-testid="ArticleBody_lead_paragraph"]', # Common lead paragraph
+            'div.article-body > p:first-of-type', # First paragraph in the article body
+            'div.ArticleBody_lede__2g1Xp', # Specific lede class
+            'div.ArticleBody_summary__2g1Xp', # Specific summary class
+            'div[itemprop="articleBody"] p:first-of-type', # First paragraph in schema body
+            'div.article-body_content__17lYj > p:first-of-type', # First paragraph within the specific content div
+        ],
+        'image_selectors': [
+            'img[data-testid="media-image"]', # Common data-testid for main image
+            'div.article-image-container img', # Image within a specific container
+            'figure.article-picture img', # Image within a figure with article-picture class
+            'img.media-object__image__3tY4J', # Specific class for media objects
+            'img[itemprop="image"]', # Schema.org image
+            'meta[itemprop="image"]', # Schema.org image meta tag
+            'div.Image_container img', # Another common image container
+            'div.MediaItem_image img', # Another common image container
+        ],
+        'image_exclude_pattern': r'(logo|icon|spacer|thumb|small|ads)\.(png|jpg|jpeg|gif|svg)',
+        # Containers searched for a prominent image when no image selector matched
+        'image_container_classes': ['article-body', 'text__text__1FZLe', 'body-content', 'main-content', 'article-body_content__17lYj'],
+        # Divs holding the article text, tried before <article>, <main> and <body>
+        'content_classes': ARTICLE_CONTENT_CLASSES,
+        # Subtrees skipped when extracting the body text: tag names, '.class' or '#id' (see api.text_extraction)
+        'skip_selectors': ['script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'iframe', 'button', 'figcaption', 'figure', 'img', 'video', 'audio', 'svg', 'canvas', 'amp-img', 'blockquote', '.ads', '.ad-container', '.social-share', '.read-more', '.related-articles', '.comments-section', '.paywall', '#paywall', '.signin', '#signin', '.legals', '.disclaimer', '.byline', '.timestamp', '.ArticleHeader_container', '.ArticleHeader_byline', '.ArticleHeader_date', '.ArticleHeader_share'],
+        # Trailing boilerplate: the body ends at the first short paragraph that is entirely one of these
+        # (a label such as "Topics: Markets" or "Comments (3)", or a credit line), never at body text
+        # that merely starts with the same word ("Comments from the minister ...")
+        'boilerplate_pattern': r'(?:read more|related articles|related stories|also read|further reading|topics|tags|comments|share this article|follow us|sign in|subscribe now|create an account|login to read|our standards)(?:\s*[:(|\-\u2013\u2014].*)?|the (?:thomson )?reuters trust principles\.?|(?:\u00a9\s*)?(?:\d{4}\s+)?thomson reuters\.?|(?:additional )?(?:reporting|editing|writing) by .*',
+        'boilerplate_max_chars': 200,
+        'headline_strainer': HEADLINE_STRAINER,
+        # Parse article pages with a strainer built from the selectors above (see build_article_strainer)
+        'strain_articles': True,
+    },
+}
+
+DEFAULT_PROFILE = 'reuters'
+
+# Fallback chains whose order adapts to observed hit rates (see SelectorChain)
+ADAPTIVE_CHAINS = ('snippet', 'thumbnail', 'title', 'author', 'summary', 'image')
+
+
+class CompiledProfile:
+    """An extraction profile with all selectors and URL classifiers compiled once."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.card_selector = soupsieve.compile(', '.join(spec['card_selectors']))
+        self.link_selector = soupsieve.compile(spec['link_selector'])
+        self.snippet_selectors = _compile_all(spec['snippet_selectors'])
+        self.thumbnail_selectors = _compile_all(spec['thumbnail_selectors'])
+        self.url_include = re.compile(spec['url_include_pattern'])
+        self.url_exclude = re.compile(spec['url_exclude_pattern'], re.IGNORECASE)
+        self.thumbnail_exclude = re.compile(spec['thumbnail_exclude_pattern'], re.IGNORECASE)
+
+        self.title_selectors = _compile_all(spec['title_selectors'])
+        self.author_selectors = _compile_all(spec['author_selectors'])
+        self.author_class = re.compile(spec['author_class_pattern'], re.IGNORECASE)
+        self.summary_selectors = _compile_all(spec['summary_selectors'])
+        self.image_selectors = _compile_all(spec['image_selectors'])
+        self.image_exclude = re.compile(spec['image_exclude_pattern'], re.IGNORECASE)
+        self.image_container_classes = list(spec['image_container_classes'])
+        self.content_classes = list(spec['content_classes'])
+        self.boilerplate = re.compile(spec['boilerplate_pattern'], re.IGNORECASE | re.DOTALL)
+        self.text_extractor = TextExtractor(spec['skip_selectors'], self.boilerplate, spec.get('boilerplate_max_chars', 200))
+        self.headline_strainer = spec.get('headline_strainer')
+        self.article_strainer = None
+        if spec.get('strain_articles'):
+            self.article_strainer = build_article_strainer(
+                spec['title_selectors'] + spec['author_selectors'] + spec['summary_selectors'] + spec['image_selectors'],
+                container_classes=self.content_classes + self.image_container_classes,
+                container_class_pattern=self.author_class,
+            )
+
+    def is_article_url(self, url):
+        return bool(self.url_include.search(url)) and not self.url_exclude.search(url)
+
+
+def _compile_all(selectors):
+    return [(selector, soupsieve.compile(selector)) for selector in selectors]
+
+
+class SelectorChain:
+    """
+    An ordered fallback chain of compiled selectors that learns which ones match.
+    Every call records how many times each selector was evaluated and accepted; every
+    reorder_interval calls the chain is re-sorted so selectors with the most hits are tried first
+    (ties keep the profile's original order, so a cold chain behaves exactly like the profile).
+    """
+
+    def __init__(self, selectors, reorder_interval=50):
+        self.reorder_interval = reorder_interval
+        # [original_index, raw_selector, compiled_selector, evaluations, hits]
+        self._entries = [[index, raw, compiled, 0, 0] for index, (raw, compiled) in enumerate(selectors)]
+        self._order = list(self._entries) # Replaced wholesale on reorder; readers iterate a snapshot
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def first(self, tag, extract=None):
+        """
+        Returns the first non-empty extract(match) over the chain (the match itself if no extract
+        function is given), or None if no selector produced a value.
+        """
+        tried = []
+        hit_entry = None
+        result = None
+        for entry in self._order:
+            tried.append(entry)
+            match = entry[2].select_one(tag)
+            if match is None:
+                continue
+            value = extract(match) if extract else match
+            if value:
+                hit_entry, result = entry, value
+                break
+        self._record(tried, hit_entry)
+        return result
+
+    def _record(self, tried, hit_entry):
+        with self._lock:
+            for entry in tried:
+                entry[3] += 1
+            if hit_entry is not None:
+                hit_entry[4] += 1
+            self._calls += 1
+            if self._calls % self.reorder_interval == 0:
+                self._order = sorted(self._entries, key=lambda e: (-e[4], e[0]))
+
+    def stats(self):
+        """Per-selector evaluation and hit counts, in the current try order."""
+        with self._lock:
+            return [{
+                'selector': raw,
+                'evaluations': evaluations,
+                'hits': hits,
+                'hit_rate': round(hits / evaluations, 3) if evaluations else None,
+            } for _, raw, _, evaluations, hits in self._order]
+
+
+class CompiledSource:
+    """
+    A NEWS_SOURCES entry bound to its compiled profile, with the source domain parsed once.
+    Each source keeps its own adaptive selector chains, since markup differs per site.
+    """
+
+    def __init__(self, source, profile, reorder_interval=50):
+        self.name = source['name']
+        self.url = source['url']
+        self.domain = urlparse(self.url).netloc if self.url else None
+        self.profile = profile
+        self.chains = {
+            name: SelectorChain(getattr(profile, f'{name}_selectors'), reorder_interval)
+            for name in ADAPTIVE_CHAINS
+        }
+
+    def owns_url(self, url_domain):
+        """True if a link's domain is the source domain or one of its subdomains."""
+        if not self.domain:
+            return False
+        return url_domain == self.domain or url_domain.endswith('.' + self.domain)
+
+    def selector_stats(self):
+        return {name: chain.stats() for name, chain in self.chains.items()}
+
+
+def compile_profiles(profile_specs=None):
+    """Compiles every profile spec. Returns {name: CompiledProfile}."""
+    profile_specs = profile_specs if profile_specs is not None else EXTRACTION_PROFILES
+    return {name: CompiledProfile(name, spec) for name, spec in profile_specs.items()}
@@ -0,0 +1,107 @@
+import threading
+import time
+from utils.metrics import CACHE_LOOKUPS
+
+
+class HeadlineCache:
+    """
+    Holds the latest headline snapshot and keeps it fresh from a background thread.
+    Requests are always served from the current snapshot; once it is older than the TTL
+    it is still served (stale-while-revalidate) while a single refresh runs in the background.
+    """
+
+    def __init__(self, app, news_scraper, ttl=300, refresh_enabled=True):
+        self.app = app
+        self.news_scraper = news_scraper
+        self.ttl = ttl
+        self.refresh_enabled = refresh_enabled
+        self._snapshot = None # (headlines, fetched_at) - replaced atomically, never mutated
+        self._refresh_lock = threading.Lock() # Ensures only one upstream refresh runs at a time
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.on_refresh = [] # Callables invoked with the new headlines after each successful refresh
+
+    def start(self):
+        """Starts the background refresher thread (idempotent)."""
+        if not self.refresh_enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='headline-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signals the background refresher thread to exit."""
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._stop_event.wait(self.ttl)
+
+    def refresh(self, wait=True):
+        """
+        Scrapes headlines and swaps in a new snapshot.
+        If a refresh is already running, returns immediately (wait=False) or waits for it to finish.
+        Returns True if this call performed the refresh.
+        """
+        if not self._refresh_lock.acquire(blocking=wait):
+            return False
+        try:
+            # Another caller may have refreshed while we were waiting for the lock
+            if wait and self._snapshot and not self.is_stale():
+                return False
+            with self.app.app_context():
+                try:
+                    headlines = self.news_scraper.scrape_headlines()
+                except Exception as e:
+                    self.app.logger.error(f"Background headline refresh failed: {e}")
+                    return False
+                if headlines:
+                    self._snapshot = (headlines, time.time())
+                    self.app.logger.info(f"Headline cache refreshed with {len(headlines)} articles.")
+                    for callback in self.on_refresh:
+                        try:
+                            callback(headlines)
+                        except Exception as e:
+                            self.app.logger.error(f"Headline refresh callback failed: {e}")
+                else:
+                    # Keep serving the previous snapshot rather than replacing it with nothing
+                    self.app.logger.warning("Headline refresh returned no articles; keeping previous snapshot.")
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_async(self):
+        threading.Thread(target=self.refresh, kwargs={'wait': False}, name='headline-revalidate', daemon=True).start()
+
+    def is_stale(self):
+        return self._snapshot is None or self.age() > self.ttl
+
+    def age(self):
+        """Returns the age of the current snapshot in seconds, or None if there is no snapshot."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return time.time() - snapshot[1]
+
+    def get(self):
+        """
+        Returns (headlines, age_seconds) for the latest snapshot.
+        On a cold cache the caller blocks on the (single) in-flight refresh; a stale
+        snapshot is returned immediately and revalidated in the background.
+        """
+        if self._snapshot is None:
+            CACHE_LOOKUPS.inc(cache='headlines', result='miss')
+            self.refresh(wait=True)
+        elif self.is_stale():
+            CACHE_LOOKUPS.inc(cache='headlines', result='stale')
+            if not self._refresh_lock.locked():
+                self._refresh_async()
+        else:
+            CACHE_LOOKUPS.inc(cache='headlines', result='hit')
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return [], None
+        headlines, fetched_at = snapshot
+        return headlines, time.time() - fetched_at
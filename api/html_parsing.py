@@ -0,0 +1,182 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+# Preferred parser backends for 'auto', fastest first. html.parser ships with Python and is always available.
+PARSER_PREFERENCE = ['lxml', 'html.parser']
+
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+def resolve_parser(name='auto'):
+    """
+    Returns the BeautifulSoup parser name to use.
+    'auto' picks the fastest installed backend; an explicitly requested backend
+    (e.g. 'lxml' or 'html5lib') falls back to 'html.parser' when it is not installed.
+    """
+    candidates = PARSER_PREFERENCE if name == 'auto' else [name, 'html.parser']
+    for candidate in candidates:
+        if builder_registry.lookup(candidate) is not None:
+            return candidate
+    return 'html.parser'
+
+
+def charset_from_headers(headers):
+    """
+    Returns the charset declared in the Content-Type header, or None.
+    Unlike response.encoding, this does not default to ISO-8859-1 for text/html, so the
+    parser can fall back to the document's own <meta charset> declaration.
+    """
+    match = _CHARSET_RE.search(headers.get('Content-Type', '') or '')
+    return match.group(1) if match else None
+
+
+def make_soup(body, parser, encoding=None, parse_only=None):
+    """Parses raw response bytes directly (no intermediate str), optionally restricted by a SoupStrainer."""
+    if isinstance(body, str):
+        return BeautifulSoup(body, parser, parse_only=parse_only)
+    return BeautifulSoup(body, parser, from_encoding=encoding, parse_only=parse_only)
+
+
+def _classes(attrs):
+    """Returns the class attribute as a string, whether the builder gives us a string or a list."""
+    value = attrs.get('class') or ''
+    return value if isinstance(value, str) else ' '.join(value)
+
+
+# --- Homepage strainer: only article card elements (and everything inside them) are kept ---
+CARD_CLASSES = {'media-story-card', 'story-card', 'cluster-item', 'basic-card'}
+CARD_CLASS_FRAGMENTS = ('FeedItem', 'ArticleCard')
+CARD_TEST_IDS = {'MediaStoryCard', 'article-card'}
+
+
+def _is_headline_card(name, attrs):
+    if name == 'li':
+        return 'story-item' in _classes(attrs).split()
+    if name != 'div':
+        return False
+    if attrs.get('data-testid') in CARD_TEST_IDS:
+        return True
+    classes = _classes(attrs)
+    return bool(CARD_CLASSES.intersection(classes.split())) or any(fragment in classes for fragment in CARD_CLASS_FRAGMENTS)
+
+
+HEADLINE_STRAINER = SoupStrainer(_is_headline_card)
+
+
+# --- Article strainer: built per extraction profile from the selectors it runs on the parsed page ---
+# Classes of the divs that hold the article text
+ARTICLE_CONTENT_CLASSES = [
+    'article-body', 'text__text__1FZLe', 'body-content', 'main-content', 'StandardArticleBody_body',
+    'ArticleBody_body__2g1Xp', 'article-body_content__17lYj',
+]
+ARTICLE_CONTAINER_TAGS = ('article', 'main')
+
+# Leftmost compound of a selector: everything up to the first combinator, attribute brackets included
+_COMPOUND_RE = re.compile(r'\s*((?:\[[^\]]*\]|[^\s>+~\[])+)')
+_SIMPLE_RE = re.compile(r'\.([\w-]+)|#([\w-]+)|\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*["\']?(.*?)["\']?\s*)?\]')
+_TAG_RE = re.compile(r'[a-zA-Z][\w-]*|\*')
+
+
+class _CompoundMatcher:
+    """Matches a start tag (name, attrs) against one compound selector such as div.foo[data-x="y"]."""
+
+    def __init__(self, tag, classes, element_id, attributes):
+        self.tag = tag
+        self.classes = classes
+        self.element_id = element_id
+        self.attributes = attributes # [(name, operator or None, value)]
+
+    def __call__(self, name, attrs):
+        if self.tag and name != self.tag:
+            return False
+        if self.element_id and attrs.get('id') != self.element_id:
+            return False
+        if self.classes and not self.classes.issubset(_classes(attrs).split()):
+            return False
+        for attr, operator, value in self.attributes:
+            actual = attrs.get(attr)
+            if actual is None:
+                return False
+            if not isinstance(actual, str):
+                actual = ' '.join(actual)
+            if operator == '=' and actual != value:
+                return False
+            if operator == '*=' and value not in actual:
+                return False
+            if operator == '^=' and not actual.startswith(value):
+                return False
+            if operator == '$=' and not actual.endswith(value):
+                return False
+            if operator == '~=' and value not in actual.split():
+                return False
+            if operator == '|=' and actual != value and not actual.startswith(value + '-'):
+                return False
+        return True
+
+
+def compound_matcher(selector):
+    """
+    Returns a start-tag matcher for the leftmost compound of a CSS selector, or None if the selector
+    cannot be decided from the start tag and its ancestors' subtree alone: sibling combinators
+    ('+', '~') and pseudo-classes in the leftmost compound depend on elements a strainer would drop.
+    Keeping the leftmost element keeps its whole subtree, so the rest of the selector still matches.
+    """
+    match = _COMPOUND_RE.match(selector)
+    if not match or re.search(r'[+~](?![^\[]*\])', selector[match.end():]):
+        return None
+    compound = match.group(1)
+    tag_match = _TAG_RE.match(compound)
+    tag = tag_match.group(0).lower() if tag_match else None
+    rest = compound[tag_match.end():] if tag_match else compound
+    classes, element_id, attributes, position = set(), None, [], 0
+    for simple in _SIMPLE_RE.finditer(rest):
+        if simple.start() != position:
+            return None
+        position = simple.end()
+        css_class, id_value, attr, operator, value = simple.groups()
+        if css_class:
+            classes.add(css_class)
+        elif id_value:
+            element_id = id_value
+        else:
+            attributes.append((attr, operator, value))
+    if position != len(rest): # A pseudo-class or something else we do not evaluate
+        return None
+    return _CompoundMatcher(None if tag == '*' else tag, frozenset(classes), element_id, attributes)
+
+
+def build_article_strainer(selectors, container_classes=(), container_class_pattern=None):
+    """
+    A SoupStrainer for article pages that keeps every element a profile can look up after parsing:
+    the leftmost element of each of its selectors (with its subtree), all <meta> tags, <article> and
+    <main>, divs with one of container_classes, and divs whose class matches container_class_pattern.
+    Returns None when a selector cannot be strained safely (see compound_matcher); the page is
+    then parsed in full, so straining never changes what is extracted.
+    """
+    by_tag, any_tag = {}, []
+    for selector in selectors:
+        matcher = compound_matcher(selector)
+        if matcher is None:
+            return None
+        if matcher.tag:
+            by_tag.setdefault(matcher.tag, []).append(matcher)
+        else:
+            any_tag.append(matcher)
+    container_classes = frozenset(container_classes)
+
+    def is_article_part(name, attrs):
+        if name == 'meta' or name in ARTICLE_CONTAINER_TAGS:
+            return True
+        if name == 'div':
+            classes = _classes(attrs)
+            if container_classes.intersection(classes.split()):
+                return True
+            if container_class_pattern is not None and container_class_pattern.search(classes):
+                return True
+        for matcher in by_tag.get(name, ()):
+            if matcher(name, attrs):
+                return True
+        return any(matcher(name, attrs) for matcher in any_tag)
+
+    return SoupStrainer(is_article_part)
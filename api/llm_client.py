@@ -0,0 +1,391 @@
+import importlib.util
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from flask import current_app
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import LLM_CALL_SECONDS
+
+# Rate limiting, request timeout and server-side errors are worth retrying; other 4xx errors are not
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """A failed LLM call. `retryable` tells whether the same provider may succeed on a retry."""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class LLMUnavailableError(LLMError):
+    """Every configured provider failed (or is switched off by its circuit breaker)."""
+
+
+class OpenRouterProvider:
+    """Chat completions on the OpenRouter API over the shared keep-alive HTTP client."""
+
+    name = 'openrouter'
+
+    def __init__(self, http_client, api_url, api_key, model):
+        self.http_client = http_client
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+
+    def complete(self, messages, timeout):
+        response = self._post(messages, timeout)
+        try:
+            data = response.json()
+        except ValueError:
+            raise LLMError(f"Unexpected OpenRouter response: {response.text[:200]}", retryable=True)
+        self._raise_for_error(data)
+        try:
+            return data['choices'][0]['message']['content'].strip()
+        except (KeyError, IndexError, TypeError, AttributeError):
+            raise LLMError(f"Unexpected OpenRouter response structure: {str(data)[:200]}")
+
+    def stream(self, messages, timeout):
+        """Yields content deltas as OpenRouter streams them (stream: true, server-sent events)."""
+        response = self._post(messages, timeout, stream=True)
+        with response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    # Lines starting with ':' are keep-alive comments
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    self._raise_for_error(chunk)
+                    choices = chunk.get('choices') or [{}]
+                    delta = (choices[0].get('delta') or {}).get('content')
+                    if delta:
+                        yield delta
+            except requests.exceptions.RequestException as e:
+                raise LLMError(f"OpenRouter stream interrupted: {e}", retryable=True)
+            except ValueError as e:
+                raise LLMError(f"Unexpected OpenRouter stream data: {e}")
+
+    def _post(self, messages, timeout, stream=False):
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": self.model,
+            "messages": messages
+        }
+        if stream:
+            headers["Accept"] = "text/event-stream"
+            payload["stream"] = True
+        try:
+            response = self.http_client.post(self.api_url, headers=headers, json=payload, timeout=timeout, stream=stream)
+        except requests.exceptions.RequestException as e:
+            raise LLMError(f"Failed to connect to OpenRouter API: {e}", retryable=True)
+        if response.status_code >= 400:
+            response.close()
+            raise LLMError(f"OpenRouter API returned HTTP {response.status_code}", retryable=response.status_code in RETRYABLE_STATUS)
+        return response
+
+    @staticmethod
+    def _raise_for_error(data):
+        # OpenRouter reports some upstream failures in the body of a 200 response
+        error = data.get('error') if isinstance(data, dict) else None
+        if error:
+            code = error.get('code') if isinstance(error, dict) else None
+            raise LLMError(f"OpenRouter API error: {error}", retryable=code in RETRYABLE_STATUS)
+
+
+class GeminiProvider:
+    """
+    Google Gemini through the google-generativeai SDK.
+    The SDK is only imported and configured on the first call, so a worker that never fails over
+    to Gemini never loads it (it is large and slow to import).
+    """
+
+    name = 'gemini'
+
+    def __init__(self, api_key, model):
+        if importlib.util.find_spec('google.generativeai') is None:
+            raise ImportError("No module named 'google.generativeai'")
+        self.api_key = api_key
+        self.model = model
+        self._gemini_model = None
+        self._lock = threading.Lock()
+
+    @property
+    def gemini_model(self):
+        if self._gemini_model is None:
+            with self._lock:
+                if self._gemini_model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._gemini_model = genai.GenerativeModel(self.model)
+        return self._gemini_model
+
+    def complete(self, messages, timeout):
+        try:
+            response = self.gemini_model.generate_content(self._contents(messages), request_options={'timeout': timeout})
+            return response.text.strip()
+        except Exception as e:
+            raise self._error(e)
+
+    def stream(self, messages, timeout):
+        try:
+            response = self.gemini_model.generate_content(self._contents(messages), stream=True, request_options={'timeout': timeout})
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise self._error(e)
+
+    @staticmethod
+    def _contents(messages):
+        """
+        OpenAI-style messages to Gemini contents: 'assistant' is 'model', system text is sent as
+        user text, and consecutive turns of the same role are merged since Gemini expects them to alternate.
+        """
+        contents = []
+        for message in messages:
+            role = 'model' if message['role'] == 'assistant' else 'user'
+            if contents and contents[-1]['role'] == role:
+                contents[-1]['parts'].append(message['content'])
+            else:
+                contents.append({'role': role, 'parts': [message['content']]})
+        return contents
+
+    @staticmethod
+    def _error(e):
+        # google.api_core exceptions carry the HTTP status in .code
+        code = getattr(e, 'code', None)
+        retryable = code in RETRYABLE_STATUS or isinstance(e, (TimeoutError, ConnectionError))
+        return LLMError(f"Gemini API error: {e}", retryable=retryable)
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls, for the hedging threshold."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction, min_samples=20):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class ResilientLLMClient:
+    """
+    Calls a list of LLM providers in order of preference.
+    - Every attempt has its own deadline, and the whole call has a total deadline, so a slow
+      provider cannot hold a gunicorn worker for long.
+    - Retryable errors (timeouts, connection errors, 429, 5xx) are retried with full-jitter
+      exponential backoff, up to max_attempts per provider.
+    - When an attempt runs longer than the provider's recent p95 latency, a hedged second request
+      is sent and whichever answers first wins (non-streaming calls only).
+    - Each provider has a circuit breaker; while it is open, calls fail over to the next provider.
+    Streaming calls are retried and failed over only until the first chunk has been received.
+    """
+
+    def __init__(self, providers, attempt_timeout=15, total_timeout=40, max_attempts=3,
+                 backoff_base=0.5, backoff_max=4.0, hedge_enabled=True, hedge_min_delay=2.0,
+                 breaker_failures=5, breaker_reset=30, max_concurrent_calls=16):
+        self.providers = providers
+        self.attempt_timeout = attempt_timeout
+        self.total_timeout = total_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.breakers = {provider.name: CircuitBreaker(breaker_failures, breaker_reset) for provider in providers}
+        self.latencies = {provider.name: LatencyTracker() for provider in providers}
+        # Attempts run here so the caller can stop waiting at the deadline; an abandoned request
+        # finishes (or times out) in the background
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_calls, thread_name_prefix='llm-call')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {provider.name: {'calls': 0, 'failures': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0}
+                          for provider in providers}
+
+    @property
+    def primary(self):
+        return self.providers[0]
+
+    @property
+    def in_flight(self):
+        """LLM calls currently being served for callers of this worker."""
+        with self._lock:
+            return self._in_flight
+
+    def complete(self, messages):
+        """Returns the answer to a list of chat messages ({'role', 'content'}). Raises LLMUnavailableError."""
+        self._track(1)
+        try:
+            return self._with_failover(lambda provider, timeout: self._hedged_attempt(provider, messages, timeout))
+        finally:
+            self._track(-1)
+
+    def stream(self, messages):
+        """Yields the answer in chunks as the model produces them. Raises LLMError."""
+        self._track(1)
+        try:
+            started = {}
+
+            def first_chunk(provider, timeout):
+                started['at'] = time.monotonic()
+                chunks = provider.stream(messages, timeout)
+                try:
+                    return provider, chunks, next(chunks)
+                except StopIteration:
+                    return provider, iter(()), None
+
+            provider, chunks, first = self._with_failover(first_chunk, mode='stream')
+            if first is None:
+                return
+            yield first
+            try:
+                yield from chunks
+            except LLMError:
+                self._failed(provider)
+                raise
+            self.latencies[provider.name].record(time.monotonic() - started['at'])
+        finally:
+            self._track(-1)
+
+    def _with_failover(self, attempt_fn, mode='complete'):
+        deadline = time.monotonic() + self.total_timeout
+        last_error = None
+        for provider in self.providers:
+            breaker = self.breakers[provider.name]
+            counters = self._counters[provider.name]
+            for attempt in range(self.max_attempts):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LLMUnavailableError(f"AI providers did not answer within {self.total_timeout}s: {last_error}", retryable=True)
+                if not breaker.allow():
+                    last_error = last_error or LLMError(f"{provider.name} circuit breaker is open", retryable=True)
+                    break
+                with self._lock:
+                    counters['calls'] += 1
+                attempt_start = time.perf_counter()
+                try:
+                    result = attempt_fn(provider, min(self.attempt_timeout, remaining))
+                except LLMError as e:
+                    last_error = e
+                except Exception as e:
+                    last_error = LLMError(f"{provider.name}: {e}")
+                else:
+                    breaker.record_success()
+                    self._observe(provider, mode, 'ok', attempt_start)
+                    return result
+                self._observe(provider, mode, 'error', attempt_start)
+
+                current_app.logger.warning(f"LLM call to {provider.name} failed (attempt {attempt + 1}/{self.max_attempts}): {last_error}")
+                if not last_error.retryable:
+                    # A bad request is not a sign of an unhealthy provider: fail over without tripping the breaker,
+                    # but let the next call make the half-open trial this one used up
+                    breaker.release_trial()
+                    with self._lock:
+                        counters['failures'] += 1
+                    break
+                self._failed(provider)
+                if attempt + 1 < self.max_attempts:
+                    with self._lock:
+                        counters['retries'] += 1
+                    # Full jitter keeps workers that failed together from retrying together
+                    backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    time.sleep(min(backoff, max(deadline - time.monotonic(), 0)))
+        raise LLMUnavailableError(f"All AI providers failed: {last_error}", retryable=getattr(last_error, 'retryable', False))
+
+    def _hedged_attempt(self, provider, messages, timeout):
+        """One attempt against a provider, bounded by timeout, hedged with a second request if it is slow."""
+        start = time.monotonic()
+        deadline = start + timeout
+        hedge_delay = self._hedge_delay(provider)
+        futures = {self._executor.submit(self._timed, provider, messages, timeout): False}
+        last_error = None
+        while futures:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            hedge_pending = hedge_delay is not None and len(futures) == 1 and not any(futures.values())
+            wait_for = deadline - now
+            if hedge_pending:
+                wait_for = min(wait_for, max(start + hedge_delay - now, 0))
+            done, _ = wait(list(futures), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                is_hedge = futures.pop(future)
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self.latencies[provider.name].record(elapsed)
+                if is_hedge:
+                    with self._lock:
+                        self._counters[provider.name]['hedge_wins'] += 1
+                return result
+            if not done and hedge_pending and time.monotonic() - start >= hedge_delay:
+                with self._lock:
+                    self._counters[provider.name]['hedges'] += 1
+                futures[self._executor.submit(self._timed, provider, messages, max(deadline - time.monotonic(), 0.1))] = True
+                hedge_delay = None
+        if last_error is not None and not futures:
+            raise last_error
+        raise LLMError(f"{provider.name} did not answer within {timeout:.1f}s", retryable=True)
+
+    def _hedge_delay(self, provider):
+        if not self.hedge_enabled:
+            return None
+        p95 = self.latencies[provider.name].percentile(0.95)
+        return None if p95 is None else max(p95, self.hedge_min_delay)
+
+    @staticmethod
+    def _timed(provider, messages, timeout):
+        start = time.monotonic()
+        result = provider.complete(messages, timeout)
+        return result, time.monotonic() - start
+
+    @staticmethod
+    def _observe(provider, mode, outcome, start):
+        LLM_CALL_SECONDS.observe(time.perf_counter() - start, provider=provider.name, model=provider.model, mode=mode, outcome=outcome)
+
+    def _failed(self, provider):
+        self.breakers[provider.name].record_failure()
+        with self._lock:
+            self._counters[provider.name]['failures'] += 1
+
+    def _track(self, delta):
+        with self._lock:
+            self._in_flight += delta
+
+    def stats(self):
+        providers = {}
+        for provider in self.providers:
+            with self._lock:
+                counters = dict(self._counters[provider.name])
+            p95 = self.latencies[provider.name].percentile(0.95)
+            providers[provider.name] = dict(
+                counters,
+                model=provider.model,
+                p95_seconds=round(p95, 3) if p95 is not None else None,
+                breaker=self.breakers[provider.name].stats(),
+            )
+        return {
+            'in_flight': self.in_flight,
+            'providers': providers,
+        }
@@ -1,15 +1,58 @@
 import requests
-from bs4 import BeautifulSoup
-import uuid
 import re
 from flask import current_app
+from utils.http_client import get_http_client
+from utils.http_cache import HTTPCache
+from utils.metrics import SCRAPE_STAGE_SECONDS, SCRAPE_FAILURES, CACHE_LOOKUPS
+from api.html_parsing import resolve_parser, charset_from_headers, make_soup
+from api.extraction_profiles import compile_profiles, CompiledSource, DEFAULT_PROFILE
+from api.article_store import article_id_for_url
 from urllib.parse import urljoin, urlparse
 import time # Import time for delays
 import random # Import random for user agent rotation
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_HEADLINES = 40 # Limit total articles returned by scrape_headlines
+# Bump whenever extraction logic changes, so records cached from older code are not reused on a 304
+EXTRACTION_VERSION = 4
+
+
+class DomainThrottle:
+    """
+    Enforces a minimum delay between requests to the same domain.
+    Requests to different domains are never delayed by each other.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_allowed = {} # domain -> earliest time.monotonic() for the next request
+
+    def wait(self, domain):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(domain, now))
+            self._next_allowed[domain] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class NewsScraper:
     def __init__(self, news_sources):
         self.news_sources = news_sources
+        # Compile extraction profiles once; each source is bound to its profile with its domain pre-parsed
+        self.profiles = compile_profiles()
+        self.default_profile = self.profiles[current_app.config.get('EXTRACTION_DEFAULT_PROFILE', DEFAULT_PROFILE)]
+        reorder_interval = current_app.config.get('SELECTOR_REORDER_INTERVAL', 50)
+        self.sources = []
+        for source in news_sources:
+            profile = self.profiles.get(source.get('profile'), self.default_profile)
+            if source.get('profile') and source['profile'] not in self.profiles:
+                current_app.logger.warning(f"Unknown extraction profile '{source['profile']}' for {source['name']}; using '{self.default_profile.name}'.")
+            self.sources.append(CompiledSource(source, profile, reorder_interval))
+        # Articles on domains no source owns are extracted with the default profile
+        self.default_source = CompiledSource({'name': 'default', 'url': None}, self.default_profile, reorder_interval)
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36',
@@ -29,227 +72,300 @@ class NewsScraper:
             'Sec-Fetch-Site': 'none',
             'Sec-Fetch-User': '?1',
         }
+        self.concurrent_fetch = current_app.config.get('SCRAPER_CONCURRENT_FETCH', True)
+        self.max_workers = current_app.config.get('SCRAPER_MAX_WORKERS', 8)
+        self.domain_throttle = DomainThrottle(current_app.config.get('SCRAPER_DOMAIN_DELAY', 1.0))
+        self.http_client = get_http_client() # Shared keep-alive connection pools
+        # Fastest installed HTML parser backend (lxml where available, html.parser otherwise)
+        self.parser = resolve_parser(current_app.config.get('HTML_PARSER', 'auto'))
+        # Restrict parsing to article cards / article parts instead of building the whole document tree
+        self.use_strainers = current_app.config.get('HTML_PARSE_STRAINERS', True)
+        self.http_cache = None
+        if current_app.config.get('HTTP_CACHE_ENABLED', False):
+            self.http_cache = HTTPCache(current_app.config['HTTP_CACHE_DIR'], current_app.config['HTTP_CACHE_MAX_BYTES'])
+        # Optional callable(stage, seconds), also told how long each fetch/parse/select/extract stage took (see benchmarks/)
+        self.stage_observer = None
 
     def _get_domain(self, url):
         """Helper to get the domain from a URL."""
         return urlparse(url).netloc
 
+    def _request_headers(self):
+        """Returns a copy of the default headers with a rotated User-Agent (safe to use from worker threads)."""
+        headers = dict(self.headers)
+        headers['User-Agent'] = random.choice(self.user_agents)
+        return headers
+
+    def _fetch_page(self, url, timeout):
+        """
+        GETs a page, revalidating against the HTTP cache when one is configured.
+        Returns (body, encoding, cached_records): the raw body bytes and the charset declared in the
+        response headers (None lets the parser detect it). cached_records is only set when the server
+        answered 304 and records extracted from the unchanged page are available; body is None then.
+        """
+        entry = self.http_cache.get(url) if self.http_cache else None
+        headers = self._request_headers()
+        if entry:
+            headers.update(self.http_cache.conditional_headers(entry))
+
+        response = self.http_client.get(url, headers=headers, timeout=timeout)
+        if self.http_cache:
+            CACHE_LOOKUPS.inc(cache='http', result='hit' if response.status_code == 304 and entry else 'miss')
+        if response.status_code == 304 and entry:
+            self.http_cache.touch(url)
+            if entry.get('records') is not None and entry.get('records_version') == EXTRACTION_VERSION:
+                return None, None, entry['records']
+            body = self.http_cache.read_body(url)
+            if body is not None:
+                return body, entry.get('encoding'), None
+            # The body was evicted, so fetch the page again without validators
+            response = self.http_client.get(url, headers=self._request_headers(), timeout=timeout)
+
+        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+        encoding = charset_from_headers(response.headers)
+        if self.http_cache:
+            self.http_cache.store(url, response, encoding)
+        return response.content, encoding, None
+
+    def _stage_start(self):
+        return time.perf_counter()
+
+    def _stage_done(self, page, stage, started):
+        """
+        Records the time since `started` in the stage histogram (and reports it to the stage observer);
+        returns the start of the next stage.
+        """
+        now = time.perf_counter()
+        SCRAPE_STAGE_SECONDS.observe(now - started, page=page, stage=stage)
+        if self.stage_observer is not None:
+            self.stage_observer(stage, now - started)
+        return now
+
+    def _store_records(self, url, records):
+        """Caches records extracted from a page so an unchanged page does not need to be parsed again."""
+        if self.http_cache:
+            self.http_cache.store_records(url, records, EXTRACTION_VERSION)
+
     def scrape_headlines(self):
         """
         Scrapes the latest news headlines from all configured news sources.
         Returns a list of dictionaries, each containing 'id', 'title', 'url', 'source', 'snippet', and 'image_url'.
         Attempts to get around 30-40 articles in total.
+        Sources are fetched in parallel on a bounded thread pool when SCRAPER_CONCURRENT_FETCH is enabled.
         """
         all_headlines = []
-        seen_urls = set() # To avoid duplicate articles across sources
-
-        for source in self.news_sources:
-            source_name = source['name']
-            source_url = source['url']
-            current_app.logger.info(f"Attempting to scrape headlines from: {source_name} ({source_url})")
-
-            # Rotate User-Agent for each request
-            self.headers['User-Agent'] = random.choice(self.user_agents)
-
-            try:
-                response = requests.get(source_url, headers=self.headers, timeout=10)
-                response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # --- REVISED STRATEGY FOR REUTERS HEADLINES ---
-                # Focus on elements that represent a complete news article card on the homepage.
-                # These selectors are based on common patterns for how Reuters structures its main news feed.
-                # We prioritize elements that are likely to contain a title, link, and image together.
-                article_card_selectors = [
-                    'div.media-story-card', # The most common card for news stories
-                    'div[data-testid="MediaStoryCard"]', # Alternative data-testid for story cards
-                    'div.story-card', # A more generic story card class
-                    'div[class*="FeedItem"]', # Common pattern for feed items
-                    'div[class*="ArticleCard"]', # Common pattern for article cards
-                    'div[data-testid="article-card"]', # Another potential data-testid
-                    'li.story-item', # Sometimes list items are used for news feeds
-                    'div.cluster-item', # For news clusters, might contain multiple stories
-                    'div.basic-card', # Another generic card class
-                ]
-
-                # Select all potential article card elements
-                for card_element in soup.select(', '.join(article_card_selectors)):
-                    # Try to find the primary link within this card element
-                    # Prioritize links that are likely headlines (e.g., within h2/h3 or with specific data-testids)
-                    link_tag = card_element.select_one('a[data-testid="Link"], h2 a, h3 a, a.media-story-card__heading__2g1Xp')
-                    
-                    # If no suitable link is found within this card, skip it
-                    if not link_tag:
-                        continue
-
-                    href = link_tag.get('href')
-                    title = link_tag.get_text(strip=True)
-
-                    if not href or not title:
-                        continue
-
-                    # Construct full URL if it's relative
-                    if href.startswith('/'):
-                        full_url = urljoin(source_url, href)
-                    else:
-                        full_url = href
-
-                    # Enhanced filtering for valid news article links based on common patterns
-                    # This regex helps filter out non-article links like categories, special sections, or author pages.
-                    if (
-                        re.search(r'/(article|news|business|markets|world|technology|sports|lifestyle|science|health|legal|politics|economy|companies|commodities|deals|funds|currencies|wealth|arts|media|entertainment|environment|climate|innovation|space|gaming|oddly-enough)/', full_url) and
-                        not re.search(r'(photogallery|videos|elections|liveblog|tags|contact|about|privacy|terms|login|signup|#|javascript:|mailto:|/amp/|/web-stories/|/photos/|/videos|/live-updates|/topic|/authors|/rss|/sitemap|/subscribe|/apps|/partner|/advertise|/feedback|/careers|/terms-of-use|/privacy-policy|/cookie-policy|/disclaimer|/archive|/newsletter|/faq|/press-release|/events|/jobs|/deals|/shop|/gallery|/embed|/widget|/premium|/plus|/epaper|/contactus|/breakingnews|/authors/|/topics/|/search\?)', full_url, re.IGNORECASE)
-                    ):
-                        
-                        # Ensure the link is within the same domain or a subdomain
-                        parsed_source_domain = self._get_domain(source_url)
-                        parsed_full_url_domain = self._get_domain(full_url)
-                        if not (parsed_full_url_domain == parsed_source_domain or \
-                                parsed_full_url_domain.endswith('.' + parsed_source_domain)):
-                            continue
-
-                        if full_url in seen_urls:
-                            continue
-                        
-                        seen_urls.add(full_url)
-
-                        # --- Attempt to find a snippet/description within the current card element ---
-                        snippet = None
-                        snippet_selectors = [
-                            'p.media-story-card__description__2g1Xp', # Specific class for description
-                            'p[data-testid="Body"]', # Common data-testid for body text/snippet
-                            'div.story-content p', # Paragraph within story content divs
-                            'p.text__text__1FZLe', # Common text class
-                            'div.article-excerpt p', # Paragraph within article excerpts
-                            'div[class*="Description"] p', # Generic description div
-                            'div[class*="Snippet"] p', # Generic snippet div
-                        ]
-                        for s_selector in snippet_selectors:
-                            snippet_tag = card_element.select_one(s_selector)
-                            if snippet_tag:
-                                snippet_text = snippet_tag.get_text(strip=True)
-                                if snippet_text and len(snippet_text) > 20 and len(snippet_text) < 300 and snippet_text != title:
-                                    snippet = snippet_text
-                                    break
-                        
-                        # Fallback for snippet if not found by specific selectors
-                        if not snippet:
-                            # Try to get text from a general paragraph within the card, excluding the title
-                            for p_tag in card_element.find_all('p'):
-                                p_text = p_tag.get_text(strip=True)
-                                if p_text and p_text != title and len(p_text) > 50 and len(p_text) < 300:
-                                    snippet = p_text
-                                    break
-                        
-                        # Final fallback: Use a truncated version of the title if no snippet is found
-                        if not snippet:
-                            snippet = title[:100] + '...' if len(title) > 100 else title
-
-                        # --- Attempt to find an image URL for the headline card within the current element ---
-                        image_url = None
-                        # Specific Reuters thumbnail selectors within the card element
-                        thumbnail_selectors = [
-                            'img[data-testid="media-image"]',
-                            'img.media-story-card__image__2g1Xp',
-                            'img.media-object__image__3tY4J',
-                            'img.image__image__1g1Xp', # Generic image class
-                            'img[src*="thumb"]', # Images with 'thumb' in src
-                            'img[src*="small"]', # Images with 'small' in src
-                            'div.media-object__media__1g1Xp img', # Image within a common media object container
-                            'div.Image_container img', # Another common image container
-                            'div.MediaItem_image img', # Another common image container
-                            'figure img', # General figure image
-                            'img.reuters-asset-image', # A common class for Reuters images
-                            'img[data-src]', # Sometimes images use data-src attribute (lazy loading)
-                            'div.media-object__image-wrapper img', # Specific wrapper for images
-                            'div.media-story-card__image-wrapper img', # Another specific wrapper
-                            'img.w-full.h-full.object-cover', # Common Tailwind-like classes for images
-                            'img[class*="Image"]', # Generic image class pattern
-                        ]
-                        for img_selector in thumbnail_selectors:
-                            img_tag = card_element.select_one(img_selector) # Search within the current card element
-                            if img_tag and (img_tag.get('src') or img_tag.get('data-src')): # Check both src and data-src
-                                img_src = urljoin(source_url, img_tag.get('src') or img_tag.get('data-src'))
-                                # Filter out tiny icons/placeholders, ensure it's a valid image URL
-                                # Also check for minimum dimensions if possible (though not always in HTML attributes)
-                                if not re.search(r'(logo|icon|spacer|thumb-small|ads|gif|svg)\.(png|jpg|jpeg)', img_src, re.IGNORECASE) and \
-                                   not re.search(r'data:image', img_src, re.IGNORECASE) and \
-                                   (img_tag.get('width') and int(img_tag['width']) > 50 or img_tag.get('height') and int(img_tag['height']) > 50): # Check for actual width/height attributes
-                                    image_url = img_src
-                                    break
-                        
-                        # Fallback to a generic placeholder if no image is found for the headline
-                        if not image_url:
-                            image_url = "https://placehold.co/400x160/4B0082/FFFFFF?text=Image+Missing"
-
-
-                        article_id = str(uuid.uuid4())
-                        all_headlines.append({
-                            'id': article_id,
-                            'title': title,
-                            'url': full_url,
-                            'source': source_name,
-                            'snippet': snippet, # Add the scraped snippet here
-                            'image_url': image_url # Add the scraped image URL here
-                        })
-                        # Store in global articles_db for later retrieval
-                        current_app.config['ARTICLES_DB'][article_id] = {
-                            'title': title,
-                            'url': full_url,
-                            'source': source_name,
-                            'content': None, # Content will be scraped on demand
-                            'description': None, # Description will be scraped on demand (from meta tags of actual article)
-                            'image_url': image_url, # Store image_url here too
-                            'snippet': snippet # Store snippet here too
-                        }
-                        
-                        if len(all_headlines) >= 40: # Limit total articles
-                            break # Break from the inner loop over card_elements
-
-            except requests.exceptions.RequestException as e:
-                current_app.logger.error(f"Network or HTTP error during headline scraping from {source_name}: {e}")
-            except Exception as e:
-                current_app.logger.error(f"Error scraping headlines from {source_name}: {e}")
-            
-            # Add a small delay between requests to different sources
-            time.sleep(1) # 1 second delay
+        seen_ids = set() # To avoid duplicate articles across sources
+
+        if self.concurrent_fetch and len(self.sources) > 1:
+            app = current_app._get_current_object()
+
+            def scrape_in_context(source):
+                with app.app_context():
+                    return self._scrape_source(source)
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.sources)),
+                                    thread_name_prefix='headline-fetch') as executor:
+                # map() keeps results in NEWS_SOURCES order, so the merge below is deterministic
+                results = list(executor.map(scrape_in_context, self.sources))
+        else:
+            results = [self._scrape_source(source) for source in self.sources]
+
+        # Merge results in source order, de-duplicating across sources
+        for cards in results:
+            for card in cards:
+                # Ids are derived from the canonical URL, so they also dedupe URL variants of one story
+                article_id = article_id_for_url(card['url'])
+                if article_id in seen_ids:
+                    continue
+                seen_ids.add(article_id)
+
+                all_headlines.append(dict(card, id=article_id))
+                if len(all_headlines) >= MAX_HEADLINES:
+                    break
+            if len(all_headlines) >= MAX_HEADLINES:
+                break
+
+        # Store in the shared article store for later retrieval (content is scraped on demand and kept across refreshes)
+        if all_headlines:
+            current_app.config['ARTICLES_DB'].upsert_headlines(all_headlines)
 
         return all_headlines
 
+    def _scrape_source(self, source):
+        """
+        Scrapes the article cards of a single (compiled) news source.
+        Returns a list of dictionaries with 'title', 'url', 'source', 'snippet' and 'image_url',
+        de-duplicated within the source and capped at MAX_HEADLINES.
+        """
+        cards = []
+        seen_urls = set()
+        profile = source.profile
+        current_app.logger.info(f"Attempting to scrape headlines from: {source.name} ({source.url})")
+
+        # Politeness delay applies per domain only, so different sources are fetched without waiting
+        self.domain_throttle.wait(source.domain)
+
+        try:
+            stage = self._stage_start()
+            body, encoding, cached_cards = self._fetch_page(source.url, timeout=10)
+            stage = self._stage_done('homepage', 'fetch', stage)
+            if cached_cards is not None:
+                current_app.logger.info(f"{source.name} homepage not modified; reusing {len(cached_cards)} cached headlines.")
+                return cached_cards
+            soup = make_soup(body, self.parser, encoding, parse_only=profile.headline_strainer if self.use_strainers else None)
+            stage = self._stage_done('homepage', 'parse', stage)
+
+            # Select all potential article card elements
+            for card_element in profile.card_selector.select(soup):
+                # Try to find the primary link within this card element
+                link_tag = profile.link_selector.select_one(card_element)
+
+                # If no suitable link is found within this card, skip it
+                if not link_tag:
+                    continue
+
+                href = link_tag.get('href')
+                title = link_tag.get_text(strip=True)
+
+                if not href or not title:
+                    continue
+
+                # Construct full URL if it's relative
+                if href.startswith('/'):
+                    full_url = urljoin(source.url, href)
+                else:
+                    full_url = href
+
+                # Filter out non-article links and links to other domains (subdomains are allowed)
+                if not profile.is_article_url(full_url) or not source.owns_url(self._get_domain(full_url)):
+                    continue
+
+                if full_url in seen_urls:
+                    continue
+
+                seen_urls.add(full_url)
+
+                # --- Attempt to find a snippet/description within the current card element ---
+                def snippet_from(snippet_tag):
+                    snippet_text = snippet_tag.get_text(strip=True)
+                    if snippet_text and len(snippet_text) > 20 and len(snippet_text) < 300 and snippet_text != title:
+                        return snippet_text
+                    return None
+
+                snippet = source.chains['snippet'].first(card_element, snippet_from)
+
+                # Fallback for snippet if not found by specific selectors
+                if not snippet:
+                    # Try to get text from a general paragraph within the card, excluding the title
+                    for p_tag in card_element.find_all('p'):
+                        p_text = p_tag.get_text(strip=True)
+                        if p_text and p_text != title and len(p_text) > 50 and len(p_text) < 300:
+                            snippet = p_text
+                            break
+
+                # Final fallback: Use a truncated version of the title if no snippet is found
+                if not snippet:
+                    snippet = title[:100] + '...' if len(title) > 100 else title
+
+                # --- Attempt to find an image URL for the headline card within the current element ---
+                def thumbnail_from(img_tag):
+                    if not (img_tag.get('src') or img_tag.get('data-src')): # Check both src and data-src
+                        return None
+                    img_src = urljoin(source.url, img_tag.get('src') or img_tag.get('data-src'))
+                    # Filter out tiny icons/placeholders, ensure it's a valid image URL
+                    # Also check for minimum dimensions if possible (though not always in HTML attributes)
+                    if not profile.thumbnail_exclude.search(img_src) and \
+                       'data:image' not in img_src.lower() and \
+                       (img_tag.get('width') and int(img_tag['width']) > 50 or img_tag.get('height') and int(img_tag['height']) > 50): # Check for actual width/height attributes
+                        return img_src
+                    return None
+
+                image_url = source.chains['thumbnail'].first(card_element, thumbnail_from) # Search within the current card element
+
+                # Fallback to a generic placeholder if no image is found for the headline
+                if not image_url:
+                    image_url = "https://placehold.co/400x160/4B0082/FFFFFF?text=Image+Missing"
+
+                cards.append({
+                    'title': title,
+                    'url': full_url,
+                    'source': source.name,
+                    'snippet': snippet, # Add the scraped snippet here
+                    'image_url': image_url # Add the scraped image URL here
+                })
+
+                if len(cards) >= MAX_HEADLINES: # No source can contribute more than the overall limit
+                    break # Break from the loop over card_elements
+
+            self._stage_done('homepage', 'select', stage)
+            self._store_records(source.url, cards)
+
+        except requests.exceptions.RequestException as e:
+            current_app.logger.error(f"Network or HTTP error during headline scraping from {source.name}: {e}")
+            SCRAPE_FAILURES.inc(page='homepage', reason='network')
+        except Exception as e:
+            current_app.logger.error(f"Error scraping headlines from {source.name}: {e}")
+            SCRAPE_FAILURES.inc(page='homepage', reason='error')
+
+        return cards
+
+    def _source_for_url(self, url):
+        """Returns the compiled source that owns a URL's domain, or the default-profile source."""
+        domain = self._get_domain(url)
+        for source in self.sources:
+            if source.owns_url(domain):
+                return source
+        return self.default_source
+
+    def selector_stats(self):
+        """Per-source selector evaluation / hit counts, to spot dead selectors when markup drifts."""
+        stats = {source.name: source.selector_stats() for source in self.sources}
+        stats[self.default_source.name] = self.default_source.selector_stats()
+        return stats
+
     def scrape_article_content(self, article_url):
         """
         Scrapes the full content, description, author, in-article summary, and image of a single news article.
-        Returns a dictionary with 'content', 'description', 'author', 'in_article_summary', and 'image_url'.
+        Returns a dictionary with 'content', 'description', 'author', 'in_article_summary', and 'image_url',
+        or None if the article could not be fetched or has no recognisable content, so that callers
+        never store a failure as if it were the article (and try again on the next request).
         """
         article_data = {
-            'content': "Failed to scrape article content.",
+            'content': None,
             'description': None,
             'author': None,             # New field for author
             'in_article_summary': None, # New field for in-article summary
             'image_url': None
         }
+        source = self._source_for_url(article_url)
+        profile = source.profile
         try:
-            response = requests.get(article_url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            stage = self._stage_start()
+            body, encoding, cached_article = self._fetch_page(article_url, timeout=15)
+            stage = self._stage_done('article', 'fetch', stage)
+            if cached_article is not None:
+                current_app.logger.info(f"Article not modified; reusing cached content for {article_url}")
+                return cached_article
+            soup = None
+            if self.use_strainers and profile.article_strainer is not None:
+                soup = make_soup(body, self.parser, encoding, parse_only=profile.article_strainer)
+                # Without a recognised content container we need the whole document (e.g. the <body> fallback)
+                if not (soup.find(['article', 'main']) or soup.find('div', class_=profile.content_classes)):
+                    soup = None
+            if soup is None:
+                soup = make_soup(body, self.parser, encoding)
+            stage = self._stage_done('article', 'parse', stage)
 
             # --- Extract Title ---
-            # Reuters titles are often in h1 with specific data-testid or classes
-            title_tag = soup.select_one('h1[data-testid="ArticleHeader_headline"]') or \
-                        soup.select_one('h1.article-header__title') or \
-                        soup.select_one('h1.Headline-headline-2FX_p') or \
-                        soup.find('h1')
+            title_tag = source.chains['title'].first(soup)
             if title_tag:
                 # Update the title in article_data (though it's usually already in the main dict)
                 # This is more for completeness if this function were called standalone
                 article_data['title'] = title_tag.get_text(strip=True)
 
             # --- Extract Author (By who) ---
-            # Reuters author information is often in a span or div with specific classes/data-testids
-            author_tag = soup.select_one('p[data-testid="BylineBar_byline"]') or \
-                         soup.select_one('div.byline__name') or \
-                         soup.select_one('span.byline-name') or \
-                         soup.find('div', class_=re.compile(r'byline|author|writer', re.IGNORECASE))
+            author_tag = source.chains['author'].first(soup) or \
+                         soup.find('div', class_=profile.author_class)
             if author_tag:
                 author_text = author_tag.get_text(strip=True)
                 # Clean up "By " prefix if present
@@ -264,22 +380,11 @@ class NewsScraper:
                 article_data['description'] = description_tag['content'].strip()
 
             # --- Extract In-Article Summary Area ---
-            # Reuters often has a lead paragraph or a specific summary div at the start
-            in_article_summary_selectors = [
-                'p[data-testid="ArticleBody_lead_paragraph"]', # Common lead paragraph
-                'div.article-body > p:first-of-type', # First paragraph in the article body
-                'div.ArticleBody_lede__2g1Xp', # Specific lede class
-                'div.ArticleBody_summary__2g1Xp', # Specific summary class
-                'div[itemprop="articleBody"] p:first-of-type', # First paragraph in schema body
-                'div.article-body_content__17lYj > p:first-of-type', # First paragraph within the specific content div
-            ]
-            for selector in in_article_summary_selectors:
-                summary_tag = soup.select_one(selector)
-                if summary_tag:
-                    summary_text = summary_tag.get_text(strip=True)
-                    if summary_text and len(summary_text) > 50: # Ensure it's substantial
-                        article_data['in_article_summary'] = summary_text
-                        break # Found a good summary, stop searching
+            def summary_from(summary_tag):
+                summary_text = summary_tag.get_text(strip=True)
+                return summary_text if summary_text and len(summary_text) > 50 else None # Ensure it's substantial
+
+            article_data['in_article_summary'] = source.chains['summary'].first(soup, summary_from)
 
 
             # --- Extract Image URL ---
@@ -288,111 +393,59 @@ class NewsScraper:
             if image_tag and image_tag.get('content'):
                 article_data['image_url'] = image_tag['content'].strip()
             else:
-                # 2. Try specific Reuters image selectors
-                article_image_selectors = [
-                    'img[data-testid="media-image"]', # Common data-testid for main image
-                    'div.article-image-container img', # Image within a specific container
-                    'figure.article-picture img', # Image within a figure with article-picture class
-                    'img.media-object__image__3tY4J', # Specific class for media objects
-                    'img[itemprop="image"]', # Schema.org image
-                    'meta[itemprop="image"]', # Schema.org image meta tag
-                    'div.Image_container img', # Another common image container
-                    'div.MediaItem_image img', # Another common image container
-                ]
-                for selector in article_image_selectors:
-                    # If it's a meta tag, get content attribute
-                    if selector.startswith('meta'):
-                        meta_tag = soup.select_one(selector)
-                        if meta_tag and meta_tag.get('content'):
-                            img_src = urljoin(article_url, meta_tag['content'])
-                            # Basic check to avoid very small or irrelevant images
-                            if not re.search(r'(logo|icon|spacer|thumb|small|ads)\.(png|jpg|jpeg|gif|svg)', img_src, re.IGNORECASE):
-                                article_data['image_url'] = img_src
-                                break
-                    else: # It's an img tag
-                        img_tag = soup.select_one(selector)
-                        if img_tag and img_tag.get('src'):
-                            # Ensure it's a full URL and not a tiny icon/spacer
-                            img_src = urljoin(article_url, img_tag['src'])
-                            # Basic check to avoid very small or irrelevant images
-                            if not re.search(r'(logo|icon|spacer|thumb|small|ads)\.(png|jpg|jpeg|gif|svg)', img_src, re.IGNORECASE):
-                                article_data['image_url'] = img_src
-                                break # Found a good candidate, stop searching
+                # 2. Try the profile's image selectors
+                def image_from(tag):
+                    # If it's a meta tag, get content attribute, otherwise the img src
+                    src = tag.get('content' if tag.name == 'meta' else 'src')
+                    if not src:
+                        return None
+                    # Ensure it's a full URL and not a tiny icon/spacer
+                    img_src = urljoin(article_url, src)
+                    return None if profile.image_exclude.search(img_src) else img_src
+
+                article_data['image_url'] = source.chains['image'].first(soup, image_from)
 
             # 3. Fallback: Look for any prominent image within the main content area
             if not article_data['image_url']:
-                content_div = soup.find(
-                    lambda tag: tag.name == 'div' and any(
-                        cls in tag.get('class', []) for cls in [
-                            'article-body', 'text__text__1FZLe', 'body-content', 'main-content', 'article-body_content__17lYj' # Added this
-                        ]
-                    )
-                ) or soup.find('article') or soup.find('main')
+                content_div = soup.find('div', class_=profile.image_container_classes) or soup.find('article') or soup.find('main')
 
                 if content_div:
                     # Look for the first significant image (avoiding very small ones)
                     img_tag = content_div.find('img', src=True, class_=lambda x: x not in ['icon', 'logo', 'small-thumbnail'] if x else True)
                     if img_tag and img_tag.get('src'):
                         img_src = urljoin(article_url, img_tag['src'])
-                        if not re.search(r'(logo|icon|spacer|thumb|small|ads)\.(png|jpg|jpeg|gif|svg)', img_src, re.IGNORECASE):
+                        if not profile.image_exclude.search(img_src):
                             article_data['image_url'] = img_src
-            
+
             # Provide a placeholder if no image is found after all attempts
             if not article_data['image_url']:
                 article_data['image_url'] = "https://placehold.co/600x400/cccccc/333333?text=No+Image"
 
 
             # --- Extract Full Article Content ---
-            # Reuters specific content selectors
-            content_div = soup.find(
-                lambda tag: tag.name == 'div' and any(
-                    cls in tag.get('class', []) for cls in [
-                        'article-body', # Main article content div
-                        'text__text__1FZLe', # Common text class for paragraphs
-                        'body-content', # Generic body content
-                        'main-content', # Generic main content
-                        'StandardArticleBody_body', # Older Reuters class
-                        'ArticleBody_body__2g1Xp', # Another common Reuters body class
-                        'article-body_content__17lYj', # Added this specific class from screenshot
-                    ]
-                )
-            ) or soup.find('article') or soup.find('main') or soup.find('body') # Fallback to body
-
-            if content_div:
-                # Remove unwanted elements that are typically not part of the main article text
-                for script_or_style in content_div(['script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'iframe', 'button', 'figcaption', 'figure', 'img', 'video', 'audio', 'svg', 'canvas', 'amp-img', 'blockquote', '.ads', '.ad-container', '.social-share', '.read-more', '.related-articles', '.comments-section', '.paywall', '#paywall', '.signin', '#signin', '.legals', '.disclaimer', '.byline', '.timestamp', '.ArticleHeader_container', '.ArticleHeader_byline', '.ArticleHeader_date', '.ArticleHeader_share']):
-                    script_or_style.decompose() # Remove unwanted elements
-
-                # Get all text from direct children paragraphs or text nodes
-                article_text_parts = []
-                for element in content_div.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'span', 'div']):
-                    text = element.get_text(separator=' ', strip=True)
-                    if text:
-                        article_text_parts.append(text)
-                
-                # If still no content, try getting all text from the main content div
-                if not article_text_parts:
-                    article_text_parts = [content_div.get_text(separator=' ', strip=True)]
-
-                article_text = '\n'.join(article_text_parts) # Use '\n' for paragraph breaks
-                
-                # Clean up multiple spaces, newlines, and common artifacts
-                article_text = re.sub(r'\s+', ' ', article_text).strip()
-                article_text = re.sub(r'(\n\s*){2,}', '\n\n', article_text) # Reduce multiple newlines
-                
-                # Remove common "read more" or "related articles" phrases that might be scraped
-                article_text = re.sub(r'read more.*|related articles.*|also read.*|further reading.*|topics.*|tags.*|comments.*|share this article.*|follow us.*|sign in.*|subscribe now.*|create an account.*|login to read.*|our standards: the reuters trust principles.*|thomson reuters.*|reporting by.*|editing by.*|our standards.*', '', article_text, flags=re.IGNORECASE | re.DOTALL).strip()
-                
+            content_div = soup.find('div', class_=profile.content_classes) or \
+                          soup.find('article') or soup.find('main') or soup.find('body') # Fallback to body
+
+            stage = self._stage_done('article', 'select', stage)
+
+            # One pass over the container: each text node once, in paragraphs, without the skipped subtrees
+            article_text = profile.text_extractor.extract(content_div) if content_div else None
+            self._stage_done('article', 'extract', stage)
+            if article_text:
                 article_data['content'] = article_text
+                self._store_records(article_url, article_data)
             else:
                 current_app.logger.warning(f"Could not find main article content for URL: {article_url}")
-                article_data['content'] = "Could not scrape main article content."
+                SCRAPE_FAILURES.inc(page='article', reason='no_content')
+                return None
 
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f"Network or HTTP error during article scraping for {article_url}: {e}")
-            article_data['content'] = "Failed to scrape article content due to network error."
+            SCRAPE_FAILURES.inc(page='article', reason='network')
+            return None
         except Exception as e:
             current_app.logger.error(f"Error scraping article content for {article_url}: {e}")
-            article_data['content'] = "Failed to scrape article content due to an unexpected error."
-        
+            SCRAPE_FAILURES.inc(page='article', reason='error')
+            return None
+
         return article_data
@@ -0,0 +1,85 @@
+import itertools
+import queue
+import threading
+
+
+class ArticlePrefetcher:
+    """
+    Fills article 'content' in the background after each headline refresh, so the first user to
+    open /api/article, /api/summarize or /api/chat for a front-page story reads it from ARTICLES_DB.
+    The top N headlines are scraped by a small pool of worker threads, in page order, with articles
+    that users have opened before (tracked by URL across refreshes) moved to the front of the queue.
+    Scrapes go through the shared SingleFlight group, so a user request for an article that is being
+    prefetched joins the in-flight scrape instead of starting another one.
+    """
+
+    def __init__(self, app, news_scraper, single_flight, top_n=10, workers=2):
+        self.app = app
+        self.news_scraper = news_scraper
+        self.single_flight = single_flight
+        self.top_n = top_n
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count() # Tie-breaker so equal priorities stay FIFO
+        self._lock = threading.Lock()
+        self._open_counts = {} # url -> number of times users opened it
+        self._threads = []
+
+    def start(self):
+        """Starts the worker threads (idempotent)."""
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f'article-prefetch-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def schedule(self, headlines):
+        """Queues the top N headlines of a fresh snapshot; articles users opened before go first."""
+        with self._lock:
+            open_counts = dict(self._open_counts)
+        for rank, headline in enumerate(headlines[:self.top_n]):
+            # Lower sorts first: popular URLs jump ahead of the page-order ranks
+            priority = rank - self.top_n * open_counts.get(headline['url'], 0)
+            self._queue.put((priority, next(self._counter), headline['id'], headline['url']))
+
+    def record_open(self, url):
+        """Called when a user opens an article, to prioritize it in future prefetch rounds."""
+        with self._lock:
+            self._open_counts[url] = self._open_counts.get(url, 0) + 1
+            # Keep the popularity table bounded: forget the least opened URLs
+            if len(self._open_counts) > self.top_n * 50:
+                for stale_url, _ in sorted(self._open_counts.items(), key=lambda item: item[1])[:len(self._open_counts) // 2]:
+                    del self._open_counts[stale_url]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'tracked_urls': len(self._open_counts),
+            }
+
+    def _run(self):
+        while True:
+            _, _, article_id, url = self._queue.get()
+            try:
+                self._prefetch(article_id, url)
+            except Exception as e:
+                self.app.logger.error(f"Prefetch failed for {url}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _prefetch(self, article_id, url):
+        with self.app.app_context():
+            articles_db = self.app.config['ARTICLES_DB']
+            article_data = articles_db.get(article_id)
+            if not article_data or article_data.get('content'):
+                return # Evicted, or already filled by a user request or an earlier round
+
+            content = self.single_flight.do(('scrape', url), self.news_scraper.scrape_article_content, url)
+            if content is None:
+                return # The scraper logged the failure; nothing is stored, so the next refresh tries again
+            articles_db.set_content(article_id, content)
@@ -0,0 +1,211 @@
+import threading
+import time
+from datetime import date
+from api.retrieval import article_text, estimate_tokens
+from api.summarizer import SUMMARY_PROMPT, SUMMARY_PROMPT_VERSION
+from api.summary_cache import summary_key
+from utils.single_flight import content_key
+
+# Tokens reserved for the model's answer on top of the prompt (summaries are short)
+SUMMARY_OUTPUT_TOKENS = 300
+# How long a worker's claim on a summary keeps the other workers from generating it too
+CLAIM_TTL = 600
+
+
+class SummaryBudget:
+    """
+    Requests-per-minute and daily token budget for background summaries, shared by all gunicorn
+    workers through the summary cache's SQLite file. Also records which summaries a worker has
+    claimed, so the workers (which all refresh headlines independently) do not pay for the same one twice.
+    """
+
+    def __init__(self, db, rpm=10, daily_tokens=200000):
+        self.db = db
+        self.rpm = rpm
+        self.daily_tokens = daily_tokens
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS presummary_usage (
+                day TEXT PRIMARY KEY,
+                tokens INTEGER NOT NULL,
+                requests INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS presummary_requests (
+                requested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS presummary_claims (
+                key TEXT PRIMARY KEY,
+                claimed_at REAL NOT NULL
+            );
+        """)
+
+    def acquire(self, key, tokens):
+        """
+        Claims the summary `key` and reserves one request and `tokens` tokens.
+        Returns (True, 0) on success; (False, seconds) when the per-minute limit is reached and the
+        caller may retry after that many seconds; (False, None) when the daily budget is spent or
+        another worker already claimed the key.
+        """
+        now = time.time()
+        today = date.today().isoformat()
+        with self.db.transaction() as conn:
+            claim = conn.execute('SELECT claimed_at FROM presummary_claims WHERE key = ?', (key,)).fetchone()
+            if claim and now - claim['claimed_at'] < CLAIM_TTL:
+                return False, None
+
+            usage = conn.execute('SELECT tokens FROM presummary_usage WHERE day = ?', (today,)).fetchone()
+            if usage and usage['tokens'] + tokens > self.daily_tokens:
+                return False, None
+
+            conn.execute('DELETE FROM presummary_requests WHERE requested_at <= ?', (now - 60,))
+            recent = conn.execute('SELECT COUNT(*), MIN(requested_at) FROM presummary_requests').fetchone()
+            if recent[0] >= self.rpm:
+                return False, max(recent[1] + 60 - now, 0.1)
+
+            conn.execute('INSERT INTO presummary_requests (requested_at) VALUES (?)', (now,))
+            conn.execute(
+                """
+                INSERT INTO presummary_usage (day, tokens, requests) VALUES (?, ?, 1)
+                ON CONFLICT(day) DO UPDATE SET tokens = tokens + excluded.tokens, requests = requests + 1
+                """,
+                (today, tokens),
+            )
+            conn.execute('INSERT OR REPLACE INTO presummary_claims (key, claimed_at) VALUES (?, ?)', (key, now))
+            # Usage rows of past days are reset lazily: only today's row is ever read
+            conn.execute('DELETE FROM presummary_usage WHERE day < ?', (today,))
+            conn.execute('DELETE FROM presummary_claims WHERE claimed_at < ?', (now - CLAIM_TTL,))
+        return True, 0
+
+    def release(self, key, tokens):
+        """
+        Undoes acquire() for a summary that was not generated: drops the claim, so any worker may try
+        again, and refunds the reserved tokens to today's budget. The request still counts towards the
+        per-minute limit, since it was sent.
+        """
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM presummary_claims WHERE key = ?', (key,))
+            conn.execute(
+                'UPDATE presummary_usage SET tokens = MAX(tokens - ?, 0) WHERE day = ?',
+                (tokens, date.today().isoformat()),
+            )
+
+    def usage(self):
+        row = self.db.execute('SELECT tokens, requests FROM presummary_usage WHERE day = ?', (date.today().isoformat(),)).fetchone()
+        return {
+            'tokens_today': row['tokens'] if row else 0,
+            'requests_today': row['requests'] if row else 0,
+            'daily_tokens': self.daily_tokens,
+            'rpm': self.rpm,
+        }
+
+
+class BackgroundSummarizer:
+    """
+    Summarizes the top N headlines into the summary cache after each headline refresh, so the first
+    /api/summarize for a front-page story is a cache hit. Work is bounded by a shared SummaryBudget
+    and waits while live requests in this worker are using the LLM (max_live_calls or more calls in flight).
+    Each refresh replaces the pending work with the new top N.
+    """
+
+    def __init__(self, app, ai_service, news_scraper, single_flight, budget, top_n=5, max_live_calls=1, idle_poll=0.5):
+        self.app = app
+        self.ai_service = ai_service
+        self.news_scraper = news_scraper
+        self.single_flight = single_flight
+        self.budget = budget
+        self.top_n = top_n
+        self.max_live_calls = max_live_calls
+        self.idle_poll = idle_poll
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._counters = {'summarized': 0, 'already_cached': 0, 'skipped': 0, 'failed': 0}
+        self.paused_seconds = 0.0
+
+    def start(self):
+        """Starts the background thread (idempotent)."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='presummarize', daemon=True)
+            self._thread.start()
+
+    def schedule(self, headlines):
+        """on_refresh callback: queues the top N headlines of the new snapshot, in page order."""
+        with self._cond:
+            self._pending = [(headline['id'], headline['url']) for headline in headlines[:self.top_n]]
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters, queued=len(self._pending), paused_seconds=round(self.paused_seconds, 1))
+        stats['budget'] = self.budget.usage()
+        return stats
+
+    def _count(self, name):
+        with self._cond:
+            self._counters[name] += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                article_id, url = self._pending.pop(0)
+            try:
+                self._presummarize(article_id, url)
+            except Exception as e:
+                self._count('failed')
+                self.app.logger.error(f"Background summary failed for {url}: {e}")
+
+    def _presummarize(self, article_id, url):
+        with self.app.app_context():
+            articles_db = self.app.config['ARTICLES_DB']
+            article_data = articles_db.get(article_id)
+            if not article_data:
+                return
+            content = article_data.get('content')
+            if not content:
+                content = self.single_flight.do(('scrape', url), self.news_scraper.scrape_article_content, url)
+                if content is None:
+                    # Nothing to summarize (and nothing stored); the article is tried again next time it is queued
+                    self._count('failed')
+                    return
+                articles_db.set_content(article_id, content)
+                self.ai_service.summary_cache.invalidate_article(article_id)
+
+            # Key, budget and prompt all come from the article body, exactly as AIService.summarize builds them
+            text = article_text(content)
+            if not text:
+                self._count('failed')
+                return
+            key = summary_key(text, self.ai_service.model_name, SUMMARY_PROMPT_VERSION)
+            if self.ai_service.summary_cache.contains(key):
+                self._count('already_cached')
+                return
+
+            tokens = estimate_tokens(SUMMARY_PROMPT.format(text=text)) + SUMMARY_OUTPUT_TOKENS
+            while True:
+                self._wait_until_idle()
+                acquired, retry_after = self.budget.acquire(key, tokens)
+                if acquired:
+                    break
+                if retry_after is None:
+                    self._count('skipped') # Daily budget spent, or another worker is on it
+                    return
+                time.sleep(retry_after)
+
+            # Same single-flight key as /api/summarize, so a user asking meanwhile joins this call
+            try:
+                self.single_flight.do(('summarize', content_key(text)), self.ai_service.summarize, text, article_id=article_id)
+            except Exception:
+                # Nothing was produced: give the tokens back and let the next refresh (in any worker) retry
+                self.budget.release(key, tokens)
+                raise
+            self._count('summarized')
+
+    def _wait_until_idle(self):
+        started = time.monotonic()
+        while self.ai_service.llm.in_flight >= self.max_live_calls:
+            time.sleep(self.idle_poll)
+        with self._cond:
+            self.paused_seconds += time.monotonic() - started
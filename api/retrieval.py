@@ -0,0 +1,183 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_PARAGRAPH_RE = re.compile(r'\n\s*\n|\n')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Function words that match almost every passage and only add noise to the scores
+STOPWORDS = frozenset("""
+a about after an and are as at be been but by can could did do does for from had has have he her his how i if in
+into is it its me my not of on or our said she so than that the their them then there these they this to was we
+were what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def estimate_tokens(text):
+    """Rough LLM token count (about 4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def article_text(content):
+    """Plain text of a scraped content record (as returned by NewsScraper.scrape_article_content), or of a string."""
+    if isinstance(content, dict):
+        return content.get('content') or ''
+    return str(content or '')
+
+
+def split_passages(text, max_words=120):
+    """
+    Splits an article into passages of at most about max_words words. Paragraph breaks are kept
+    when the text has them; longer paragraphs are cut on sentence boundaries, and run-on
+    sentences on word boundaries.
+    """
+    passages = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        current, words = [], 0
+        for sentence in _sentences(paragraph.strip(), max_words):
+            sentence_words = len(sentence.split())
+            if not sentence_words:
+                continue
+            if current and words + sentence_words > max_words:
+                passages.append(' '.join(current))
+                current, words = [], 0
+            current.append(sentence)
+            words += sentence_words
+        if current:
+            passages.append(' '.join(current))
+    return passages
+
+
+def _sentences(paragraph, max_words):
+    for sentence in _SENTENCE_RE.split(paragraph):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            yield ' '.join(words[start:start + max_words])
+
+
+class PassageIndex:
+    """
+    Okapi BM25 index over the passages of one article. Built once per article text and reused
+    for every question about it.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, text, max_words=120):
+        self.passages = split_passages(text, max_words)
+        self.token_counts = [estimate_tokens(passage) for passage in self.passages]
+        self.total_tokens = sum(self.token_counts)
+        self._term_freqs = [Counter(tokenize(passage)) for passage in self.passages]
+        self._lengths = [sum(freqs.values()) for freqs in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0
+        doc_freqs = Counter(term for freqs in self._term_freqs for term in freqs)
+        n = len(self.passages)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def scores(self, query):
+        terms = set(tokenize(query))
+        scores = []
+        for freqs, length in zip(self._term_freqs, self._lengths):
+            norm = self.K1 * (1 - self.B + self.B * length / self._avg_length) if self._avg_length else self.K1
+            scores.append(sum(
+                self._idf[term] * freqs[term] * (self.K1 + 1) / (freqs[term] + norm)
+                for term in terms if term in freqs
+            ))
+        return scores
+
+    def select(self, query, top_k=4, token_budget=1500):
+        """
+        Indices of the best passages for the query, in article order: at most top_k of them, within
+        token_budget. The lead passage comes right after the best match, since news articles
+        front-load the key facts.
+        """
+        if not self.passages:
+            return []
+        scores = self.scores(query)
+        matches = [i for i in sorted(range(len(self.passages)), key=lambda i: (-scores[i], i)) if scores[i] > 0 and i != 0]
+        candidates = matches[:1] + [0] + matches[1:]
+        chosen, used = [], 0
+        for i in candidates:
+            if len(chosen) >= top_k:
+                break
+            if used + self.token_counts[i] > token_budget:
+                continue
+            chosen.append(i)
+            used += self.token_counts[i]
+        return sorted(chosen)
+
+
+class ContextRetriever:
+    """
+    Picks the parts of an article that are relevant to a chat question, so /api/chat prompts stay
+    small no matter how long the article is. Articles that already fit in the token budget are sent
+    whole. Passage indexes are kept in a small per-worker LRU keyed by a hash of the article text,
+    so each article is indexed once and re-indexed automatically when its content changes.
+    """
+
+    def __init__(self, top_k=4, token_budget=1500, passage_words=120, max_indexes=200):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.passage_words = passage_words
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    def index_for(self, text):
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                self.reused += 1
+                return index
+        index = PassageIndex(text, self.passage_words)
+        with self._lock:
+            self._indexes[key] = index
+            self.built += 1
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def context_for(self, content, question):
+        """Article text to put in the prompt for this question: the whole article, or its most relevant passages."""
+        text = article_text(content).strip()
+        if estimate_tokens(text) <= self.token_budget:
+            return text
+        index = self.index_for(text)
+        return '\n\n'.join(index.passages[i] for i in index.select(question, self.top_k, self.token_budget))
+
+    def session_context(self, content, question, previous_question=None):
+        """
+        Context for a chat session as (prefix, passages). The prefix stays the same for every
+        question about the article, so providers can reuse their cached prompt prefix: the whole
+        article when it fits the token budget, otherwise its lead passage. For long articles,
+        passages holds the other passages relevant to this question (and the one before it,
+        so follow-ups like "why did he do that?" still find their passage), else it is empty.
+        """
+        text = article_text(content).strip()
+        if estimate_tokens(text) <= self.token_budget:
+            return text, ''
+        index = self.index_for(text)
+        query = f"{previous_question} {question}" if previous_question else question
+        # The lead passage is counted against the budget by select(), but sent in the prefix
+        selected = [i for i in index.select(query, self.top_k + 1, self.token_budget) if i != 0]
+        return (index.passages[0] if index.passages else ''), '\n\n'.join(index.passages[i] for i in selected)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'indexes': len(self._indexes),
+                'built': self.built,
+                'reused': self.reused,
+            }
@@ -1,8 +1,14 @@
-from flask import request, jsonify, current_app
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import request, jsonify, current_app, Response, stream_with_context, send_from_directory
 from api import api_bp
+from api.retrieval import article_text
 # Removed direct imports of NewsScraper and AIService here
 
-from utils.access_control import check_access_limit
+from utils.access_control import check_access_limit, consume_access, limit_reached_error, current_user_id
+from utils.http_client import get_http_client
+from utils.single_flight import content_key
 
 # Helper function to get the initialized services
 def get_news_scraper():
@@ -13,19 +19,116 @@ def get_ai_service():
     """Retrieves the AIService instance from app.config."""
     return current_app.config.get('AI_SERVICE_INSTANCE')
 
+def get_headline_cache():
+    """Retrieves the HeadlineCache instance from app.config."""
+    return current_app.config.get('HEADLINE_CACHE_INSTANCE')
+
+def get_article_prefetcher():
+    """Retrieves the ArticlePrefetcher instance from app.config (None when prefetching is disabled)."""
+    return current_app.config.get('ARTICLE_PREFETCHER_INSTANCE')
+
+def get_presummarizer():
+    """Retrieves the BackgroundSummarizer instance from app.config (None when disabled)."""
+    return current_app.config.get('PRESUMMARIZER_INSTANCE')
+
+def get_chat_sessions():
+    """Retrieves the ChatSessionStore instance from app.config (None when chat sessions are disabled)."""
+    return current_app.config.get('CHAT_SESSIONS_INSTANCE')
+
+def get_single_flight():
+    """Retrieves the SingleFlight group from app.config."""
+    return current_app.config.get('SINGLE_FLIGHT_INSTANCE')
+
+def get_context_retriever():
+    """Retrieves the ContextRetriever instance from app.config."""
+    return current_app.config.get('CONTEXT_RETRIEVER_INSTANCE')
+
+def get_request_profiler():
+    """Retrieves the RequestProfiler instance from app.config (None when profiling is disabled)."""
+    return current_app.config.get('REQUEST_PROFILER_INSTANCE')
+
+def wants_stream(data):
+    """Streaming is opt-in: {"stream": true} in the body or an 'Accept: text/event-stream' header."""
+    return bool(data.get('stream')) or request.accept_mimetypes.best == 'text/event-stream'
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_stream(events):
+    """Wraps a generator of sse_event() strings in an unbuffered text/event-stream response."""
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Keep reverse proxies from buffering the stream
+    return response
+
+def sse_response(chunks, result_key):
+    """
+    Streams an LLM answer as Server-Sent Events: one {"delta": ...} message per chunk, then a
+    'done' event carrying the full text under result_key, or an 'error' event if the model call fails.
+    """
+    def generate():
+        parts = []
+        try:
+            for delta in chunks:
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            current_app.logger.error(f"Error streaming {result_key} from AI: {e}")
+            yield sse_event({"error": f"Failed to get a response from the AI service: {e}"}, event="error")
+            return
+        yield sse_event({result_key: ''.join(parts).strip()}, event="done")
+
+    return sse_stream(generate())
+
+def load_article_content(article_id, news_scraper):
+    """
+    Returns the scraped content of an article, scraping it on demand if it is not there yet.
+    Concurrent requests for the same URL (including a background prefetch) share one scrape.
+    Returns None if the content could not be retrieved.
+    """
+    articles_db = current_app.config.get('ARTICLES_DB')
+    article_data = articles_db.get(article_id)
+    if not article_data:
+        return None
+
+    prefetcher = get_article_prefetcher()
+    if prefetcher:
+        prefetcher.record_open(article_data['url'])
+
+    if not article_data.get('content'):
+        # Scrape content if it hasn't been already
+        current_app.logger.info(f"Scraping content for article ID: {article_id} from URL: {article_data['url']}")
+        content = get_single_flight().do(('scrape', article_data['url']), news_scraper.scrape_article_content, article_data['url'])
+        if not content:
+            return None # Nothing is stored, so the next request scrapes again
+        articles_db.set_content(article_id, content) # Shared with every worker
+        ai_service = get_ai_service()
+        if ai_service and ai_service.summary_cache:
+            # Freshly scraped content: summaries of any earlier version of this article are obsolete
+            ai_service.summary_cache.invalidate_article(article_id)
+        return content
+
+    return article_data['content']
+
 @api_bp.route('/news', methods=['GET'])
 def get_news_headlines():
     """
-    Fetches and returns the latest news headlines from multiple sources.
+    Returns the latest news headlines from the background-refreshed snapshot.
+    The snapshot age in seconds is reported in the 'Age' response header.
     """
-    news_scraper = get_news_scraper()
-    if not news_scraper:
+    headline_cache = get_headline_cache()
+    if not headline_cache:
         return jsonify({"error": "News scraper not initialized."}), 500
 
-    headlines = news_scraper.scrape_headlines()
+    headlines, age = headline_cache.get()
     if not headlines:
         return jsonify({"message": "Could not fetch headlines from any source. Please try again later."}), 500
-    return jsonify(headlines), 200
+
+    response = jsonify(headlines)
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Headlines-Stale'] = 'true' if age > headline_cache.ttl else 'false'
+    return response, 200
 
 @api_bp.route('/article/<article_id>', methods=['GET'])
 def get_article_content(article_id):
@@ -43,22 +146,16 @@ def get_article_content(article_id):
     if not article_data:
         return jsonify({"error": "Article not found."}), 404
 
-    if not article_data.get('content'):
-        # Scrape content if it hasn't been already
-        current_app.logger.info(f"Scraping content for article ID: {article_id} from URL: {article_data['url']}")
-        content = news_scraper.scrape_article_content(article_data['url'])
-        if content:
-            articles_db[article_id]['content'] = content
-            current_app.config['ARTICLES_DB'] = articles_db # Update global DB
-        else:
-            return jsonify({"error": "Failed to retrieve article content."}), 500
+    content = load_article_content(article_id, news_scraper)
+    if not content:
+        return jsonify({"error": "Failed to retrieve article content."}), 500
 
     return jsonify({
         "id": article_id,
         "title": article_data['title'],
         "url": article_data['url'],
         "source": article_data['source'], # Include source in the response
-        "content": articles_db[article_id]['content']
+        "content": content
     }), 200
 
 @api_bp.route('/summarize', methods=['POST'])
@@ -89,15 +186,9 @@ def summarize_article():
             return jsonify({"error": "Article not found for summarization."}), 404
         
         # Ensure content is scraped
-        if not article_data.get('content'):
-            content = news_scraper.scrape_article_content(article_data['url'])
-            if content:
-                articles_db[article_id]['content'] = content
-                current_app.config['ARTICLES_DB'] = articles_db
-            else:
-                return jsonify({"error": "Failed to retrieve article content for summarization."}), 500
-        
-        text_to_summarize = articles_db[article_id]['content']
+        text_to_summarize = load_article_content(article_id, news_scraper)
+        if not text_to_summarize:
+            return jsonify({"error": "Failed to retrieve article content for summarization."}), 500
     elif raw_text:
         text_to_summarize = raw_text
     else:
@@ -106,9 +197,94 @@ def summarize_article():
     if not text_to_summarize:
         return jsonify({"error": "Content to summarize is empty."}), 400
 
-    summary = ai_service.summarize_text(text_to_summarize)
+    if wants_stream(data):
+        # Forward tokens as they arrive; usage was already counted by check_access_limit
+        return sse_response(ai_service.stream_summary(text_to_summarize, article_id=article_id), "summary")
+
+    try:
+        summary = summarize_content(ai_service, text_to_summarize, article_id)
+    except Exception as e:
+        current_app.logger.error(f"Error summarizing text with AI: {e}")
+        summary = f"Failed to summarize text: {e}"
     return jsonify({"summary": summary}), 200
 
+def summarize_content(ai_service, content, article_id=None):
+    """Summarizes (cached) content; concurrent summaries of the same content share one LLM call. Raises on failure."""
+    return get_single_flight().do(
+        ('summarize', content_key(article_text(content))),
+        ai_service.summarize, content, article_id=article_id
+    )
+
+def summarize_batch_item(article_id, ai_service, news_scraper):
+    """Result entry of one article in a batch: {"article_id", "summary"} or {"article_id", "error"}."""
+    try:
+        if not current_app.config.get('ARTICLES_DB').get(article_id):
+            return {"article_id": article_id, "error": "Article not found for summarization."}
+        content = load_article_content(article_id, news_scraper)
+        if not content:
+            return {"article_id": article_id, "error": "Failed to retrieve article content for summarization."}
+        return {"article_id": article_id, "summary": summarize_content(ai_service, content, article_id)}
+    except Exception as e:
+        current_app.logger.error(f"Error summarizing article {article_id} in batch: {e}")
+        return {"article_id": article_id, "error": f"Failed to summarize text: {e}"}
+
+@api_bp.route('/summarize/batch', methods=['POST'])
+def summarize_batch():
+    """
+    Summarizes several articles in one request: {"article_ids": [...], "stream": false}.
+    Missing content is scraped and the LLM calls run concurrently (at most SUMMARY_BATCH_CONCURRENCY
+    at a time), so a batch takes about as long as its slowest item. Every article counts as one
+    summary towards free tier limits; articles over the limit get a per-item limit error.
+    Results come back in request order, or as one Server-Sent Event per item as each one finishes.
+    """
+    ai_service = get_ai_service()
+    if not ai_service:
+        return jsonify({"error": "AI service not initialized."}), 500
+
+    news_scraper = get_news_scraper()
+    if not news_scraper:
+        return jsonify({"error": "News scraper not initialized."}), 500
+
+    data = request.get_json() or {}
+    article_ids = data.get('article_ids')
+    if not isinstance(article_ids, list) or not article_ids:
+        return jsonify({"error": "No article_ids provided for summarization."}), 400
+    article_ids = list(dict.fromkeys(str(article_id) for article_id in article_ids)) # Drop duplicates, keep order
+    max_items = current_app.config['SUMMARY_BATCH_MAX_ITEMS']
+    if len(article_ids) > max_items:
+        return jsonify({"error": f"At most {max_items} articles can be summarized per batch."}), 400
+
+    granted = consume_access('summary', len(article_ids))
+    if not granted:
+        return jsonify(limit_reached_error('summary')), 403
+    over_limit = [dict(limit_reached_error('summary'), article_id=article_id) for article_id in article_ids[granted:]]
+
+    app = current_app._get_current_object()
+
+    def summarize_in_context(article_id):
+        with app.app_context():
+            return summarize_batch_item(article_id, ai_service, news_scraper)
+
+    executor = ThreadPoolExecutor(max_workers=min(current_app.config['SUMMARY_BATCH_CONCURRENCY'], granted),
+                                  thread_name_prefix='summary-batch')
+    futures = [executor.submit(summarize_in_context, article_id) for article_id in article_ids[:granted]]
+    executor.shutdown(wait=False) # Workers exit once the submitted items are done
+
+    if wants_stream(data):
+        def generate():
+            for item in over_limit:
+                yield sse_event(item, event="item")
+            for future in as_completed(futures):
+                yield sse_event(future.result(), event="item")
+            yield sse_event({"count": len(article_ids)}, event="done")
+        return sse_stream(generate())
+
+    results = {item['article_id']: item for item in over_limit}
+    for future in as_completed(futures):
+        item = future.result()
+        results[item['article_id']] = item
+    return jsonify({"results": [results[article_id] for article_id in article_ids]}), 200
+
 @api_bp.route('/chat', methods=['POST'])
 @check_access_limit('chat')
 def chat_with_article():
@@ -131,29 +307,125 @@ def chat_with_article():
     if not question:
         return jsonify({"error": "No question provided for chat."}), 400
 
-    context = ""
-    if article_id:
-        articles_db = current_app.config.get('ARTICLES_DB')
-        article_data = articles_db.get(article_id)
-        if not article_data:
-            return jsonify({"error": "Article not found for chat context."}), 404
-        
-        # Ensure content is scraped
-        if not article_data.get('content'):
-            content = news_scraper.scrape_article_content(article_data['url'])
-            if content:
-                articles_db[article_id]['content'] = content
-                current_app.config['ARTICLES_DB'] = articles_db
-            else:
-                return jsonify({"error": "Failed to retrieve article content for chat."}), 500
-        
-        context = articles_db[article_id]['content']
-    else:
+    if not article_id:
         return jsonify({"error": "No article_id provided for chat context."}), 400
 
+    articles_db = current_app.config.get('ARTICLES_DB')
+    article_data = articles_db.get(article_id)
+    if not article_data:
+        return jsonify({"error": "Article not found for chat context."}), 404
+
+    # Ensure content is scraped
+    content = load_article_content(article_id, news_scraper)
+    if not content:
+        return jsonify({"error": "Failed to retrieve article content for chat."}), 500
+
+    chat_sessions = get_chat_sessions()
+    if chat_sessions:
+        return chat_in_session(chat_sessions, ai_service, article_data, content, question, data)
+
+    # Only the passages relevant to the question go into the prompt
+    context = get_context_retriever().context_for(content, question)
     if not context:
         return jsonify({"error": "Article content is empty, cannot provide context for chat."}), 400
 
-    chat_response = ai_service.chat_with_context(context, question)
+    if wants_stream(data):
+        return sse_response(ai_service.stream_chat(context, question), "response")
+
+    # Concurrent identical questions about the same content share one LLM call
+    chat_response = get_single_flight().do(
+        ('chat', content_key(context), content_key(question.strip().lower())),
+        ai_service.chat_with_context, context, question
+    )
     return jsonify({"response": chat_response}), 200
 
+def chat_in_session(chat_sessions, ai_service, article_data, content, question, data):
+    """
+    Answers a question as the next turn of the user's chat session about the article.
+    The prompt starts with the same article prefix on every turn, followed by the session history,
+    and the turn is recorded only when the model answered. {"new_session": true} starts over.
+    """
+    user_id = current_user_id()
+    article_id = article_data['id']
+    if data.get('new_session'):
+        chat_sessions.clear(user_id, article_id)
+    history = chat_sessions.history(user_id, article_id)
+    previous_question = history[-2]['content'] if history else None
+
+    article, passages = get_context_retriever().session_context(content, question, previous_question)
+    if not article:
+        return jsonify({"error": "Article content is empty, cannot provide context for chat."}), 400
+    messages = ai_service.chat_messages(article_data.get('title'), article, history, question, passages)
+
+    if wants_stream(data):
+        def chunks():
+            parts = []
+            for delta in ai_service.stream_chat_messages(messages):
+                parts.append(delta)
+                yield delta
+            chat_sessions.append(user_id, article_id, question, ''.join(parts).strip())
+        return sse_response(chunks(), "response")
+
+    try:
+        chat_response = get_single_flight().do(('chat', content_key(messages)), ai_service.chat, messages)
+    except Exception as e:
+        current_app.logger.error(f"Error chatting with AI: {e}")
+        return jsonify({"response": f"Failed to get a response from the chatbot: {e}"}), 200
+    chat_sessions.append(user_id, article_id, question, chat_response)
+    return jsonify({"response": chat_response, "history_turns": len(history) // 2}), 200
+
+
+def process_rss_bytes():
+    """Current resident set size of this worker (Linux only, None elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+@api_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Returns runtime statistics for this worker (connection pool reuse, caches).
+    """
+    news_scraper = get_news_scraper()
+    prefetcher = get_article_prefetcher()
+    ai_service = get_ai_service()
+    return jsonify({
+        "http_pools": get_http_client().stats(),
+        "selectors": news_scraper.selector_stats() if news_scraper else None,
+        "prefetch": prefetcher.stats() if prefetcher else None,
+        "single_flight": get_single_flight().stats(),
+        "articles": current_app.config['ARTICLES_DB'].stats(),
+        "llm": ai_service.llm.stats() if ai_service else None,
+        "summary_cache": ai_service.summary_cache.stats() if ai_service and ai_service.summary_cache else None,
+        "presummarize": get_presummarizer().stats() if get_presummarizer() else None,
+        "chat_context": get_context_retriever().stats(),
+        "chat_sessions": get_chat_sessions().stats() if get_chat_sessions() else None,
+        "process_rss_bytes": process_rss_bytes(),
+    }), 200
+
+
+@api_bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Lists the request profiles written by all workers, newest first (admin token required).
+    '.collapsed' files are collapsed stacks (flamegraph.pl, speedscope), '.prof' files are pstats.
+    """
+    profiler = get_request_profiler()
+    if profiler is None:
+        return jsonify({"error": "Profiling is disabled."}), 404
+    if not profiler.authorized(request):
+        return jsonify({"error": "Admin token required."}), 403
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({"profiles": profiler.list()[:limit], "stats": profiler.stats()}), 200
+
+@api_bp.route('/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    """Downloads one profile listed by /api/profiles (admin token required)."""
+    profiler = get_request_profiler()
+    if profiler is None:
+        return jsonify({"error": "Profiling is disabled."}), 404
+    if not profiler.authorized(request):
+        return jsonify({"error": "Admin token required."}), 403
+    return send_from_directory(profiler.directory, name, as_attachment=True)
@@ -1,80 +1,132 @@
-import requests
 from flask import current_app
+from utils.http_client import get_http_client
+from api.llm_client import ResilientLLMClient, OpenRouterProvider, GeminiProvider
+from api.retrieval import article_text
+from api.summary_cache import SummaryCache, summary_key
+
+# Bump whenever the summary prompt changes, so summaries cached for the old prompt are not reused
+SUMMARY_PROMPT_VERSION = 1
+SUMMARY_PROMPT = "Please provide a concise summary of the following news article:\n\n{text}\n\nSummary:"
+CHAT_PROMPT = "Based on the following article content, answer the question:\n\nArticle: {context}\n\nQuestion: {question}\n\nAnswer:"
+# Multi-turn chat sessions: the system message only depends on the article, so it is a stable prompt prefix
+CHAT_SYSTEM_PROMPT = "You answer questions about the news article below. Base your answers on the article and say so when it does not contain the answer.\n\nTitle: {title}\n\nArticle: {article}"
+CHAT_PASSAGES_PROMPT = "Relevant passages from the article:\n\n{passages}\n\nQuestion: {question}"
 
 class AIService:
     def __init__(self):
-        # Determine which AI service to use based on configuration
-        # Prioritize OpenRouter if its specific API key is provided
-        self.openrouter_api_key = current_app.config.get('OPENROUTER_API_KEY')
-        self.openrouter_api_url = current_app.config.get('OPENROUTER_API_URL')
-        self.openrouter_model_name = current_app.config.get('OPENROUTER_MODEL_NAME')
+        # Build the list of AI providers from configuration, in order of preference.
+        # OpenRouter is preferred if its specific API key is provided; Gemini is used as the
+        # primary provider otherwise, and as the failover provider when both are configured.
+        config = current_app.config
+        self.openrouter_api_key = config.get('OPENROUTER_API_KEY')
+        self.openrouter_api_url = config.get('OPENROUTER_API_URL')
+        self.openrouter_model_name = config.get('OPENROUTER_MODEL_NAME')
+        self.gemini_api_key = config.get('AI_API_KEY')
+        self.gemini_model_name = config.get('AI_MODEL_NAME')
+        self.http_client = get_http_client() # Shared keep-alive connection pools
+        self.summary_cache = None
+        if config.get('SUMMARY_CACHE_ENABLED', False):
+            self.summary_cache = SummaryCache(config['SUMMARY_CACHE_PATH'], config['SUMMARY_CACHE_MAX_ENTRIES'])
 
+        providers = []
         if self.openrouter_api_key and self.openrouter_api_url and self.openrouter_model_name:
-            self.use_openrouter = True
-            current_app.logger.info("Using OpenRouter AI service.")
-        else:
-            self.use_openrouter = False
-            self.gemini_api_key = current_app.config.get('AI_API_KEY')
-            self.gemini_model_name = current_app.config.get('AI_MODEL_NAME')
-            
-            if not self.gemini_api_key:
-                current_app.logger.error("AI_API_KEY (for Gemini) or OPENROUTER_API_KEY (for OpenRouter) is not set in config. Please set it in .env file.")
-                raise ValueError("AI API key is not configured.")
-            
-            # Initialize Gemini if OpenRouter is not used
-            import google.generativeai as genai
-            genai.configure(api_key=self.gemini_api_key)
-            self.gemini_model = genai.GenerativeModel(self.gemini_model_name)
-            current_app.logger.info("Using Gemini AI service.")
-
-    def _call_openrouter_api(self, messages):
-        """Helper to make calls to the OpenRouter API."""
-        headers = {
-            "Authorization": f"Bearer {self.openrouter_api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": self.openrouter_model_name,
-            "messages": messages
-        }
-        try:
-            response = requests.post(self.openrouter_api_url, headers=headers, json=payload, timeout=30)
-            response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Error calling OpenRouter API: {e}")
-            raise ConnectionError(f"Failed to connect to OpenRouter API: {e}")
-        except Exception as e:
-            current_app.logger.error(f"Unexpected error with OpenRouter API response: {e}")
-            raise Exception(f"Unexpected error from OpenRouter API: {e}")
+            providers.append(OpenRouterProvider(self.http_client, self.openrouter_api_url, self.openrouter_api_key, self.openrouter_model_name))
+        if self.gemini_api_key and not providers:
+            providers.append(GeminiProvider(self.gemini_api_key, self.gemini_model_name))
+        elif self.gemini_api_key and config.get('LLM_FAILOVER_ENABLED', True):
+            try:
+                providers.append(GeminiProvider(self.gemini_api_key, self.gemini_model_name))
+            except ImportError as e:
+                current_app.logger.warning(f"Gemini failover disabled, google-generativeai is not available: {e}")
+
+        if not providers:
+            current_app.logger.error("AI_API_KEY (for Gemini) or OPENROUTER_API_KEY (for OpenRouter) is not set in config. Please set it in .env file.")
+            raise ValueError("AI API key is not configured.")
+
+        self.use_openrouter = providers[0].name == 'openrouter'
+        self.llm = ResilientLLMClient(
+            providers,
+            attempt_timeout=config.get('LLM_ATTEMPT_TIMEOUT', 15),
+            total_timeout=config.get('LLM_TOTAL_TIMEOUT', 40),
+            max_attempts=config.get('LLM_MAX_ATTEMPTS', 3),
+            backoff_base=config.get('LLM_BACKOFF_BASE', 0.5),
+            backoff_max=config.get('LLM_BACKOFF_MAX', 4.0),
+            hedge_enabled=config.get('LLM_HEDGE_ENABLED', True),
+            hedge_min_delay=config.get('LLM_HEDGE_MIN_DELAY', 2.0),
+            breaker_failures=config.get('LLM_BREAKER_FAILURES', 5),
+            breaker_reset=config.get('LLM_BREAKER_RESET', 30),
+            max_concurrent_calls=config.get('LLM_MAX_CONCURRENT_CALLS', 16),
+        )
+        current_app.logger.info(f"Using AI providers: {', '.join(provider.name for provider in providers)}.")
 
-    def summarize_text(self, text):
+    @property
+    def model_name(self):
+        """Identifier of the model in use, part of the summary cache key."""
+        primary = self.llm.primary
+        return f"{primary.name}:{primary.model}"
+
+    def summarize_text(self, text, article_id=None):
         """
         Summarizes the given text using the configured AI model (OpenRouter or Gemini). Do not give any punctuations to indicate bold text or anything like that.
+        Summaries are served from the shared summary cache when the same text was summarized before.
+        `text` may also be a scraped content record; only its article body is summarized.
         """
+        text = article_text(text)
         if not text:
             return "No text provided for summarization."
 
         try:
-            if self.use_openrouter:
-                messages = [
-                    {"role": "user", "content": f"Please provide a concise summary of the following news article:\n\n{text}\n\nSummary:"}
-                ]
-                response_json = self._call_openrouter_api(messages)
-                if response_json and response_json.get('choices') and response_json['choices'][0].get('message'):
-                    return response_json['choices'][0]['message']['content'].strip()
-                else:
-                    current_app.logger.error(f"Unexpected OpenRouter response structure for summarization: {response_json}")
-                    return "Failed to get summary from OpenRouter due to unexpected response."
-            else:
-                # Use Gemini
-                prompt = f"Please provide a concise summary of the following news article:\n\n{text}\n\nSummary:"
-                response = self.gemini_model.generate_content(prompt)
-                return response.text.strip()
+            return self.summarize(text, article_id=article_id)
         except Exception as e:
             current_app.logger.error(f"Error summarizing text with AI: {e}")
             return f"Failed to summarize text: {e}"
 
+    def summarize(self, text, article_id=None):
+        """Like summarize_text, but raises on failure instead of returning an error message."""
+        # The key and the prompt both use the article body alone, never the repr of a content record
+        text = article_text(text)
+        cache_key = summary_key(text, self.model_name, SUMMARY_PROMPT_VERSION)
+        if self.summary_cache:
+            cached = self.summary_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        summary = self._generate_summary(text)
+        if self.summary_cache:
+            self.summary_cache.put(cache_key, summary, model=self.model_name, article_id=article_id)
+        return summary
+
+    def _generate_summary(self, text):
+        """Calls the LLM for a summary. Raises on failure, so error messages never end up in the cache."""
+        return self.llm.complete([{"role": "user", "content": SUMMARY_PROMPT.format(text=text)}])
+
+    def stream_summary(self, text, article_id=None):
+        """
+        Streaming variant of summarize_text: yields the summary in chunks as the model produces them.
+        A cached summary is yielded as a single chunk; a completed stream fills the summary cache.
+        Errors are raised to the caller, which is already sending a response.
+        """
+        text = article_text(text)
+        if not text:
+            yield "No text provided for summarization."
+            return
+
+        cache_key = summary_key(text, self.model_name, SUMMARY_PROMPT_VERSION)
+        if self.summary_cache:
+            cached = self.summary_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        for delta in self.llm.stream([{"role": "user", "content": SUMMARY_PROMPT.format(text=text)}]):
+            parts.append(delta)
+            yield delta
+
+        summary = ''.join(parts).strip()
+        if self.summary_cache and summary:
+            self.summary_cache.put(cache_key, summary, model=self.model_name, article_id=article_id)
+
     def chat_with_context(self, context, question):
         """
         Answers a question using the provided context with the AI model (OpenRouter or Gemini).
@@ -83,23 +135,35 @@ class AIService:
             return "Please provide both context and a question for the chatbot."
 
         try:
-            if self.use_openrouter:
-                messages = [
-                    {"role": "user", "content": f"Based on the following article content, answer the question:\n\nArticle: {context}\n\nQuestion: {question}\n\nAnswer:"}
-                ]
-                response_json = self._call_openrouter_api(messages)
-                if response_json and response_json.get('choices') and response_json['choices'][0].get('message'):
-                    return response_json['choices'][0]['message']['content'].strip()
-                else:
-                    current_app.logger.error(f"Unexpected OpenRouter response structure for chat: {response_json}")
-                    return "Failed to get chat response from OpenRouter due to unexpected response."
-            else:
-                # Use Gemini
-                chat_session = self.gemini_model.start_chat(history=[])
-                prompt = f"Based on the following article content, answer the question:\n\nArticle: {context}\n\nQuestion: {question}\n\nAnswer:"
-                response = chat_session.send_message(prompt)
-                return response.text.strip()
+            return self.llm.complete([{"role": "user", "content": CHAT_PROMPT.format(context=context, question=question)}])
         except Exception as e:
             current_app.logger.error(f"Error chatting with AI: {e}")
             return f"Failed to get a response from the chatbot: {e}"
 
+    def stream_chat(self, context, question):
+        """Streaming variant of chat_with_context: yields the answer in chunks. Errors are raised to the caller."""
+        if not context or not question:
+            yield "Please provide both context and a question for the chatbot."
+            return
+        yield from self.llm.stream([{"role": "user", "content": CHAT_PROMPT.format(context=context, question=question)}])
+
+    def chat_messages(self, title, article, history, question, passages=None):
+        """
+        Messages for a turn of a chat session: the article as a stable system prefix, the earlier
+        turns, then the question (with the passages retrieved for it, for long articles).
+        """
+        messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT.format(title=title or '', article=article)}]
+        messages += history
+        if passages:
+            messages.append({"role": "user", "content": CHAT_PASSAGES_PROMPT.format(passages=passages, question=question)})
+        else:
+            messages.append({"role": "user", "content": question})
+        return messages
+
+    def chat(self, messages):
+        """Answers the last message of a chat session. Raises on failure."""
+        return self.llm.complete(messages)
+
+    def stream_chat_messages(self, messages):
+        """Streaming variant of chat(): yields the answer in chunks. Errors are raised to the caller."""
+        yield from self.llm.stream(messages)
@@ -0,0 +1,94 @@
+import hashlib
+import re
+import time
+from utils.sqlite_store import SQLiteDatabase
+from utils.metrics import CACHE_LOOKUPS
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def summary_key(text, model, prompt_version):
+    """Content address of a summary: hash of the whitespace-normalized text, the model and the prompt version."""
+    normalized = _WHITESPACE_RE.sub(' ', str(text)).strip()
+    return hashlib.sha256(f"{prompt_version}\0{model}\0{normalized}".encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent, content-addressed cache of LLM summaries shared by all gunicorn workers (SQLite, WAL).
+    Because the key is derived from the text itself, re-scraped content that changed can never be
+    served a stale summary; entries tied to an article id are also replaced when that article's
+    content changes. The least recently used entries are evicted above max_entries.
+    """
+
+    # Only bump last_used_at on a hit if it is older than this, to avoid a write per cache hit
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path, max_entries=5000):
+        self.max_entries = max_entries
+        self.db = SQLiteDatabase(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                article_id TEXT,
+                model TEXT,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_summaries_article ON summaries (article_id);
+            CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries (last_used_at);
+        """)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        row = self.db.execute('SELECT summary, last_used_at FROM summaries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache='summary', result='miss')
+            return None
+        self.hits += 1
+        CACHE_LOOKUPS.inc(cache='summary', result='hit')
+        now = time.time()
+        if now - row['last_used_at'] > self.TOUCH_INTERVAL:
+            self.db.execute('UPDATE summaries SET last_used_at = ? WHERE key = ?', (now, key))
+        return row['summary']
+
+    def contains(self, key):
+        """Membership test that does not count as a hit or miss (for background jobs)."""
+        return self.db.execute('SELECT 1 FROM summaries WHERE key = ?', (key,)).fetchone() is not None
+
+    def put(self, key, summary, model=None, article_id=None):
+        now = time.time()
+        with self.db.transaction() as conn:
+            if article_id:
+                # The article's content changed since these were generated: they can never be hit again
+                conn.execute('DELETE FROM summaries WHERE article_id = ? AND key != ?', (article_id, key))
+            conn.execute(
+                """
+                INSERT INTO summaries (key, article_id, model, summary, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET summary = excluded.summary, last_used_at = excluded.last_used_at,
+                    article_id = COALESCE(excluded.article_id, summaries.article_id)
+                """,
+                (key, article_id, model, summary, now, now),
+            )
+            count = conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    'DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY last_used_at LIMIT ?)',
+                    (count - self.max_entries,),
+                )
+
+    def invalidate_article(self, article_id):
+        """Drops all summaries generated for an article (e.g. after its content was re-scraped)."""
+        self.db.execute('DELETE FROM summaries WHERE article_id = ?', (article_id,))
+
+    def stats(self):
+        return {
+            'entries': self.db.execute('SELECT COUNT(*) FROM summaries').fetchone()[0],
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
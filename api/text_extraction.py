@@ -0,0 +1,99 @@
+from bs4 import NavigableString, Tag
+
+# Tags that start a new block of text; everything else is inline and joins the current block
+BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'details', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'td', 'th', 'tr', 'ul',
+})
+
+
+def split_skip_selectors(selectors):
+    """
+    Splits simple selectors ('script', '.ads', '#paywall') into (tag names, class names, ids).
+    Only these three forms are supported; they are matched by TextExtractor while it walks the DOM.
+    """
+    tags, classes, ids = set(), set(), set()
+    for selector in selectors:
+        if selector.startswith('.'):
+            classes.add(selector[1:])
+        elif selector.startswith('#'):
+            ids.add(selector[1:])
+        else:
+            tags.add(selector.lower())
+    return frozenset(tags), frozenset(classes), frozenset(ids)
+
+
+class TextExtractor:
+    """
+    Extracts the readable text under an element in one walk over the DOM.
+    Every text node is visited exactly once (no get_text() per ancestor), subtrees matching the
+    skip tags/classes/ids are never entered, and the output keeps block structure: one paragraph
+    per block element, separated by blank lines. Classes also match their CSS-module variants
+    ('ArticleHeader_container' skips 'ArticleHeader_container__3Jz1x').
+    """
+
+    def __init__(self, skip_selectors=(), boilerplate=None, boilerplate_max_chars=200):
+        self.skip_tags, self.skip_classes, self.skip_ids = split_skip_selectors(skip_selectors)
+        self.boilerplate = boilerplate
+        self.boilerplate_max_chars = boilerplate_max_chars
+
+    def is_boilerplate(self, block):
+        """True for a short block that is, as a whole, a boilerplate label or credit line."""
+        return len(block) <= self.boilerplate_max_chars and self.boilerplate.fullmatch(block) is not None
+
+    def _skip(self, tag):
+        if tag.name in self.skip_tags:
+            return True
+        attrs = tag.attrs
+        if self.skip_ids and attrs.get('id') in self.skip_ids:
+            return True
+        classes = attrs.get('class')
+        if classes and self.skip_classes:
+            for css_class in classes:
+                if css_class in self.skip_classes or css_class.split('__', 1)[0] in self.skip_classes:
+                    return True
+        return False
+
+    def blocks(self, root):
+        """The text blocks under root, whitespace-collapsed, in document order."""
+        blocks = []
+        current = [] # Raw strings of the block being built, so inline markup does not split words
+
+        def end_block():
+            text = ' '.join(''.join(current).split())
+            if text:
+                blocks.append(text)
+            current.clear()
+
+        # Iterative walk: (node, closing) pairs; closing marks the end of a block element
+        stack = [(root, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                end_block()
+                continue
+            if isinstance(node, Tag):
+                if node is not root and self._skip(node):
+                    continue
+                if node.name in BLOCK_TAGS:
+                    end_block()
+                    stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents))
+            elif type(node) is NavigableString: # Comments, CDATA, doctypes etc. are subclasses
+                current.append(node)
+        end_block()
+        return blocks
+
+    def extract(self, root):
+        """
+        Text of the blocks under root, separated by blank lines. The first boilerplate block
+        ("Reporting by ...", "Read more: ...", "Topics") ends the article body.
+        """
+        blocks = self.blocks(root)
+        if self.boilerplate is not None:
+            for i, block in enumerate(blocks):
+                if self.is_boilerplate(block):
+                    blocks = blocks[:i]
+                    break
+        return '\n\n'.join(blocks)
@@ -1,8 +1,7 @@
 import os
-from flask import Flask, jsonify, session
-from datetime import datetime, timedelta
+import time
+from flask import Flask, jsonify, request, g, Response
 from config import get_config
-import uuid
 from flask_cors import CORS # Import CORS
 
 # Initialize Flask app
@@ -15,10 +14,27 @@ CORS(app)
 # Load configuration based on environment
 app.config.from_object(get_config())
 
-# --- In-memory data stores (for demonstration purposes) ---
-# In a real application, these would be replaced by a database (e.g., Firestore, PostgreSQL)
-users_db = {} # Stores user_id -> {'tier': 'free'/'pro', 'summary_count': int, 'chat_count': int, 'last_reset_date': date}
-articles_db = {} # Stores article_id -> {'title': str, 'content': str, 'url': str}
+# --- Data stores ---
+# User tiers and daily free tier counters, shared by all gunicorn workers and kept across restarts.
+# The user of a request is resolved lazily from the session cookie (utils.access_control.current_user_id),
+# so routes without free tier limits do no per-user work.
+from utils.quota_store import QuotaStore
+quota_store = QuotaStore(app.config['QUOTA_STORE_PATH'])
+# Open Razorpay orders per (user, amount, currency), so retried /payment/create-order calls reuse them
+from payment.orders import OrderCache
+app.config['PAYMENT_ORDER_CACHE'] = OrderCache(app.config['PAYMENT_ORDER_STORE_PATH'], ttl=app.config['PAYMENT_ORDER_TTL'])
+# Articles live in SQLite shared by all gunicorn workers; ids are derived from the article URL
+from api.article_store import ArticleStore, ArticleCache
+articles_db = ArticleStore( # Stores article_id -> {'title', 'url', 'source', 'content', ...}
+    app.config['ARTICLE_STORE_PATH'],
+    cache=ArticleCache(
+        max_entries=app.config['ARTICLE_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['ARTICLE_CACHE_MAX_BYTES'],
+        ttl=app.config['ARTICLE_CACHE_TTL'],
+    ),
+    compress=app.config['ARTICLE_CACHE_COMPRESS'],
+    max_age=app.config['ARTICLE_STORE_MAX_AGE'],
+)
 
 # --- Blueprints Registration ---
 # Import and register blueprints from payment and api modules
@@ -29,14 +45,87 @@ app.register_blueprint(payment_bp, url_prefix='/payment')
 app.register_blueprint(api_bp, url_prefix='/api')
 
 # --- Initialize NewsScraper and AIService within an application context ---
-# This block runs when the 'app' object is created, which happens when Gunicorn imports app.py.
+# This block runs when the 'app' object is created, which happens when Gunicorn imports app.py
+# (once, in the master process, when the app is preloaded; see gunicorn.conf.py).
 # Using app.app_context() ensures current_app.config is available during instantiation.
 from api.news_scraper import NewsScraper
 from api.summarizer import AIService
+from api.headline_cache import HeadlineCache
+from api.prefetch import ArticlePrefetcher
+from api.presummarize import BackgroundSummarizer, SummaryBudget
+from api.retrieval import ContextRetriever
+from api.chat_sessions import ChatSessionStore
+from utils.single_flight import SingleFlight
+from utils import metrics
+from utils.profiling import RequestProfiler
+from utils.http_client import reset_http_client
+from payment.orders import reset_razorpay_client
+app.config['QUOTA_STORE'] = quota_store
+app.config['ARTICLES_DB'] = articles_db # Needed before the first request by the background headline refresher
+# Coalesces concurrent duplicate scrapes and LLM calls within this worker
+app.config['SINGLE_FLIGHT_INSTANCE'] = SingleFlight()
+# Selects the passages of an article that go into /api/chat prompts
+app.config['CONTEXT_RETRIEVER_INSTANCE'] = ContextRetriever(
+    top_k=app.config['CHAT_CONTEXT_TOP_K'],
+    token_budget=app.config['CHAT_CONTEXT_TOKEN_BUDGET'],
+    passage_words=app.config['CHAT_PASSAGE_WORDS'],
+    max_indexes=app.config['CHAT_INDEX_CACHE_SIZE'],
+)
+if app.config['CHAT_SESSIONS_ENABLED']:
+    app.config['CHAT_SESSIONS_INSTANCE'] = ChatSessionStore(
+        app.config['CHAT_SESSION_STORE_PATH'],
+        max_turns=app.config['CHAT_HISTORY_MAX_TURNS'],
+        token_budget=app.config['CHAT_HISTORY_TOKEN_BUDGET'],
+        ttl=app.config['CHAT_SESSION_TTL'],
+    )
+if app.config['METRICS_ENABLED']:
+    metrics.registry.configure(
+        app.config['METRICS_DIR'],
+        flush_interval=app.config['METRICS_FLUSH_INTERVAL'],
+        retention=app.config['METRICS_RETENTION'],
+    )
+    metrics.registry.gauge('article_store_articles', 'Articles in the shared article store.', lambda: len(articles_db))
+    metrics.registry.gauge('article_store_bytes', 'Size of the shared article store database file.', lambda: os.path.getsize(articles_db.db.path))
 with app.app_context():
     try:
         app.config['NEWS_SCRAPER_INSTANCE'] = NewsScraper(app.config['NEWS_SOURCES'])
+        app.config['HEADLINE_CACHE_INSTANCE'] = HeadlineCache(
+            app,
+            app.config['NEWS_SCRAPER_INSTANCE'],
+            ttl=app.config['HEADLINE_CACHE_TTL'],
+            refresh_enabled=app.config['HEADLINE_REFRESH_ENABLED'],
+        )
+        if app.config['ARTICLE_PREFETCH_ENABLED']:
+            prefetcher = ArticlePrefetcher(
+                app,
+                app.config['NEWS_SCRAPER_INSTANCE'],
+                app.config['SINGLE_FLIGHT_INSTANCE'],
+                top_n=app.config['ARTICLE_PREFETCH_TOP_N'],
+                workers=app.config['ARTICLE_PREFETCH_WORKERS'],
+            )
+            app.config['ARTICLE_PREFETCHER_INSTANCE'] = prefetcher
+            app.config['HEADLINE_CACHE_INSTANCE'].on_refresh.append(prefetcher.schedule)
         app.config['AI_SERVICE_INSTANCE'] = AIService()
+        if app.config['PRESUMMARIZE_ENABLED']:
+            ai_service = app.config['AI_SERVICE_INSTANCE']
+            if ai_service.summary_cache:
+                presummarizer = BackgroundSummarizer(
+                    app,
+                    ai_service,
+                    app.config['NEWS_SCRAPER_INSTANCE'],
+                    app.config['SINGLE_FLIGHT_INSTANCE'],
+                    SummaryBudget(
+                        ai_service.summary_cache.db,
+                        rpm=app.config['PRESUMMARIZE_RPM'],
+                        daily_tokens=app.config['PRESUMMARIZE_DAILY_TOKENS'],
+                    ),
+                    top_n=app.config['PRESUMMARIZE_TOP_N'],
+                    max_live_calls=app.config['PRESUMMARIZE_MAX_LIVE_CALLS'],
+                )
+                app.config['PRESUMMARIZER_INSTANCE'] = presummarizer
+                app.config['HEADLINE_CACHE_INSTANCE'].on_refresh.append(presummarizer.schedule)
+            else:
+                app.logger.warning("PRESUMMARIZE_ENABLED has no effect while SUMMARY_CACHE_ENABLED is off.")
         app.logger.info("NewsScraper and AIService initialized successfully.")
     except Exception as e:
         app.logger.error(f"Failed to initialize NewsScraper or AIService: {e}")
@@ -44,45 +133,74 @@ with app.app_context():
         # For now, we'll let the app start but log the error.
 
 
-# --- Before Request / User Management (Simplified for Demo) ---
-@app.before_request
-def manage_user_session():
+# --- Background threads and fork handling ---
+def start_background_threads():
+    """
+    Starts this process's background threads: headline refresher, article prefetcher,
+    pre-summarizer and metrics flusher. Threads do not survive fork(), so when gunicorn preloads
+    the app in its master process this runs in each worker instead (see init_worker).
+    """
+    for name in ('ARTICLE_PREFETCHER_INSTANCE', 'PRESUMMARIZER_INSTANCE'):
+        if app.config.get(name):
+            app.config[name].start()
+    if app.config.get('HEADLINE_CACHE_INSTANCE'):
+        app.config['HEADLINE_CACHE_INSTANCE'].start() # After the consumers of its on_refresh callbacks
+    if app.config['METRICS_ENABLED']:
+        metrics.registry.start()
+
+def init_worker():
     """
-    Manages a simple user session for access control.
-    In a real app, this would involve proper authentication (e.g., Flask-Login).
+    Per-worker setup after gunicorn forks a worker from a preloading master (post_fork in gunicorn.conf.py).
+    Everything built at import time (config, compiled extraction profiles, stores, the AI service)
+    is shared copy-on-write; network clients get fresh connection pools and threads are started here.
     """
-    if 'user_id' not in session:
-        session['user_id'] = str(uuid.uuid4())
-        # Initialize new user in our in-memory DB
-        users_db[session['user_id']] = {
-            'tier': 'free',
-            'summary_count': 0,
-            'chat_count': 0,
-            'last_reset_date': datetime.now().date()
-        }
-    else:
-        user_id = session['user_id']
-        if user_id not in users_db:
-            # Handle case where session exists but user_id is not in our in-memory DB
-            # This could happen if server restarts and in-memory DB is cleared
-            users_db[user_id] = {
-                'tier': 'free',
-                'summary_count': 0,
-                'chat_count': 0,
-                'last_reset_date': datetime.now().date()
-            }
-        # Reset daily limits if a new day has started
-        current_date = datetime.now().date()
-        if users_db[user_id]['last_reset_date'] < current_date:
-            users_db[user_id]['summary_count'] = 0
-            users_db[user_id]['chat_count'] = 0
-            users_db[user_id]['last_reset_date'] = current_date
-
-    # Make user_id and user_data available globally for requests
-    app.config['CURRENT_USER_ID'] = session['user_id']
-    app.config['CURRENT_USER_DATA'] = users_db[session['user_id']]
-    app.config['USERS_DB'] = users_db # Pass the entire DB for modifications in other modules
-    app.config['ARTICLES_DB'] = articles_db # Pass articles DB
+    reset_http_client()
+    reset_razorpay_client()
+    start_background_threads()
+
+if not app.config['START_THREADS_AFTER_FORK']:
+    start_background_threads()
+
+
+# --- Request profiling (registered first, so the profile covers the other request hooks) ---
+if app.config['PROFILING_ENABLED']:
+    app.config['REQUEST_PROFILER_INSTANCE'] = RequestProfiler(
+        app.config['PROFILING_DIR'],
+        admin_token=app.config['PROFILING_ADMIN_TOKEN'],
+        sample_every=app.config['PROFILING_SAMPLE_EVERY'],
+        sample_routes=app.config['PROFILING_SAMPLE_ROUTES'],
+        interval=app.config['PROFILING_INTERVAL'],
+        default_mode=app.config['PROFILING_MODE'],
+        max_files=app.config['PROFILING_MAX_FILES'],
+    )
+
+    @app.before_request
+    def start_profiling():
+        g.profile_run = app.config['REQUEST_PROFILER_INSTANCE'].start(request)
+
+    @app.after_request
+    def finish_profiling(response):
+        run = g.get('profile_run')
+        if run is not None:
+            response.headers['X-Profile-Id'] = run.name
+            # On close, so streamed responses are profiled until their last chunk
+            response.call_on_close(lambda: app.config['REQUEST_PROFILER_INSTANCE'].finish(run))
+        return response
+
+
+# --- Request metrics ---
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    if started is not None:
+        # The route pattern, not the path, keeps the number of label values bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route, status=response.status_code)
+    return response
 
 
 # --- Home Route (for API health check) ---
@@ -94,6 +212,13 @@ def home():
     """
     return jsonify({"message": "AI News Backend API is running!"}), 200
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Metrics of all workers in the Prometheus text format, for scraping."""
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({"error": "Not found"}), 404
+    return Response(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # --- Error Handling ---
 @app.errorhandler(404)
 def not_found_error(error):
@@ -0,0 +1,89 @@
+"""
+Benchmark for POST /payment/create-order against the local Razorpay stand-in.
+
+Each simulated user clicks "Upgrade" several times (a burst of concurrent double clicks, then
+sequential retries). Reports the latency of first and repeated calls and how many orders were created
+upstream; with the idempotent order cache that is one per user.
+
+Usage:
+    python benchmarks/bench_orders.py [--users 20] [--concurrent 4] [--retries 5] [--delay 0.3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile_ms(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--concurrent', type=int, default=4, help='Simultaneous first calls per user (double clicks)')
+    parser.add_argument('--retries', type=int, default=5, help='Sequential repeat calls per user afterwards')
+    parser.add_argument('--delay', type=float, default=0.3, help='Simulated Razorpay round trip, in seconds')
+    args = parser.parse_args()
+
+    from razorpay_stand_in import start_server
+    server = start_server(delay=args.delay)
+
+    # The app reads its configuration from the environment at import time
+    os.environ.update(
+        DATA_DIR=tempfile.mkdtemp(prefix='bench_orders_'),
+        RAZORPAY_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1", # razorpay 1.x: the version is part of the base URL
+        RAZORPAY_KEY_ID='rzp_test_bench',
+        RAZORPAY_KEY_SECRET='bench_secret',
+        HEADLINE_REFRESH_ENABLED='false',
+        METRICS_ENABLED='false',
+        OPENROUTER_API_KEY='unused', # The app refuses to start its AI service without a key
+    )
+    from app import app
+    app.logger.setLevel('WARNING')
+
+    first, repeated = [], []
+
+    def call(client):
+        start = time.perf_counter()
+        response = client.post('/payment/create-order', json={'amount': 50000, 'currency': 'INR'})
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"create-order failed: {response.status_code} {response.get_data(as_text=True)}")
+        return elapsed, response.headers.get('X-Order-Reused') == 'true', response.get_json()['id']
+
+    started = time.perf_counter()
+    for _ in range(args.users):
+        client = app.test_client() # One cookie jar, i.e. one user
+        with client.session_transaction() as session:
+            session['user_id'] = str(uuid.uuid4()) # A returning visitor, who already has a session cookie
+        # A double click: simultaneous calls before any order exists, then retries
+        with ThreadPoolExecutor(args.concurrent) as executor:
+            results = list(executor.map(lambda _: call(client), range(args.concurrent)))
+        results += [call(client) for _ in range(args.retries)]
+        order_ids = {order_id for _, _, order_id in results}
+        if len(order_ids) != 1:
+            print(f"WARNING: one user got {len(order_ids)} different orders")
+        for elapsed, reused, _ in results:
+            (repeated if reused else first).append(elapsed)
+    total = time.perf_counter() - started
+
+    calls = len(first) + len(repeated)
+    print(f"{args.users} users, {calls} create-order calls in {total:.2f}s (stand-in delay {args.delay * 1000:.0f} ms)")
+    print(f"upstream orders created: {server.orders_created}")
+    for name, values in (('new order', first), ('reused order', repeated)):
+        if values:
+            print(f"{name:13} n={len(values):4}  median {statistics.median(values) * 1000:8.2f} ms  p95 {percentile_ms(values, 0.95):8.2f} ms")
+    print(f"order cache: {app.config['PAYMENT_ORDER_CACHE'].stats()}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares HTML parse time of the original scraper path (decoded text + full html.parser tree)
+with the fast-parse path (raw bytes + fastest installed backend + SoupStrainer).
+
+Usage:
+    python benchmarks/bench_parse.py saved_pages/ [more.html ...] [--repeat 20]
+
+Files whose name starts with 'home' are parsed with the headline strainer,
+everything else with the article strainer.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from api.extraction_profiles import compile_profiles
+from api.html_parsing import resolve_parser, make_soup, HEADLINE_STRAINER
+
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.html'))
+        else:
+            files.append(path)
+    return files
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='HTML files or directories of saved pages')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--parser', default='auto', help="Backend for the fast path ('auto', 'lxml', 'html5lib', 'html.parser')")
+    args = parser.parse_args()
+
+    backend = resolve_parser(args.parser)
+    article_strainer = compile_profiles()['reuters'].article_strainer
+    print(f"fast-path backend: {backend}")
+    print(f"{'file':40} {'KiB':>7} {'baseline ms':>12} {'fast ms':>9} {'speedup':>8}")
+    total_base = total_fast = 0.0
+    for path in collect_files(args.paths):
+        with open(path, 'rb') as f:
+            body = f.read()
+        strainer = HEADLINE_STRAINER if os.path.basename(path).startswith('home') else article_strainer
+        text = body.decode('utf-8', errors='replace')
+        base = best_time(lambda: BeautifulSoup(text, 'html.parser'), args.repeat)
+        fast = best_time(lambda: make_soup(body, backend, 'utf-8', parse_only=strainer), args.repeat)
+        total_base += base
+        total_fast += fast
+        print(f"{os.path.basename(path)[:40]:40} {len(body) / 1024:7.1f} {base * 1000:12.2f} {fast * 1000:9.2f} {base / fast:7.1f}x")
+    if total_fast:
+        print(f"{'TOTAL':40} {'':7} {total_base * 1000:12.2f} {total_fast * 1000:9.2f} {total_base / total_fast:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+End-to-end NewsScraper benchmark over the corpus in benchmarks/corpus/, served by the local
+stand-in server (no network access needed).
+
+The corpus is synthetic: pages generated with the markup structure of Reuters homepages and
+articles (card and article-body classes, bylines, meta tags, ads, sign-off boilerplate) filled
+with random word text. They are not captured pages, so they exercise the scraper's code paths and
+relative costs, not the exact size and shape of live pages.
+
+Times scrape_headlines() and scrape_article_content() per call and per stage (fetch, parse,
+select, extract), reports throughput in pages/sec and peak memory, and compares the results with
+a stored baseline.
+
+Usage:
+    python benchmarks/bench_scraper.py [--rounds 5] [--delay 0.0]
+    python benchmarks/bench_scraper.py --save-baseline        # record benchmarks/baseline.json
+    python benchmarks/bench_scraper.py --check --tolerance 0.2  # exit 1 on a >20% slowdown
+
+The comparison is relative (change against the baseline, per metric) and advisory: the checked-in
+baseline holds absolute timings from one development machine, and run-to-run noise alone moves
+millisecond-sized stages by more than the tolerance. Timing changes smaller than --min-delta-ms
+are never flagged. Record a baseline with --save-baseline on the machine you compare on, and
+rerun before treating a flag as a regression; --check turns the flags into a failing exit status.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from config import Config
+from stand_in_server import start_server
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+STAGES = ('fetch', 'parse', 'select', 'extract')
+
+
+class StageRecorder:
+    """NewsScraper stage observer: accumulates stage durations under the operation being timed."""
+
+    def __init__(self):
+        self.operation = None
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage, seconds):
+        with self._lock:
+            key = (self.operation, stage)
+            self.totals[key] = self.totals.get(key, 0.0) + seconds
+
+    def reset(self):
+        with self._lock:
+            self.totals = {}
+
+
+def make_app(port, args, data_dir):
+    app = Flask('bench_scraper')
+    app.config.from_object(Config)
+    base = f"http://127.0.0.1:{port}/"
+    app.config.update(
+        NEWS_SOURCES=[
+            {'name': 'Reuters', 'url': base, 'profile': 'reuters'},
+            {'name': 'Reuters (small)', 'url': base + 'home_reuters_small.html', 'profile': 'reuters'},
+        ],
+        SCRAPER_DOMAIN_DELAY=0,
+        HTTP_CACHE_ENABLED=args.http_cache,
+        HTTP_CACHE_DIR=os.path.join(data_dir, 'http_cache'),
+        HTML_PARSER=args.parser,
+        HTML_PARSE_STRAINERS=not args.no_strainers,
+    )
+    from api.article_store import ArticleStore
+    app.config['ARTICLES_DB'] = ArticleStore(os.path.join(data_dir, 'articles.sqlite3'))
+    return app
+
+
+def summarize(durations, pages, recorder, operation):
+    total = sum(durations)
+    ordered = sorted(durations)
+    return {
+        'pages': pages,
+        'pages_per_sec': round(pages / total, 2) if total else None,
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 3),
+        # Average time per page spent in each stage
+        'stages_ms': {
+            stage: round(recorder.totals[(operation, stage)] / pages * 1000, 3)
+            for stage in STAGES if (operation, stage) in recorder.totals
+        },
+    }
+
+
+def run_round(scraper, recorder, max_articles):
+    recorder.operation = 'headlines'
+    start = time.perf_counter()
+    headlines = scraper.scrape_headlines()
+    headline_time = time.perf_counter() - start
+
+    recorder.operation = 'articles'
+    article_times = []
+    for headline in headlines[:max_articles]:
+        start = time.perf_counter()
+        scraper.scrape_article_content(headline['url'])
+        article_times.append(time.perf_counter() - start)
+    return headline_time, len(scraper.sources), article_times
+
+
+def run(args):
+    server = start_server(delay=args.delay)
+    data_dir = tempfile.mkdtemp(prefix='bench_scraper_')
+    app = make_app(server.server_port, args, data_dir)
+    logging_level = app.logger.level
+    app.logger.setLevel('WARNING') # The scraper logs every page at INFO
+
+    with app.app_context():
+        from api.news_scraper import NewsScraper
+        scraper = NewsScraper(app.config['NEWS_SOURCES'])
+        recorder = StageRecorder()
+        scraper.stage_observer = recorder
+
+        run_round(scraper, recorder, args.articles) # Warm-up: connections, lazy imports, selector compilation
+        recorder.reset()
+
+        headline_times, article_times, headline_pages = [], [], 0
+        for _ in range(args.rounds):
+            headline_time, sources, times = run_round(scraper, recorder, args.articles)
+            headline_times.append(headline_time)
+            headline_pages += sources
+            article_times.extend(times)
+
+        results = {
+            'headlines': summarize(headline_times, headline_pages, recorder, 'headlines'),
+            'articles': summarize(article_times, len(article_times), recorder, 'articles'),
+        }
+
+        # Memory is measured in a separate round, since tracing allocations slows everything down
+        scraper.stage_observer = None
+        tracemalloc.start()
+        run_round(scraper, recorder, args.articles)
+        results['peak_python_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+
+    app.logger.setLevel(logging_level)
+    server.shutdown()
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['max_rss_mb'] = round(max_rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+    results['environment'] = {
+        'python': platform.python_version(),
+        'parser': scraper.parser,
+        'strainers': scraper.use_strainers,
+        'http_cache': args.http_cache,
+        'rounds': args.rounds,
+        'delay': args.delay,
+    }
+    return results
+
+
+def flatten(results):
+    """Comparable metrics as {name: (value, higher_is_better)}."""
+    metrics = {}
+    for operation in ('headlines', 'articles'):
+        data = results.get(operation, {})
+        if data.get('pages_per_sec') is not None:
+            metrics[f'{operation}.pages_per_sec'] = (data['pages_per_sec'], True)
+        for key in ('median_ms', 'p95_ms'):
+            if key in data:
+                metrics[f'{operation}.{key}'] = (data[key], False)
+        for stage, value in data.get('stages_ms', {}).items():
+            metrics[f'{operation}.{stage}_ms'] = (value, False)
+    for key in ('peak_python_mb', 'max_rss_mb'):
+        if key in results:
+            metrics[key] = (results[key], False)
+    return metrics
+
+
+def compare(results, baseline, tolerance, min_delta_ms=0.0):
+    """
+    Prints current vs baseline; returns the names of metrics that got worse by more than tolerance
+    (relative to the baseline). Millisecond metrics that moved by less than min_delta_ms are not counted.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    print(f"\n{'metric':28} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, (value, higher_is_better) in current.items():
+        if name not in previous or not previous[name][0]:
+            print(f"{name:28} {'-':>10} {value:10.2f}")
+            continue
+        old = previous[name][0]
+        change = (value - old) / old
+        worse = -change if higher_is_better else change
+        flag = ''
+        if worse > tolerance and not (name.endswith('_ms') and abs(value - old) < min_delta_ms):
+            flag = '  worse (advisory)'
+            regressions.append(name)
+        print(f"{name:28} {old:10.2f} {value:10.2f} {change:+7.1%}{flag}")
+    return regressions
+
+
+def print_results(results):
+    env = results['environment']
+    print(f"parser={env['parser']} strainers={env['strainers']} http_cache={env['http_cache']} rounds={env['rounds']} delay={env['delay']}s")
+    print(f"{'operation':10} {'pages':>6} {'pages/s':>8} {'median ms':>10} {'p95 ms':>8}   " + ' '.join(f"{stage + ' ms':>10}" for stage in STAGES))
+    for operation in ('headlines', 'articles'):
+        data = results[operation]
+        stages = ' '.join(f"{data['stages_ms'].get(stage, 0):10.2f}" for stage in STAGES)
+        print(f"{operation:10} {data['pages']:6} {data['pages_per_sec']:8.1f} {data['median_ms']:10.2f} {data['p95_ms']:8.2f}   {stages}")
+    print(f"peak python memory {results['peak_python_mb']} MiB, max RSS {results['max_rss_mb']} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5, help='Headline refreshes to time (each followed by its articles)')
+    parser.add_argument('--articles', type=int, default=20, help='Articles scraped per round')
+    parser.add_argument('--delay', type=float, default=0.0, help='Simulated network latency per request, in seconds')
+    parser.add_argument('--parser', default='auto', help="HTML parser backend ('auto', 'lxml', 'html.parser', ...)")
+    parser.add_argument('--no-strainers', action='store_true', help='Parse whole documents instead of using SoupStrainers')
+    parser.add_argument('--http-cache', action='store_true', help='Enable the conditional-GET HTTP cache')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 if a metric regressed beyond --tolerance')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed relative regression per metric')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Ignore timing changes smaller than this (noise floor)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) worse than the baseline by more than {args.tolerance:.0%}. "
+                  "Timings are noisy and the baseline is machine-specific: rerun before treating this as a regression.")
+            if args.check:
+                sys.exit(1)
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
+
+
+if __name__ == '__main__':
+    main()
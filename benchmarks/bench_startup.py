@@ -0,0 +1,180 @@
+"""
+Startup benchmark: cold import time of the app and per-worker memory under gunicorn, with and
+without preloading the app in the master (gunicorn.conf.py, GUNICORN_PRELOAD).
+
+1. Imports app.py in fresh interpreters and reports the import time, the process RSS and which
+   heavy SDKs got loaded (they should only be imported on first use).
+2. Boots gunicorn with the repo's gunicorn.conf.py twice (preload off / on) and reports the time
+   until every worker is ready plus RSS, PSS and private memory per worker. PSS counts shared
+   copy-on-write pages proportionally, so it is the number that shows what preloading saves.
+
+Upstream calls are not needed: headline refresh is disabled and the API keys are dummies.
+
+Usage:
+    python benchmarks/bench_startup.py [--imports 5] [--workers 4] [--skip-gunicorn]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('google.generativeai', 'razorpay')
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+with open('/proc/self/status') as f:
+    rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+print(json.dumps({'seconds': elapsed, 'rss_kb': rss_kb, 'loaded': [m for m in %r if m in sys.modules]}))
+"""
+
+# Wraps the repo's gunicorn.conf.py and reports when each worker has finished booting
+GUNICORN_WRAPPER = """
+exec(compile(open({conf!r}).read(), {conf!r}, 'exec'))
+
+def post_worker_init(worker):
+    import sys, time
+    sys.stderr.write(f"BENCH_WORKER_READY {{worker.pid}} {{time.time()}}\\n")
+    sys.stderr.flush()
+"""
+
+
+def bench_env(data_dir):
+    env = dict(os.environ)
+    env.update(
+        DATA_DIR=data_dir,
+        HEADLINE_REFRESH_ENABLED='false',
+        OPENROUTER_API_KEY='bench-unused',
+        AI_API_KEY='bench-unused', # Configures Gemini as the failover provider
+        PYTHONDONTWRITEBYTECODE='1',
+    )
+    return env
+
+
+def bench_imports(runs, env):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_PROBE % (HEAVY_MODULES,)],
+            cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'import_seconds_median': round(statistics.median(r['seconds'] for r in results), 3),
+        'import_seconds_min': round(min(r['seconds'] for r in results), 3),
+        'rss_mb': round(statistics.median(r['rss_kb'] for r in results) / 1024, 1),
+        'heavy_modules_loaded': results[-1]['loaded'],
+    }
+
+
+def memory_of(pid):
+    """RSS, PSS and private (unshared) memory of a process in MiB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {
+        'rss_mb': round(fields.get('Rss', 0) / 1024, 1),
+        'pss_mb': round(fields.get('Pss', 0) / 1024, 1),
+        'private_mb': round(private / 1024, 1),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def bench_gunicorn(preload, workers, env, timeout=60):
+    port = free_port()
+    wrapper = tempfile.NamedTemporaryFile('w', suffix='.py', delete=False)
+    wrapper.write(GUNICORN_WRAPPER.format(conf=os.path.join(REPO_DIR, 'gunicorn.conf.py')))
+    wrapper.close()
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_PRELOAD='true' if preload else 'false')
+    env.pop('START_THREADS_AFTER_FORK', None)
+    log = tempfile.TemporaryFile('w+')
+
+    start = time.time()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', wrapper.name, 'app:app'],
+        cwd=REPO_DIR, env=env, stdout=log, stderr=log,
+    )
+    try:
+        ready = {}
+        while len(ready) < workers:
+            if process.poll() is not None or time.time() - start > timeout:
+                log.seek(0)
+                raise RuntimeError(f"gunicorn did not start:\n{log.read()[-2000:]}")
+            time.sleep(0.05)
+            log.seek(0)
+            for line in log:
+                if line.startswith('BENCH_WORKER_READY'):
+                    _, pid, at = line.split()
+                    ready[int(pid)] = float(at)
+        all_ready = max(ready.values()) - start
+
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=10) as response:
+            assert response.status == 200
+        time.sleep(0.5) # Let the workers settle before reading their memory
+
+        per_worker = [memory_of(pid) for pid in ready]
+        return {
+            'preload': preload,
+            'first_worker_ready_seconds': round(min(ready.values()) - start, 3),
+            'all_workers_ready_seconds': round(all_ready, 3),
+            'master': memory_of(process.pid),
+            'worker_rss_mb': round(statistics.mean(w['rss_mb'] for w in per_worker), 1),
+            'worker_pss_mb': round(statistics.mean(w['pss_mb'] for w in per_worker), 1),
+            'worker_private_mb': round(statistics.mean(w['private_mb'] for w in per_worker), 1),
+            'total_pss_mb': round(sum(w['pss_mb'] for w in per_worker) + memory_of(process.pid)['pss_mb'], 1),
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        os.remove(wrapper.name)
+        log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--imports', type=int, default=5, help='Cold imports of app.py to time')
+    parser.add_argument('--workers', type=int, default=4, help='Gunicorn workers')
+    parser.add_argument('--skip-gunicorn', action='store_true', help='Only time the cold import')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    env = bench_env(tempfile.mkdtemp(prefix='bench_startup_'))
+    results = {'import': bench_imports(args.imports, env)}
+    imports = results['import']
+    print(f"cold import of app.py: median {imports['import_seconds_median'] * 1000:.0f} ms "
+          f"(min {imports['import_seconds_min'] * 1000:.0f} ms), RSS {imports['rss_mb']} MiB, "
+          f"heavy SDKs loaded: {', '.join(imports['heavy_modules_loaded']) or 'none'}")
+
+    if not args.skip_gunicorn:
+        results['gunicorn'] = [bench_gunicorn(preload, args.workers, env) for preload in (False, True)]
+        print(f"\ngunicorn, {args.workers} workers")
+        print(f"{'preload':8} {'ready (s)':>10} {'RSS/worker':>11} {'PSS/worker':>11} {'private/worker':>15} {'total PSS':>10}")
+        for run in results['gunicorn']:
+            print(f"{str(run['preload']):8} {run['all_workers_ready_seconds']:10.2f} {run['worker_rss_mb']:10.1f}M "
+                  f"{run['worker_pss_mb']:10.1f}M {run['worker_private_mb']:14.1f}M {run['total_pss_mb']:9.1f}M")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
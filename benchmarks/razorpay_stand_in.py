@@ -0,0 +1,124 @@
+"""
+Local stand-in for the Razorpay orders API, so /payment/create-order can be exercised without
+network access or real keys. Point the app at it with RAZORPAY_BASE_URL=http://127.0.0.1:<port>/v1;
+like the pinned razorpay 1.x SDK, the base URL carries the API version and order paths are appended to it.
+
+    POST /v1/orders       -> creates an order ({'id': 'order_...', 'status': 'created', ...})
+    GET  /v1/orders/<id>  -> returns a created order
+
+Requests must use HTTP basic auth (any key id and secret). An optional per-request delay
+simulates the upstream round trip; `server.orders_created` counts upstream orders.
+
+Usage:
+    python benchmarks/razorpay_stand_in.py [--port 8098] [--delay 0.3]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(server_state, delay=0.0):
+
+    class RazorpayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status, code, description):
+            self._send(status, {'error': {'code': code, 'description': description}})
+
+        def _authorized(self):
+            if not self.headers.get('Authorization', '').startswith('Basic '):
+                self._error(401, 'BAD_REQUEST_ERROR', 'Authentication failed')
+                return False
+            return True
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if not self._authorized():
+                return
+            if self.path.rstrip('/') != '/v1/orders':
+                self._error(404, 'BAD_REQUEST_ERROR', 'The requested URL was not found on the server.')
+                return
+            if delay:
+                time.sleep(delay)
+            data = json.loads(body or b'{}')
+            if not isinstance(data.get('amount'), int) or data['amount'] < 100:
+                self._error(400, 'BAD_REQUEST_ERROR', 'The amount must be atleast INR 1.00')
+                return
+            order = {
+                'id': f"order_{os.urandom(7).hex()}",
+                'entity': 'order',
+                'amount': data['amount'],
+                'amount_paid': 0,
+                'amount_due': data['amount'],
+                'currency': data.get('currency', 'INR'),
+                'receipt': data.get('receipt'),
+                'status': 'created',
+                'attempts': 0,
+                'notes': data.get('notes', []),
+                'created_at': int(time.time()),
+            }
+            with server_state['lock']:
+                server_state['orders'][order['id']] = order
+            self._send(200, order)
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            prefix = '/v1/orders/'
+            order = server_state['orders'].get(self.path[len(prefix):]) if self.path.startswith(prefix) else None
+            if order is None:
+                self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+                return
+            self._send(200, order)
+
+        def log_message(self, format, *args):
+            pass
+
+    return RazorpayHandler
+
+
+class RazorpayStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, delay=0.0):
+        self.state = {'orders': {}, 'lock': threading.Lock()}
+        super().__init__(address, make_handler(self.state, delay))
+
+    @property
+    def orders_created(self):
+        return len(self.state['orders'])
+
+
+def start_server(port=0, delay=0.0):
+    """Starts the stand-in on a background thread; returns the server (see server.server_port)."""
+    server = RazorpayStandIn(('127.0.0.1', port), delay)
+    threading.Thread(target=server.serve_forever, name='razorpay-stand-in', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before creating each order')
+    args = parser.parse_args()
+    server = RazorpayStandIn(('127.0.0.1', args.port), args.delay)
+    print(f"Razorpay stand-in on http://127.0.0.1:{args.port}/ (set RAZORPAY_BASE_URL=http://127.0.0.1:{args.port}/v1)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
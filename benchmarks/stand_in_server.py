@@ -0,0 +1,109 @@
+"""
+Local stand-in for reuters.com that serves the saved pages in benchmarks/corpus/, so the scraper
+can be exercised end to end without network access.
+
+    /                      -> home_reuters.html
+    /<name>.html           -> corpus/<name>.html (e.g. /home_reuters_small.html)
+    /<section>/<slug>.../  -> the article_*.html whose slug the path contains (any other
+                              article path gets a corpus article picked from a hash of the path)
+
+Responses carry an ETag and honour If-None-Match, like the real site. An optional per-request
+delay simulates network latency.
+
+Usage:
+    python benchmarks/stand_in_server.py [--port 8099] [--delay 0.05]
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def load_corpus(directory=CORPUS_DIR):
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.html'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def make_handler(pages, delay=0.0):
+    articles = {name[len('article_'):-len('.html')]: name for name in pages if name.startswith('article_')}
+    etags = {name: '"%s"' % hashlib.sha1(body).hexdigest()[:16] for name, body in pages.items()}
+
+    def page_for(path):
+        path = path.split('?', 1)[0]
+        if path == '/':
+            return 'home_reuters.html'
+        if path.lstrip('/') in pages:
+            return path.lstrip('/')
+        for slug, name in articles.items():
+            if slug in path:
+                return name
+        if not articles:
+            return None
+        names = sorted(articles.values())
+        return names[zlib.crc32(path.encode('utf-8')) % len(names)]
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Keep-alive, like the real site
+        requests_served = 0
+
+        def do_GET(self):
+            StandInHandler.requests_served += 1
+            if delay:
+                time.sleep(delay)
+            name = page_for(self.path)
+            if name is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if self.headers.get('If-None-Match') == etags[name]:
+                self.send_response(304)
+                self.send_header('ETag', etags[name])
+                self.end_headers()
+                return
+            body = pages[name]
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etags[name])
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def start_server(port=0, delay=0.0, directory=CORPUS_DIR):
+    """Starts the stand-in server on a background thread; returns the server (see server.server_port)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(load_corpus(directory), delay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stand-in-server', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before answering each request')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(load_corpus(), args.delay))
+    print(f"Serving {CORPUS_DIR} on http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -9,6 +10,8 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'a_very_secret_key_for_dev')
     RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID')
     RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET')
+    RAZORPAY_BASE_URL = os.environ.get('RAZORPAY_BASE_URL') # Unset uses the SDK default; for a local stand-in, e.g. http://127.0.0.1:8098/v1
+    RAZORPAY_TIMEOUT = float(os.environ.get('RAZORPAY_TIMEOUT', 10)) # Seconds per Razorpay API call
     
     # AI API Configuration - Now supporting OpenRouter
     AI_API_KEY = os.environ.get('AI_API_KEY') # Generic key, can be used for Gemini or OpenRouter
@@ -20,15 +23,121 @@ class Config:
     OPENROUTER_MODEL_NAME = os.environ.get('OPENROUTER_MODEL_NAME', "deepseek/deepseek-r1-0528:free")
 
 
+    # Set by gunicorn.conf.py when the app is preloaded in the master: background threads start in each worker instead
+    START_THREADS_AFTER_FORK = os.environ.get('START_THREADS_AFTER_FORK', 'false').lower() == 'true'
+
+    # Local data directory for SQLite stores shared by all gunicorn workers on the host
+    DATA_DIR = os.environ.get('DATA_DIR', os.path.join(tempfile.gettempdir(), 'ai_news_backend'))
+    ARTICLE_STORE_PATH = os.environ.get('ARTICLE_STORE_PATH', os.path.join(DATA_DIR, 'articles.sqlite3'))
+    ARTICLE_STORE_MAX_AGE = int(os.environ.get('ARTICLE_STORE_MAX_AGE', 7 * 24 * 3600)) # Seconds after an article leaves the front page before it is pruned
+    QUOTA_STORE_PATH = os.environ.get('QUOTA_STORE_PATH', os.path.join(DATA_DIR, 'quota.sqlite3')) # User tiers and free tier counters
+    PAYMENT_ORDER_STORE_PATH = os.environ.get('PAYMENT_ORDER_STORE_PATH', os.path.join(DATA_DIR, 'payment_orders.sqlite3'))
+    PAYMENT_ORDER_TTL = int(os.environ.get('PAYMENT_ORDER_TTL', 900)) # Seconds an open order is reused for the same user, amount and currency
+
+    # Per-worker in-memory article cache in front of the shared store
+    ARTICLE_CACHE_MAX_ENTRIES = int(os.environ.get('ARTICLE_CACHE_MAX_ENTRIES', 500))
+    ARTICLE_CACHE_MAX_BYTES = int(os.environ.get('ARTICLE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    ARTICLE_CACHE_TTL = int(os.environ.get('ARTICLE_CACHE_TTL', 3600)) # Seconds before a cached record is re-read
+    ARTICLE_CACHE_COMPRESS = os.environ.get('ARTICLE_CACHE_COMPRESS', 'true').lower() == 'true' # zlib-compress cached article bodies
+
+    # Content-addressed LLM summary cache shared by all workers
+    SUMMARY_CACHE_ENABLED = os.environ.get('SUMMARY_CACHE_ENABLED', 'true').lower() == 'true'
+    SUMMARY_CACHE_PATH = os.environ.get('SUMMARY_CACHE_PATH', os.path.join(DATA_DIR, 'summaries.sqlite3'))
+    SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', 5000))
+
+    # Retrieval of chat context: long articles are cut down to the passages relevant to the question
+    CHAT_CONTEXT_TOP_K = int(os.environ.get('CHAT_CONTEXT_TOP_K', 4)) # Passages per prompt
+    CHAT_CONTEXT_TOKEN_BUDGET = int(os.environ.get('CHAT_CONTEXT_TOKEN_BUDGET', 1500)) # Articles under this are sent whole
+    CHAT_PASSAGE_WORDS = int(os.environ.get('CHAT_PASSAGE_WORDS', 120))
+    CHAT_INDEX_CACHE_SIZE = int(os.environ.get('CHAT_INDEX_CACHE_SIZE', 200)) # Passage indexes kept per worker
+
+    # Server-side multi-turn chat sessions per (user, article)
+    CHAT_SESSIONS_ENABLED = os.environ.get('CHAT_SESSIONS_ENABLED', 'true').lower() == 'true'
+    CHAT_SESSION_STORE_PATH = os.environ.get('CHAT_SESSION_STORE_PATH', os.path.join(DATA_DIR, 'chat_sessions.sqlite3'))
+    CHAT_HISTORY_MAX_TURNS = int(os.environ.get('CHAT_HISTORY_MAX_TURNS', 10)) # Question/answer pairs kept per session
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHAT_HISTORY_TOKEN_BUDGET', 1500)) # Older turns are dropped beyond this
+    CHAT_SESSION_TTL = int(os.environ.get('CHAT_SESSION_TTL', 24 * 3600)) # Seconds of inactivity before a session expires
+
+    # Resilient LLM calls: per-attempt deadlines, jittered retries, hedging, circuit breakers, failover
+    LLM_ATTEMPT_TIMEOUT = float(os.environ.get('LLM_ATTEMPT_TIMEOUT', 15)) # Seconds per attempt
+    LLM_TOTAL_TIMEOUT = float(os.environ.get('LLM_TOTAL_TIMEOUT', 40)) # Seconds per call, across retries and providers
+    LLM_MAX_ATTEMPTS = int(os.environ.get('LLM_MAX_ATTEMPTS', 3)) # Per provider
+    LLM_BACKOFF_BASE = float(os.environ.get('LLM_BACKOFF_BASE', 0.5))
+    LLM_BACKOFF_MAX = float(os.environ.get('LLM_BACKOFF_MAX', 4.0))
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'true').lower() == 'true'
+    LLM_HEDGE_MIN_DELAY = float(os.environ.get('LLM_HEDGE_MIN_DELAY', 2.0)) # Never hedge before this, even if p95 is lower
+    LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5)) # Consecutive failures that open a provider's circuit
+    LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30)) # Seconds before a trial call to an open provider
+    LLM_FAILOVER_ENABLED = os.environ.get('LLM_FAILOVER_ENABLED', 'true').lower() == 'true' # Use Gemini as fallback for OpenRouter
+    LLM_MAX_CONCURRENT_CALLS = int(os.environ.get('LLM_MAX_CONCURRENT_CALLS', 16)) # Per worker, including hedges
+
+    # Background summaries of the top headlines after each refresh (needs the summary cache)
+    PRESUMMARIZE_ENABLED = os.environ.get('PRESUMMARIZE_ENABLED', 'false').lower() == 'true'
+    PRESUMMARIZE_TOP_N = int(os.environ.get('PRESUMMARIZE_TOP_N', 5))
+    PRESUMMARIZE_RPM = int(os.environ.get('PRESUMMARIZE_RPM', 10)) # LLM requests per minute, all workers together
+    PRESUMMARIZE_DAILY_TOKENS = int(os.environ.get('PRESUMMARIZE_DAILY_TOKENS', 200000)) # Estimated prompt + answer tokens per day
+    PRESUMMARIZE_MAX_LIVE_CALLS = int(os.environ.get('PRESUMMARIZE_MAX_LIVE_CALLS', 1)) # Pause while this many live LLM calls run in the worker
+
+    # POST /api/summarize/batch
+    SUMMARY_BATCH_MAX_ITEMS = int(os.environ.get('SUMMARY_BATCH_MAX_ITEMS', 40)) # One front page of headlines
+    SUMMARY_BATCH_CONCURRENCY = int(os.environ.get('SUMMARY_BATCH_CONCURRENCY', 8)) # Parallel scrapes/LLM calls per batch
+
     # Tier limits
     FREE_TIER_SUMMARY_LIMIT = 1
     FREE_TIER_CHAT_LIMIT = 1
 
     # News scraping configuration
     # Define multiple news sources as a list of dictionaries
+    # 'profile' names the extraction profile in api/extraction_profiles.py used for the source's pages
     NEWS_SOURCES = [
-        {'name': 'Reuters', 'url': 'https://www.reuters.com/'},
+        {'name': 'Reuters', 'url': 'https://www.reuters.com/', 'profile': 'reuters'},
     ]
+    EXTRACTION_DEFAULT_PROFILE = 'reuters' # Used for sources without a profile and for articles on unknown domains
+    SELECTOR_REORDER_INTERVAL = int(os.environ.get('SELECTOR_REORDER_INTERVAL', 50)) # Re-rank fallback selectors by hit count every N uses
+
+    # Concurrent headline fetching: sources are scraped in parallel, with politeness delays per domain only
+    SCRAPER_CONCURRENT_FETCH = os.environ.get('SCRAPER_CONCURRENT_FETCH', 'true').lower() == 'true'
+    SCRAPER_MAX_WORKERS = int(os.environ.get('SCRAPER_MAX_WORKERS', 8)) # Upper bound on parallel source fetches
+    SCRAPER_DOMAIN_DELAY = float(os.environ.get('SCRAPER_DOMAIN_DELAY', 1.0)) # Seconds between requests to the same domain
+
+    # Shared HTTP connection pools (used by NewsScraper and AIService)
+    HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10)) # Number of per-host pools kept around
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10)) # Keep-alive connections per host (at least SCRAPER_MAX_WORKERS)
+    HTTP_DEFAULT_TIMEOUT = float(os.environ.get('HTTP_DEFAULT_TIMEOUT', 10)) # Seconds, for calls without an explicit timeout
+
+    # On-disk HTTP cache for scraped pages (conditional GETs with ETag / If-Modified-Since)
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'news_http_cache'))
+    HTTP_CACHE_MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 200 * 1024 * 1024)) # LRU eviction above this size
+
+    # HTML parsing: 'auto' uses lxml when installed, falling back to html.parser
+    HTML_PARSER = os.environ.get('HTML_PARSER', 'auto')
+    HTML_PARSE_STRAINERS = os.environ.get('HTML_PARSE_STRAINERS', 'true').lower() == 'true' # Only parse the elements we extract
+
+    # Headline cache: /api/news is served from a snapshot refreshed in the background
+    HEADLINE_CACHE_TTL = int(os.environ.get('HEADLINE_CACHE_TTL', 300)) # Seconds before a snapshot is considered stale
+    HEADLINE_REFRESH_ENABLED = os.environ.get('HEADLINE_REFRESH_ENABLED', 'true').lower() == 'true'
+
+    # Background prefetch of article bodies for the top headlines after each refresh
+    ARTICLE_PREFETCH_ENABLED = os.environ.get('ARTICLE_PREFETCH_ENABLED', 'false').lower() == 'true'
+    ARTICLE_PREFETCH_TOP_N = int(os.environ.get('ARTICLE_PREFETCH_TOP_N', 10))
+    ARTICLE_PREFETCH_WORKERS = int(os.environ.get('ARTICLE_PREFETCH_WORKERS', 2))
+
+    # Prometheus-style /metrics: each worker writes its counters and histograms to METRICS_DIR, summed on scrape
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5)) # Seconds between snapshots of each worker
+    METRICS_RETENTION = int(os.environ.get('METRICS_RETENTION', 24 * 3600)) # Snapshots of exited workers are dropped after this
+
+    # Request profiling: on demand (X-Admin-Token plus X-Profile header or ?profile=) and/or 1 in N sampled requests
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_ADMIN_TOKEN = os.environ.get('PROFILING_ADMIN_TOKEN') # On-demand profiles and /api/profiles need this token
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(DATA_DIR, 'profiles'))
+    PROFILING_MODE = os.environ.get('PROFILING_MODE', 'sampling') # Default for on-demand profiles: 'sampling' or 'cprofile'
+    PROFILING_SAMPLE_EVERY = int(os.environ.get('PROFILING_SAMPLE_EVERY', 0)) # Profile 1 in N requests to the routes below (0 = off)
+    PROFILING_SAMPLE_ROUTES = [route.strip() for route in os.environ.get('PROFILING_SAMPLE_ROUTES', '/api/summarize,/api/article').split(',') if route.strip()]
+    PROFILING_INTERVAL = float(os.environ.get('PROFILING_INTERVAL', 0.005)) # Seconds between stack samples
+    PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 200)) # Oldest profiles are deleted beyond this
 
 class DevelopmentConfig(Config):
     """Development specific configuration."""
@@ -0,0 +1,36 @@
+# Gunicorn configuration: gunicorn -c gunicorn.conf.py app:app
+#
+# With preload_app the master imports app.py once (config, compiled extraction profiles, stores,
+# the AI service) and forks the workers from it, so that memory is shared copy-on-write and each
+# worker boots without re-importing anything. Network clients and background threads cannot be
+# shared across fork(), so post_fork sets them up in every worker (app.init_worker), and pre_fork
+# closes the SQLite connections the master opened while creating the stores' schemas, so no
+# SQLite handle crosses fork() (each worker opens its own on first use).
+#
+# Preload through this file only: `gunicorn --preload app:app` without `-c gunicorn.conf.py` does not
+# set START_THREADS_AFTER_FORK and has none of these hooks, so the master starts the background
+# threads (headline refresh, prefetch, metrics flush), which do not survive fork(), and the workers
+# inherit its SQLite connections.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120)) # LLM calls and SSE streams can take a while
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if preload_app:
+    # Read by config.py when the master imports the app: defer background threads to the workers
+    os.environ['START_THREADS_AFTER_FORK'] = 'true'
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        from utils.sqlite_store import close_all
+        close_all()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import init_worker # Already imported by the master, so this is a lookup
+        init_worker()
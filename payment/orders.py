@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from flask import current_app
+from utils.http_client import get_http_client
+from utils.sqlite_store import SQLiteDatabase
+
+
+class OrderCache:
+    """
+    Idempotency layer for Razorpay orders, shared by all gunicorn workers through SQLite.
+    An open order is remembered per (user, amount, currency) for `ttl` seconds, so a double click
+    or a retry after a timeout gets the same order back instead of a new upstream one.
+    Concurrent requests for the same key are coalesced across workers: the first one claims the
+    key and creates the order, the others wait for it (up to `pending_timeout` seconds).
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, path, ttl=900, pending_timeout=15):
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self.db = SQLiteDatabase(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS payment_orders (
+                user_id TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                currency TEXT NOT NULL,
+                order_id TEXT,          -- NULL while the claiming request is creating the order
+                order_json TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (user_id, amount, currency)
+            );
+            CREATE INDEX IF NOT EXISTS idx_payment_orders_order_id ON payment_orders (order_id);
+        """)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_create(self, user_id, amount, currency, create):
+        """
+        Returns (order, created): the open order for the key, or the one returned by create().
+        Raises whatever create() raises; the key is released so the next request can try again.
+        """
+        key = (user_id, amount, currency)
+        deadline = time.monotonic() + self.pending_timeout
+        while True:
+            order, claimed = self._claim(key)
+            if order is not None:
+                self._count('hits')
+                return order, False
+            if claimed:
+                break
+            if time.monotonic() >= deadline:
+                break # The claiming request is stuck; create our own order rather than fail
+            time.sleep(self.POLL_INTERVAL)
+
+        self._count('misses')
+        try:
+            order = create()
+        except BaseException:
+            self.db.execute(
+                'DELETE FROM payment_orders WHERE user_id = ? AND amount = ? AND currency = ? AND order_id IS NULL', key
+            )
+            raise
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO payment_orders (user_id, amount, currency, order_id, order_json, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            key + (order['id'], json.dumps(order), time.time()),
+        )
+        return order, True
+
+    def _claim(self, key):
+        """Returns (order, False) on a hit, (None, True) if this caller claimed the key, (None, False) if another did."""
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                'SELECT order_json, created_at FROM payment_orders WHERE user_id = ? AND amount = ? AND currency = ?', key
+            ).fetchone()
+            if row is not None:
+                if row['order_json'] is not None and now - row['created_at'] < self.ttl:
+                    return json.loads(row['order_json']), False
+                if row['order_json'] is None and now - row['created_at'] < self.pending_timeout:
+                    return None, False
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO payment_orders (user_id, amount, currency, order_id, order_json, created_at)
+                VALUES (?, ?, ?, NULL, NULL, ?)
+                """,
+                key + (now,),
+            )
+            # Expired orders are dropped lazily, whenever some key is claimed
+            conn.execute('DELETE FROM payment_orders WHERE order_json IS NOT NULL AND created_at < ?', (now - self.ttl,))
+        return None, True
+
+    def complete(self, order_id):
+        """Forgets a paid order, so the next upgrade starts a new one."""
+        self.db.execute('DELETE FROM payment_orders WHERE order_id = ?', (order_id,))
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def stats(self):
+        open_orders = self.db.execute(
+            'SELECT COUNT(*) FROM payment_orders WHERE order_json IS NOT NULL AND created_at >= ?', (time.time() - self.ttl,)
+        ).fetchone()[0]
+        return {'open_orders': open_orders, 'hits': self.hits, 'misses': self.misses, 'ttl': self.ttl}
+
+
+_razorpay_client = None
+_razorpay_client_lock = threading.Lock()
+
+
+def get_razorpay_client():
+    """
+    Returns the process-wide razorpay.Client, creating it from app config on first use.
+    It sends its requests over the shared HTTPClient session, so connections to the Razorpay API
+    are pooled and kept alive between orders. RAZORPAY_BASE_URL, when set, replaces the SDK's API
+    URL (version path included, as razorpay 1.x expects) to point it at a local stand-in.
+    The SDK is imported here rather than at module level, since most workers rarely create orders.
+    """
+    global _razorpay_client
+    if _razorpay_client is None:
+        with _razorpay_client_lock:
+            if _razorpay_client is None:
+                import razorpay
+                config = current_app.config
+                options = {'base_url': config['RAZORPAY_BASE_URL']} if config.get('RAZORPAY_BASE_URL') else {}
+                _razorpay_client = razorpay.Client(
+                    session=get_http_client().session,
+                    auth=(config['RAZORPAY_KEY_ID'], config['RAZORPAY_KEY_SECRET']),
+                    **options,
+                )
+    return _razorpay_client
+
+
+def reset_razorpay_client():
+    """Drops the client, so the next order builds one on the current HTTP session (after a fork)."""
+    global _razorpay_client
+    with _razorpay_client_lock:
+        _razorpay_client = None
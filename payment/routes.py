@@ -1,36 +1,44 @@
-import razorpay
 from flask import request, jsonify, current_app
 from payment import payment_bp
-from utils.access_control import grant_pro_access
+from payment.orders import get_razorpay_client
+from utils.access_control import grant_pro_access, current_user_id
 import hmac
 import hashlib
 import uuid # Import the uuid module
 
+def get_order_cache():
+    """Retrieves the OrderCache shared by all workers from app.config."""
+    return current_app.config['PAYMENT_ORDER_CACHE']
+
 @payment_bp.route('/create-order', methods=['POST'])
 def create_order():
     """
     Creates a Razorpay order for a one-time payment.
     Assumes a fixed amount for 'Pro' tier upgrade.
+    Idempotent per user, amount and currency: while an order is open (PAYMENT_ORDER_TTL), repeated
+    calls (double clicks, retries after a timeout) return that order instead of creating another.
     """
     try:
         data = request.get_json()
-        amount = data.get('amount', 50000)  # Amount in paise (e.g., 50000 paise = INR 500)
+        amount = int(data.get('amount', 50000))  # Amount in paise (e.g., 50000 paise = INR 500)
         currency = data.get('currency', 'INR')
-        
-        # Changed: Generate a shorter, unique receipt ID using a truncated UUID.
-        # A UUID hex string is 32 chars. Taking the first 30 chars and adding a prefix
-        # ensures it's unique enough and under the 40-character limit (5 + 30 = 35 chars).
-        receipt = f"rcpt_{uuid.uuid4().hex[:30]}"
 
-        client = razorpay.Client(auth=(current_app.config['RAZORPAY_KEY_ID'], current_app.config['RAZORPAY_KEY_SECRET']))
+        def create():
+            # Changed: Generate a shorter, unique receipt ID using a truncated UUID.
+            # A UUID hex string is 32 chars. Taking the first 30 chars and adding a prefix
+            # ensures it's unique enough and under the 40-character limit (5 + 30 = 35 chars).
+            receipt = f"rcpt_{uuid.uuid4().hex[:30]}"
+            return get_razorpay_client().order.create({
+                'amount': amount,
+                'currency': currency,
+                'receipt': receipt,
+                'payment_capture': '1' # Auto capture payment
+            }, timeout=current_app.config['RAZORPAY_TIMEOUT'])
 
-        order = client.order.create({
-            'amount': amount,
-            'currency': currency,
-            'receipt': receipt,
-            'payment_capture': '1' # Auto capture payment
-        })
-        return jsonify(order), 200
+        order, created = get_order_cache().get_or_create(current_user_id(), amount, currency, create)
+        response = jsonify(order)
+        response.headers['X-Order-Reused'] = 'false' if created else 'true'
+        return response, 200
     except Exception as e:
         current_app.logger.error(f"Error creating Razorpay order: {e}")
         return jsonify({"error": "Failed to create order", "details": str(e)}), 500
@@ -61,7 +69,8 @@ def verify_payment():
 
         if generated_signature == razorpay_signature:
             # Payment is successful and verified
-            user_id = current_app.config['CURRENT_USER_ID']
+            user_id = current_user_id()
+            get_order_cache().complete(razorpay_order_id)
             if grant_pro_access(user_id):
                 return jsonify({"message": "Payment successful and Pro access granted!"}), 200
             else:
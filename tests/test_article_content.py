@@ -0,0 +1,83 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import Flask
+
+from config import Config
+
+ARTICLE_HTML = b"""<html><head><title>Rates</title></head><body>
+<article><h1>Central bank holds rates</h1><p>The central bank kept its key rate unchanged on Tuesday.</p></article>
+</body></html>"""
+
+
+class FlakyArticleServer(ThreadingHTTPServer):
+    """Serves one article page, or a 503 while `failing` is set."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        self.failing = True
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                status, body = (503, b'unavailable') if server.failing else (200, ARTICLE_HTML)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+
+
+@pytest.fixture
+def server():
+    server = FlakyArticleServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def app(tmp_path):
+    from api.article_store import ArticleStore
+    from utils.single_flight import SingleFlight
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        SCRAPER_DOMAIN_DELAY=0,
+        HTTP_CACHE_ENABLED=False,
+        ARTICLES_DB=ArticleStore(str(tmp_path / 'articles.sqlite3')),
+        SINGLE_FLIGHT_INSTANCE=SingleFlight(),
+    )
+    with app.app_context():
+        yield app
+
+
+def test_failed_scrape_is_not_stored_and_is_retried(app, server, tmp_path):
+    from api.article_store import ArticleStore
+    from api.news_scraper import NewsScraper
+    from api.routes import load_article_content
+
+    url = f"http://127.0.0.1:{server.server_port}/rates"
+    articles_db = app.config['ARTICLES_DB']
+    articles_db.upsert_headlines([{'id': 'a1', 'url': url, 'title': 'Central bank holds rates', 'source': 'Test'}])
+    scraper = NewsScraper([])
+
+    assert scraper.scrape_article_content(url) is None
+    assert load_article_content('a1', scraper) is None
+    # Nothing was persisted, for this worker or any other
+    assert not ArticleStore(str(tmp_path / 'articles.sqlite3')).get('a1').get('content')
+
+    server.failing = False
+    content = load_article_content('a1', scraper)
+    assert 'kept its key rate unchanged' in content['content']
+    assert ArticleStore(str(tmp_path / 'articles.sqlite3')).get('a1')['content'] == content
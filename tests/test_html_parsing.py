@@ -0,0 +1,71 @@
+import glob
+import os
+
+import pytest
+from flask import Flask
+
+from config import Config
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'corpus')
+
+PAGES = {
+    # The only image sits outside <article>, matched by an image selector of the profile
+    'hero_image_outside_article': """<html><head><title>Rates</title></head><body>
+        <div class="hero"><img class="media-object__image__3tY4J" src="/hero.jpg"></div>
+        <article><div class="article-body"><p>The central bank kept its key rate unchanged on Tuesday.</p></div></article>
+        </body></html>""",
+    # Headline, byline and lead outside the content container
+    'header_outside_article': """<html><head><meta name="description" content="Rates on hold"></head><body>
+        <header><h1 data-testid="ArticleHeader_headline">Central bank holds rates</h1>
+        <p data-testid="BylineBar_byline">By Jane Doe</p></header>
+        <div class="lede"><div class="ArticleBody_lede__2g1Xp">The central bank held rates steady for a third meeting in a row on Tuesday.</div></div>
+        <main><div class="article-image-container"><img src="/lead.jpg"></div><p>Officials cited sticky inflation.</p></main>
+        </body></html>""",
+    # Images found by class pattern and by the content-container fallback
+    'fallback_images': """<html><body><section><img class="HeroImage_big" src="/pattern.jpg"></section>
+        <article><p>Markets were calm.</p><img src="/inline.jpg"></article></body></html>""",
+}
+for path in sorted(glob.glob(os.path.join(CORPUS_DIR, 'article_*.html'))):
+    with open(path, encoding='utf-8') as f:
+        PAGES[os.path.basename(path)] = f.read()
+
+
+@pytest.fixture
+def scraper():
+    from api.news_scraper import NewsScraper
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(HTTP_CACHE_ENABLED=False, SCRAPER_DOMAIN_DELAY=0)
+    with app.app_context():
+        yield NewsScraper([])
+
+
+@pytest.mark.parametrize('name', sorted(PAGES))
+def test_strained_parse_extracts_the_same_as_a_full_parse(scraper, name):
+    body = PAGES[name].encode('utf-8')
+    scraper._fetch_page = lambda url, timeout: (body, 'utf-8', None)
+    url = 'https://www.reuters.com/world/rates-2024-01-01/'
+
+    scraper.use_strainers = True
+    strained = scraper.scrape_article_content(url)
+    scraper.use_strainers = False
+    full = scraper.scrape_article_content(url)
+
+    assert strained == full
+
+
+def test_hero_image_outside_article_survives_the_strainer(scraper):
+    body = PAGES['hero_image_outside_article'].encode('utf-8')
+    scraper._fetch_page = lambda url, timeout: (body, 'utf-8', None)
+    scraper.use_strainers = True
+    article = scraper.scrape_article_content('https://www.reuters.com/world/rates-2024-01-01/')
+    assert article['image_url'] == 'https://www.reuters.com/hero.jpg'
+
+
+def test_selectors_a_strainer_cannot_decide_disable_straining():
+    from api.html_parsing import build_article_strainer
+
+    assert build_article_strainer(['h1', 'div.article-body > p:first-of-type']) is not None
+    assert build_article_strainer(['h1 + p']) is None
+    assert build_article_strainer(['p:first-of-type']) is None
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from flask import Flask
+
+from api.llm_client import LLMError, LLMUnavailableError, ResilientLLMClient
+
+
+class ScriptedProvider:
+    """Answers with the next scripted outcome: a string is returned, an exception is raised."""
+
+    name = 'scripted'
+    model = 'scripted-model'
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def complete(self, messages, timeout):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def app_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def test_non_retryable_error_in_half_open_state_does_not_lock_out_provider(app_context):
+    provider = ScriptedProvider([
+        LLMError('HTTP 503', retryable=True),
+        LLMError('HTTP 400', retryable=False),
+        'recovered',
+    ])
+    client = ResilientLLMClient([provider], max_attempts=1, hedge_enabled=False, breaker_failures=1, breaker_reset=0.05)
+    breaker = client.breakers[provider.name]
+    messages = [{'role': 'user', 'content': 'hi'}]
+
+    with pytest.raises(LLMUnavailableError):
+        client.complete(messages)
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    with pytest.raises(LLMUnavailableError, match='HTTP 400'):
+        client.complete(messages)
+
+    assert client.complete(messages) == 'recovered'
+    assert breaker.state == 'closed'
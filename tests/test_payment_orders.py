@@ -0,0 +1,74 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+from payment import payment_bp
+from payment.orders import OrderCache, reset_razorpay_client
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from razorpay_stand_in import start_server
+
+
+@pytest.fixture
+def stand_in():
+    # A simulated upstream round trip, so the concurrent calls all arrive before the first order exists
+    server = start_server(delay=0.2)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def app(tmp_path, stand_in):
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test',
+        RAZORPAY_BASE_URL=f"http://127.0.0.1:{stand_in.server_port}/v1",
+        RAZORPAY_KEY_ID='rzp_test_key',
+        RAZORPAY_KEY_SECRET='test_secret',
+        RAZORPAY_TIMEOUT=5,
+        PAYMENT_ORDER_CACHE=OrderCache(str(tmp_path / 'payment_orders.sqlite3')),
+    )
+    app.register_blueprint(payment_bp, url_prefix='/payment')
+    # The Razorpay client is a process-wide singleton; build it from this app's config
+    reset_razorpay_client()
+    yield app
+    reset_razorpay_client()
+
+
+def test_concurrent_identical_orders_create_one_upstream_order(app, stand_in):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'user-1'
+
+    def create_order(_):
+        response = client.post('/payment/create-order', json={'amount': 50000, 'currency': 'INR'})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response
+
+    # A double click: simultaneous calls before any order exists, then sequential retries
+    with ThreadPoolExecutor(4) as executor:
+        responses = list(executor.map(create_order, range(4)))
+    responses += [create_order(None) for _ in range(3)]
+
+    assert stand_in.orders_created == 1
+    assert len({response.get_json()['id'] for response in responses}) == 1
+    reused = [response.headers['X-Order-Reused'] for response in responses]
+    assert reused.count('false') == 1
+    assert reused.count('true') == len(responses) - 1
+
+
+def test_other_users_get_their_own_order(app, stand_in):
+    order_ids = set()
+    for user_id in ('user-1', 'user-2'):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        response = client.post('/payment/create-order', json={'amount': 50000, 'currency': 'INR'})
+        assert response.headers['X-Order-Reused'] == 'false'
+        order_ids.add(response.get_json()['id'])
+
+    assert stand_in.orders_created == 2
+    assert len(order_ids) == 2
@@ -0,0 +1,56 @@
+import pytest
+from flask import Flask
+
+from api.article_store import ArticleStore
+from api.presummarize import BackgroundSummarizer, SummaryBudget
+from api.summary_cache import SummaryCache
+from utils.single_flight import SingleFlight
+
+
+class FailingAIService:
+    """An AI service whose provider is down."""
+
+    model_name = 'test:model'
+
+    def __init__(self, summary_cache):
+        self.summary_cache = summary_cache
+        self.llm = type('LLM', (), {'in_flight': 0})()
+        self.calls = 0
+
+    def summarize(self, text, article_id=None):
+        self.calls += 1
+        raise RuntimeError('provider unavailable')
+
+
+def test_release_refunds_tokens_and_drops_the_claim(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'summaries.sqlite3'))
+    budget = SummaryBudget(cache.db, rpm=10, daily_tokens=1000)
+
+    assert budget.acquire('key', 600) == (True, 0)
+    assert budget.acquire('key', 600) == (False, None) # Claimed
+    assert budget.acquire('other', 600) == (False, None) # Over the daily budget
+
+    budget.release('key', 600)
+    assert budget.usage()['tokens_today'] == 0
+    assert budget.acquire('key', 600) == (True, 0)
+
+
+def test_failed_summary_gives_back_its_budget_and_claim(tmp_path):
+    app = Flask(__name__)
+    articles_db = ArticleStore(str(tmp_path / 'articles.sqlite3'))
+    articles_db.upsert_headlines([{'id': 'a1', 'url': 'https://example.com/a1', 'title': 'Rates'}])
+    articles_db.set_content('a1', {'content': 'The central bank kept its key rate unchanged.'})
+    app.config['ARTICLES_DB'] = articles_db
+
+    cache = SummaryCache(str(tmp_path / 'summaries.sqlite3'))
+    ai_service = FailingAIService(cache)
+    budget = SummaryBudget(cache.db, rpm=10, daily_tokens=100000)
+    summarizer = BackgroundSummarizer(app, ai_service, news_scraper=None, single_flight=SingleFlight(), budget=budget)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            summarizer._presummarize('a1', 'https://example.com/a1')
+
+    # Both attempts reached the provider (no stale claim) and no tokens stayed spent
+    assert ai_service.calls == 2
+    assert budget.usage()['tokens_today'] == 0
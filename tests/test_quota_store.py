@@ -0,0 +1,91 @@
+import multiprocessing
+import threading
+from datetime import date, timedelta
+
+from utils.quota_store import QuotaStore
+
+
+def test_anonymous_callers_leave_no_user_rows(tmp_path):
+    store = QuotaStore(str(tmp_path / 'quotas.sqlite3'))
+    for i in range(20):
+        store.consume(f'visitor-{i}', 'summary', 1, 5)
+    assert store.db.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 0
+    assert store.tier('visitor-0') == 'free'
+
+
+def test_counts_from_earlier_days_are_pruned(tmp_path):
+    store = QuotaStore(str(tmp_path / 'quotas.sqlite3'))
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    store.db.execute("INSERT INTO feature_usage (user_id, feature, day, count) VALUES ('old', 'chat', ?, 3)", (yesterday,))
+
+    store.consume('someone', 'chat', 1, 5)
+    assert store.db.execute('SELECT user_id FROM feature_usage').fetchall()[0]['user_id'] == 'someone'
+    assert store.db.execute('SELECT COUNT(*) FROM feature_usage').fetchone()[0] == 1
+
+
+def _consume_repeatedly(path, calls, limit, results):
+    store = QuotaStore(path)
+    results.put(sum(store.consume('shared-user', 'summary', 1, limit) for _ in range(calls)))
+
+
+def test_concurrent_processes_are_granted_exactly_the_limit(tmp_path):
+    path = str(tmp_path / 'quotas.sqlite3')
+    QuotaStore(path) # Create the schema once, before the workers race
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    workers = [context.Process(target=_consume_repeatedly, args=(path, 10, 25, results)) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    granted = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert sum(granted) == 25
+    assert QuotaStore(path).usage('shared-user')['summary_count'] == 25
+
+
+def test_concurrent_threads_are_granted_exactly_the_limit(tmp_path):
+    store = QuotaStore(str(tmp_path / 'quotas.sqlite3'))
+    granted = []
+    lock = threading.Lock()
+
+    def consume():
+        for _ in range(10):
+            result = store.consume('shared-user', 'chat', 1, 15)
+            with lock:
+                granted.append(result)
+
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(granted) == 15
+
+
+def test_a_count_from_yesterday_counts_as_zero(tmp_path):
+    store = QuotaStore(str(tmp_path / 'quotas.sqlite3'))
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    store.db.execute("INSERT INTO feature_usage (user_id, feature, day, count) VALUES ('u1', 'summary', ?, 5)", (yesterday,))
+
+    assert store.usage('u1')['summary_count'] == 0
+    assert store.consume('u1', 'summary', 5, 5) == 5
+    assert store.consume('u1', 'summary', 1, 5) == 0
+
+
+def test_pro_users_are_always_granted_the_full_amount(tmp_path):
+    store = QuotaStore(str(tmp_path / 'quotas.sqlite3'))
+    store.consume('u1', 'summary', 5, 5)
+    store.set_tier('u1', 'pro')
+
+    assert store.consume('u1', 'summary', 100, 5) == 100
+    assert store.consume('u1', 'summary', 100, 5) == 100
+
+
+def test_a_batch_larger_than_what_is_left_gets_a_partial_grant(tmp_path):
+    store = QuotaStore(str(tmp_path / 'quotas.sqlite3'))
+    assert store.consume('u1', 'summary', 3, 5) == 3
+    assert store.consume('u1', 'summary', 4, 5) == 2
+    assert store.consume('u1', 'summary', 4, 5) == 0
+    assert store.usage('u1')['summary_count'] == 5
@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+CALLERS = 8
+
+
+def run_concurrently(group, fn):
+    """Starts CALLERS calls of fn under one key and returns their futures once all have joined the flight."""
+    executor = ThreadPoolExecutor(CALLERS)
+    futures = [executor.submit(group.do, 'key', fn) for _ in range(CALLERS)]
+    deadline = time.monotonic() + 5
+    while group.stats()['coalesced'] < CALLERS - 1:
+        assert time.monotonic() < deadline, 'callers did not join the in-flight call'
+        time.sleep(0.01)
+    executor.shutdown(wait=False)
+    return futures
+
+
+def test_concurrent_callers_share_one_execution_and_its_result():
+    group = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def fetch():
+        runs.append(1)
+        release.wait(5)
+        return 'page'
+
+    futures = run_concurrently(group, fetch)
+    release.set()
+
+    assert [future.result(timeout=5) for future in futures] == ['page'] * CALLERS
+    assert len(runs) == 1
+    stats = group.stats()
+    assert stats['executed'] == 1 and stats['coalesced'] == CALLERS - 1 and stats['in_flight'] == 0
+
+
+def test_concurrent_callers_all_reraise_the_shared_exception():
+    group = SingleFlight()
+    release = threading.Event()
+    error = RuntimeError('upstream down')
+
+    def fetch():
+        release.wait(5)
+        raise error
+
+    futures = run_concurrently(group, fetch)
+    release.set()
+
+    for future in futures:
+        with pytest.raises(RuntimeError) as raised:
+            future.result(timeout=5)
+        assert raised.value is error
+    assert group.stats()['executed'] == 1
+
+
+def test_the_key_is_cleared_so_the_next_call_runs_fresh():
+    group = SingleFlight()
+    results = iter(['first', 'second'])
+
+    assert group.do('key', lambda: next(results)) == 'first'
+    assert group.stats()['in_flight'] == 0
+    assert group.do('key', lambda: next(results)) == 'second'
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        group.do('key', fail)
+    assert group.do('key', lambda: 'after error') == 'after error'
+    assert group.stats() == {'in_flight': 0, 'executed': 4, 'coalesced': 0}
@@ -0,0 +1,68 @@
+import pytest
+from flask import Flask
+
+from config import Config
+
+RECORD = {
+    'content': 'The central bank kept its key rate unchanged on Tuesday.',
+    'description': 'Rates on hold',
+    'author': 'Jane Doe',
+    'in_article_summary': None,
+    'image_url': 'https://example.com/rates.jpg',
+}
+
+
+@pytest.fixture
+def ai_service(tmp_path):
+    from api.summarizer import AIService
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        OPENROUTER_API_KEY='test-key',
+        AI_API_KEY=None,
+        SUMMARY_CACHE_ENABLED=True,
+        SUMMARY_CACHE_PATH=str(tmp_path / 'summaries.sqlite3'),
+    )
+    with app.app_context():
+        service = AIService()
+        service.prompts = []
+
+        def complete(messages):
+            service.prompts.append(messages[-1]['content'])
+            return 'Rates unchanged.'
+
+        def stream(messages):
+            service.prompts.append(messages[-1]['content'])
+            yield from ('Rates ', 'unchanged.')
+
+        service.llm.complete = complete
+        service.llm.stream = stream
+        yield service
+
+
+def test_summary_prompt_and_key_use_the_article_body_of_a_record(ai_service):
+    from api.summarizer import SUMMARY_PROMPT_VERSION
+    from api.summary_cache import summary_key
+
+    assert ai_service.summarize(RECORD, article_id='a1') == 'Rates unchanged.'
+
+    prompt = ai_service.prompts[0]
+    assert RECORD['content'] in prompt
+    assert "{'content'" not in prompt and RECORD['image_url'] not in prompt
+    assert ai_service.summary_cache.contains(summary_key(RECORD['content'], ai_service.model_name, SUMMARY_PROMPT_VERSION))
+
+    # Raw text with the same body is the same cache entry
+    assert ai_service.summarize(RECORD['content']) == 'Rates unchanged.'
+    assert len(ai_service.prompts) == 1
+
+
+def test_streamed_summary_prompt_uses_the_article_body_of_a_record(ai_service):
+    assert ''.join(ai_service.stream_summary(RECORD, article_id='a1')) == 'Rates unchanged.'
+
+    prompt = ai_service.prompts[0]
+    assert RECORD['content'] in prompt
+    assert "{'content'" not in prompt and RECORD['image_url'] not in prompt
+    # The completed stream is cached under the same key as a non-streamed summary of the body
+    assert ai_service.summarize(RECORD['content']) == 'Rates unchanged.'
+    assert len(ai_service.prompts) == 1
@@ -0,0 +1,33 @@
+from bs4 import BeautifulSoup
+
+from api.extraction_profiles import compile_profiles
+
+
+def extract(html):
+    extractor = compile_profiles()['reuters'].text_extractor
+    return extractor.extract(BeautifulSoup(html, 'html.parser').find('article'))
+
+
+def test_trailing_boilerplate_ends_the_body():
+    text = extract("""<article>
+        <p>The central bank kept its key rate unchanged.</p>
+        <p>Reporting by Jane Doe; Editing by John Roe</p>
+        <p>Topics: Markets</p>
+        <p>Our Standards: The Thomson Reuters Trust Principles.</p>
+    </article>""")
+    assert text == 'The central bank kept its key rate unchanged.'
+
+
+def test_body_paragraphs_starting_with_a_boilerplate_word_are_kept():
+    text = extract("""<article>
+        <p>Comments from the finance minister on Tuesday pushed bond yields higher.</p>
+        <p>Topics on the summit agenda include trade, energy and security.</p>
+        <p>Tags on imported steel will rise next year, officials said.</p>
+        <p>Comments (12)</p>
+        <p>Read more: Oil climbs on supply worries</p>
+    </article>""")
+    assert text.split('\n\n') == [
+        'Comments from the finance minister on Tuesday pushed bond yields higher.',
+        'Topics on the summit agenda include trade, energy and security.',
+        'Tags on imported steel will rise next year, officials said.',
+    ]
@@ -1,6 +1,24 @@
+import uuid
 from functools import wraps
-from flask import request, jsonify, current_app
-from datetime import datetime
+from flask import jsonify, current_app, g, session
+from utils.metrics import QUOTA_REJECTIONS
+
+def current_user_id():
+    """
+    Returns the id of the user making the request, kept in request-local `g`.
+    The id lives in the signed session cookie; a visitor without one gets a new id on first use,
+    so only routes that need a user pay for the session lookup.
+    """
+    if 'user_id' not in g:
+        user_id = session.get('user_id')
+        if not user_id:
+            user_id = session['user_id'] = str(uuid.uuid4())
+        g.user_id = user_id
+    return g.user_id
+
+def get_quota_store():
+    """Retrieves the QuotaStore shared by all workers from app.config."""
+    return current_app.config['QUOTA_STORE']
 
 def check_access_limit(feature_type):
     """
@@ -10,52 +28,35 @@ def check_access_limit(feature_type):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            user_id = current_app.config.get('CURRENT_USER_ID')
-            users_db = current_app.config.get('USERS_DB') # Access the global users_db
-
-            if not user_id or user_id not in users_db:
-                return jsonify({"error": "User not found or session expired. Please refresh."}), 401
-
-            user_data = users_db[user_id]
-            tier = user_data.get('tier', 'free')
-
-            if tier == 'pro':
-                # Pro users have unlimited access
-                return f(*args, **kwargs)
-
-            # Free tier logic
-            limit_key = f'{feature_type}_count'
-            config_limit_key = f'FREE_TIER_{feature_type.upper()}_LIMIT'
-            current_count = user_data.get(limit_key, 0)
-            daily_limit = current_app.config.get(config_limit_key)
-
-            if current_count >= daily_limit:
-                return jsonify({
-                    "error": f"Free tier limit reached for {feature_type}. Please upgrade to Pro for unlimited access.",
-                    "limit_reached": True,
-                    "feature": feature_type
-                }), 403
-            
-            # Increment count for free tier users
-            user_data[limit_key] += 1
-            users_db[user_id] = user_data # Update in-memory DB
-            current_app.config['CURRENT_USER_DATA'] = user_data # Update current user data in app config
+            if not consume_access(feature_type):
+                return jsonify(limit_reached_error(feature_type)), 403
 
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
-def grant_pro_access(user_id):
+def limit_reached_error(feature_type):
+    return {
+        "error": f"Free tier limit reached for {feature_type}. Please upgrade to Pro for unlimited access.",
+        "limit_reached": True,
+        "feature": feature_type
+    }
+
+def consume_access(feature_type, amount=1):
+    """
+    Counts up to `amount` uses of a feature against the current user's free tier limit.
+    Returns how many uses were granted: all of them for pro users, otherwise as many as are
+    left today (0 when the limit is reached).
     """
-    Grants 'pro' access to a user.
-    """
-    users_db = current_app.config.get('USERS_DB')
-    if user_id in users_db:
-        users_db[user_id]['tier'] = 'pro'
-        users_db[user_id]['summary_count'] = 0 # Reset counts upon upgrade
-        users_db[user_id]['chat_count'] = 0
-        users_db[user_id]['last_reset_date'] = datetime.now().date()
-        current_app.config['CURRENT_USER_DATA'] = users_db[user_id] # Update if current user
-        return True
-    return False
+    daily_limit = current_app.config.get(f'FREE_TIER_{feature_type.upper()}_LIMIT')
+    granted = get_quota_store().consume(current_user_id(), feature_type, amount, daily_limit)
+    if granted < amount:
+        QUOTA_REJECTIONS.inc(amount - granted, feature=feature_type)
+    return granted
 
+def grant_pro_access(user_id):
+    """
+    Grants 'pro' access to a user and resets their daily counts.
+    """
+    get_quota_store().set_tier(user_id, 'pro')
+    return True
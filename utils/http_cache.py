@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class HTTPCache:
+    """
+    Size-bounded on-disk cache of HTTP responses for conditional GETs.
+    Each URL gets a '<hash>.json' file holding its validators (ETag / Last-Modified) plus any
+    records extracted from the page, and a '<hash>.body' file holding the raw response body.
+    When the directory grows beyond max_bytes, the least recently used entries are evicted.
+    The directory can be shared by several worker processes; all writes are atomic renames.
+    """
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._approx_size = self._directory_size()
+
+    def _path(self, url, suffix):
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + suffix)
+
+    def _directory_size(self):
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                total += entry.stat().st_size
+        return total
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(data)
+
+    def get(self, url):
+        """Returns the cached metadata for a URL ('etag', 'last_modified', 'encoding', 'records', ...) or None."""
+        try:
+            with open(self._path(url, '.json'), 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def read_body(self, url):
+        """Returns the cached response body bytes for a URL, or None."""
+        try:
+            with open(self._path(url, '.body'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def conditional_headers(self, entry):
+        """Builds If-None-Match / If-Modified-Since headers from a cached entry."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response, encoding=None):
+        """
+        Stores the body and validators of a 200 response, plus the body's declared encoding (if any).
+        Responses without an ETag or Last-Modified header cannot be revalidated and are not stored.
+        Any records previously extracted for the URL are dropped, since they describe the old body.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': encoding,
+            'stored_at': time.time(),
+            'records': None,
+            'records_version': None,
+        }
+        written = self._write_atomic(self._path(url, '.body'), response.content)
+        written += self._write_atomic(self._path(url, '.json'), json.dumps(entry).encode('utf-8'))
+        self._account(written)
+        return True
+
+    def store_records(self, url, records, version):
+        """Attaches records extracted from the cached body, so a 304 can skip parsing entirely."""
+        entry = self.get(url)
+        if entry is None:
+            return False
+        entry['records'] = records
+        entry['records_version'] = version
+        self._account(self._write_atomic(self._path(url, '.json'), json.dumps(entry).encode('utf-8')))
+        return True
+
+    def touch(self, url):
+        """Marks an entry as recently used (called on a 304)."""
+        for suffix in ('.json', '.body'):
+            try:
+                os.utime(self._path(url, suffix))
+            except OSError:
+                pass
+
+    def _account(self, written):
+        with self._lock:
+            self._approx_size += written
+            if self._approx_size <= self.max_bytes:
+                return
+            self._evict()
+
+    def _evict(self):
+        """Deletes least recently used entries until the directory is under 90% of max_bytes."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'): # Skip files other workers are still writing
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._approx_size = total
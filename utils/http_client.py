@@ -0,0 +1,112 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from urllib.parse import urlparse
+
+
+class HTTPClient:
+    """
+    Thin wrapper around a shared requests.Session.
+    Connections are pooled per host and kept alive between calls, so repeated requests to
+    the same site (reuters.com, openrouter.ai) skip the TCP and TLS handshakes.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=10):
+        self.timeout = timeout # Default timeout for calls that do not pass one explicitly
+        # pool_connections: number of per-host pools kept around
+        # pool_maxsize: connections kept alive per host (should match worker concurrency)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._open_session()
+
+    def _open_session(self):
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._requests_per_host = {}
+
+    def reset(self):
+        """
+        Replaces the session and its connection pools in place (objects holding this client keep
+        working). Called in each gunicorn worker after fork, so no worker shares a socket (or a
+        pool lock) inherited from the master process.
+        """
+        with self._lock:
+            self._open_session()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).netloc
+        with self._lock:
+            self._requests_per_host[host] = self._requests_per_host.get(host, 0) + 1
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """
+        Returns per-host pool statistics.
+        A 'hit' is a request served on an already open keep-alive connection,
+        a 'miss' is a request that had to open a new connection.
+        """
+        pools = {}
+        pool_manager = self.adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                'requests': pool.num_requests,
+                'hits': max(pool.num_requests - pool.num_connections, 0),
+                'misses': pool.num_connections,
+            }
+        with self._lock:
+            requests_per_host = dict(self._requests_per_host)
+        return {
+            'pool_maxsize': self.adapter._pool_maxsize,
+            'pools': pools,
+            'requests_per_host': requests_per_host,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Returns the process-wide HTTPClient, creating it from app config on first use.
+    Must be called inside an application context the first time.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                config = current_app.config
+                _http_client = HTTPClient(
+                    pool_connections=config.get('HTTP_POOL_CONNECTIONS', 10),
+                    # Never keep fewer connections per host than we have concurrent fetchers or LLM calls
+                    pool_maxsize=max(
+                        config.get('HTTP_POOL_MAXSIZE', 10),
+                        config.get('SCRAPER_MAX_WORKERS', 1),
+                        config.get('SUMMARY_BATCH_CONCURRENCY', 1),
+                    ),
+                    timeout=config.get('HTTP_DEFAULT_TIMEOUT', 10),
+                )
+    return _http_client
+
+
+def reset_http_client():
+    """Gives the process-wide HTTPClient fresh connection pools, if it was created (see HTTPClient.reset)."""
+    if _http_client is not None:
+        _http_client.reset()
@@ -0,0 +1,270 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency histogram buckets: from fast parses to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(labelnames, labelvalues)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {} # Label values tuple -> value (guarded by the registry lock)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value) # Bucket whose upper bound is the first >= value; len(buckets) is +Inf
+        with self.registry.lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def time(self, **labels):
+        """Context manager that observes the duration of its block."""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Counters and latency histograms for one process, aggregated across gunicorn workers on read.
+    Every worker periodically writes a snapshot of its own metrics to 'metrics_<pid>.json' in a
+    shared directory (atomic rename); render() sums the snapshots of all workers and formats them
+    in the Prometheus text exposition format. Gauges are callbacks evaluated by the worker that
+    serves the scrape, so they should read shared state (e.g. the SQLite article store).
+    Snapshots of workers that are gone are kept, so counters do not go backwards when a worker
+    restarts, until they are older than `retention` seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics = {}
+        self._gauges = {}
+        self.directory = None
+        self.flush_interval = 5
+        self.retention = 24 * 3600
+        self._flusher = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback):
+        """Registers a gauge whose value is callback(), computed at scrape time."""
+        self._gauges[name] = (documentation, callback)
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def configure(self, directory, flush_interval=5, retention=24 * 3600):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        """Starts the background thread that writes this worker's snapshot every flush_interval seconds."""
+        if self.directory is None or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        self._flusher = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass # Try again on the next tick; a scrape still sees this worker's live values
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {'values': [
+                    [list(key), [list(value[0]), value[1]] if metric.kind == 'histogram' else value]
+                    for key, value in metric.values.items()
+                ]}
+                for name, metric in self._metrics.items()
+            }
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def flush(self):
+        """Writes this worker's snapshot to the shared directory."""
+        if self.directory is None:
+            return
+        data = json.dumps({'pid': os.getpid(), 'metrics': self.snapshot()}).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(os.getpid()))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _snapshots(self):
+        """Snapshots of every worker; this worker's comes from memory so it is always current."""
+        snapshots = [self.snapshot()]
+        if self.directory is None:
+            return snapshots
+        own = self._path(os.getpid())
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not (entry.name.startswith('metrics_') and entry.name.endswith('.json')) or entry.path == own:
+                continue
+            try:
+                if now - entry.stat().st_mtime > self.retention:
+                    os.remove(entry.path)
+                    continue
+                with open(entry.path, 'rb') as f:
+                    snapshots.append(json.loads(f.read())['metrics'])
+            except (OSError, ValueError, KeyError):
+                continue # Removed or replaced concurrently by another worker
+        return snapshots
+
+    def collect(self):
+        """Merged values of all workers: {name: {label values tuple: value}}."""
+        merged = {name: {} for name in self._metrics}
+        for snapshot in self._snapshots():
+            for name, data in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue # Written by a worker running a different version
+                values = merged[name]
+                for key, value in data['values']:
+                    key = tuple(key)
+                    if metric.kind == 'counter':
+                        values[key] = values.get(key, 0) + value
+                        continue
+                    counts, total = value
+                    if len(counts) != len(metric.buckets) + 1:
+                        continue
+                    previous_counts, previous_total = values.get(key) or ([0] * len(counts), 0.0)
+                    values[key] = ([a + b for a, b in zip(previous_counts, counts)], previous_total + total)
+        return merged
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(values.items()):
+                if metric.kind == 'counter':
+                    lines.append(f'{name}{_format_labels(metric.labelnames, key)} {_format_value(value)}')
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = (('le', _format_value(float(bound))),)
+                    lines.append(f'{name}_bucket{_format_labels(metric.labelnames, key, le)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(metric.labelnames, key)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(metric.labelnames, key)} {cumulative}')
+        for name, (documentation, callback) in self._gauges.items():
+            try:
+                value = callback()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry and the metrics recorded by the app
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response (headers) per route.',
+    ('method', 'route', 'status'),
+)
+SCRAPE_STAGE_SECONDS = registry.histogram(
+    'scraper_stage_duration_seconds', 'NewsScraper time per stage: upstream fetch, HTML parse, element selection, text extraction.',
+    ('page', 'stage'),
+)
+LLM_CALL_SECONDS = registry.histogram(
+    'llm_call_duration_seconds', 'LLM call attempts per provider and model (streams: time to the first chunk).',
+    ('provider', 'model', 'mode', 'outcome'),
+)
+CACHE_LOOKUPS = registry.counter(
+    'cache_lookups_total', 'Cache lookups by cache and result (hit, miss, stale).',
+    ('cache', 'result'),
+)
+SCRAPE_FAILURES = registry.counter(
+    'scrape_failures_total', 'Homepage and article scrapes that failed.',
+    ('page', 'reason'),
+)
+QUOTA_REJECTIONS = registry.counter(
+    'quota_rejections_total', 'Feature uses refused because the free tier limit was reached.',
+    ('feature',),
+)
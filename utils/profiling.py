@@ -0,0 +1,185 @@
+import cProfile
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+MODES = ('sampling', 'cprofile')
+_SAFE_NAME_RE = re.compile(r'[^A-Za-z0-9]+')
+
+
+class StackSampler:
+    """
+    Statistical profiler for one thread: a background thread reads the target thread's stack every
+    `interval` seconds and counts identical stacks. The output is in the collapsed-stack format
+    ('outer;inner;leaf <count>' per line) read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return # The thread is gone
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _CProfileRun:
+    """Deterministic profile of the request; written as a pstats file (snakeviz, `python -m pstats`)."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+
+class ProfileRun:
+    """One profiled request, started before the view runs and finished when the response is closed."""
+
+    def __init__(self, profiler, mode, route, reason):
+        self.mode = mode
+        self.route = route
+        self.reason = reason
+        self.started_at = time.time()
+        if mode == 'cprofile':
+            self._impl = _CProfileRun()
+        else:
+            self._impl = StackSampler(threading.get_ident(), profiler.interval)
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(self.started_at))
+        route_name = _SAFE_NAME_RE.sub('_', route).strip('_') or 'root'
+        extension = 'prof' if mode == 'cprofile' else 'collapsed'
+        self.name = f"{stamp}-{os.getpid()}-{os.urandom(3).hex()}-{route_name}-{reason}.{extension}"
+        self._impl.start()
+
+    def finish(self, directory):
+        self._impl.stop()
+        self._impl.write(os.path.join(directory, self.name))
+
+
+class RequestProfiler:
+    """
+    Opt-in profiling of single requests.
+    - On demand: a request carrying the admin token ('X-Admin-Token' header) and a profile flag
+      ('X-Profile' header or '?profile=' query argument, with 'sampling', 'cprofile' or '1')
+      is profiled, on any route.
+    - Sampled: one in every `sample_every` requests to the `sample_routes` prefixes is profiled
+      with the sampling profiler (0 disables sampling).
+    Profiles are written to `directory`, keeping the newest `max_files`. Only one cProfile run can
+    be active per process, so concurrent cProfile requests fall back to the sampler.
+    When neither trigger applies, the only cost per request is a header lookup and a counter.
+    """
+
+    def __init__(self, directory, admin_token=None, sample_every=0, sample_routes=(), interval=0.005,
+                 default_mode='sampling', max_files=200):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.sample_every = sample_every
+        self.sample_routes = tuple(sample_routes)
+        self.interval = interval
+        self.default_mode = default_mode if default_mode in MODES else 'sampling'
+        self.max_files = max_files
+        self._counter = itertools.count(1)
+        self._cprofile_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.profiled = {'on_demand': 0, 'sampled': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def authorized(self, request):
+        """True if the request carries the admin token."""
+        token = request.headers.get('X-Admin-Token')
+        return bool(self.admin_token and token and hmac.compare_digest(token, self.admin_token))
+
+    def start(self, request):
+        """Returns a ProfileRun if this request should be profiled, else None."""
+        flag = request.headers.get('X-Profile') or request.args.get('profile')
+        if flag and self.authorized(request):
+            mode = flag if flag in MODES else self.default_mode
+            return self._run(mode, request.path, 'on_demand')
+        if self.sample_every and request.path.startswith(self.sample_routes):
+            if next(self._counter) % self.sample_every == 0:
+                return self._run('sampling', request.path, 'sampled')
+        return None
+
+    def _run(self, mode, route, reason):
+        if mode == 'cprofile' and not self._cprofile_lock.acquire(blocking=False):
+            mode = 'sampling'
+        try:
+            run = ProfileRun(self, mode, route, reason)
+        except Exception:
+            # e.g. another profiler is already active; profiling must never fail the request itself
+            if mode == 'cprofile':
+                self._cprofile_lock.release()
+            return None
+        with self._lock:
+            self.profiled[reason] += 1
+        return run
+
+    def finish(self, run):
+        """Stops a run and writes its profile; called when the response has been sent (streams included)."""
+        try:
+            run.finish(self.directory)
+        finally:
+            if run.mode == 'cprofile':
+                self._cprofile_lock.release()
+        self._prune()
+
+    def _prune(self):
+        entries = self.list()
+        for entry in entries[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, entry['name']))
+            except OSError:
+                pass
+
+    def list(self):
+        """Profiles on disk, newest first."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(('.collapsed', '.prof')):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append({'name': entry.name, 'bytes': stat.st_size, 'created_at': stat.st_mtime})
+        entries.sort(key=lambda entry: entry['created_at'], reverse=True)
+        return entries
+
+    def stats(self):
+        with self._lock:
+            profiled = dict(self.profiled)
+        return {'profiled': profiled, 'sample_every': self.sample_every, 'sample_routes': list(self.sample_routes)}
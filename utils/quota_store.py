@@ -0,0 +1,92 @@
+import time
+from datetime import date
+from utils.sqlite_store import SQLiteDatabase
+
+
+class QuotaStore:
+    """
+    User tiers and daily feature counters shared by all gunicorn workers, persisted in SQLite.
+    consume() checks and increments a counter in one BEGIN IMMEDIATE transaction, so concurrent
+    requests on any worker can never grant more than the limit. Counters are reset lazily: a row
+    written on an earlier day counts as zero, so no job has to reset them at midnight, and rows of
+    earlier days are deleted as counters are updated. Only users with a tier set (set_tier) have a
+    row in `users`; everyone else is 'free', so anonymous callers leave no permanent rows behind.
+    """
+
+    def __init__(self, path):
+        self.db = SQLiteDatabase(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                tier TEXT NOT NULL DEFAULT 'free',
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS feature_usage (
+                user_id TEXT NOT NULL,
+                feature TEXT NOT NULL,
+                day TEXT NOT NULL,      -- ISO date the count belongs to
+                count INTEGER NOT NULL,
+                PRIMARY KEY (user_id, feature)
+            );
+            CREATE INDEX IF NOT EXISTS idx_feature_usage_day ON feature_usage (day);
+            -- Rows that earlier versions inserted for every anonymous caller say nothing 'free' does not
+            DELETE FROM users WHERE tier = 'free';
+        """)
+
+    def tier(self, user_id):
+        """The user's tier ('free' for users the store has not seen yet)."""
+        row = self.db.execute('SELECT tier FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        return row['tier'] if row else 'free'
+
+    def usage(self, user_id):
+        """{'tier', '<feature>_count', ...} with today's counts."""
+        today = date.today().isoformat()
+        user = {'tier': self.tier(user_id)}
+        for row in self.db.execute('SELECT feature, day, count FROM feature_usage WHERE user_id = ?', (user_id,)):
+            user[f"{row['feature']}_count"] = row['count'] if row['day'] == today else 0
+        return user
+
+    def consume(self, user_id, feature, amount, daily_limit):
+        """
+        Counts up to `amount` uses of a feature against the user's daily limit.
+        Returns how many were granted: all of them for pro users, otherwise as many as are left today.
+        """
+        today = date.today().isoformat()
+        with self.db.transaction() as conn:
+            user = conn.execute('SELECT tier FROM users WHERE user_id = ?', (user_id,)).fetchone()
+            if user is not None and user['tier'] == 'pro':
+                return amount
+
+            row = conn.execute(
+                'SELECT day, count FROM feature_usage WHERE user_id = ? AND feature = ?', (user_id, feature)
+            ).fetchone()
+            used = row['count'] if row and row['day'] == today else 0
+            granted = max(min(amount, daily_limit - used), 0)
+            if granted:
+                conn.execute(
+                    """
+                    INSERT INTO feature_usage (user_id, feature, day, count) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id, feature) DO UPDATE SET day = excluded.day, count = excluded.count
+                    """,
+                    (user_id, feature, today, used + granted),
+                )
+            # Counts of earlier days are dead weight (they read as zero); drop them as we go
+            conn.execute('DELETE FROM feature_usage WHERE day < ?', (today,))
+        return granted
+
+    def set_tier(self, user_id, tier):
+        """Sets the user's tier and resets their counters."""
+        with self.db.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO users (user_id, tier, created_at) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET tier = excluded.tier
+                """,
+                (user_id, tier, time.time()),
+            )
+            conn.execute('DELETE FROM feature_usage WHERE user_id = ?', (user_id,))
+
+    def stats(self):
+        """Users with a tier set, by tier (users without a row are 'free')."""
+        rows = self.db.execute('SELECT tier, COUNT(*) AS users FROM users GROUP BY tier').fetchall()
+        return {'users_by_tier': {row['tier']: row['users'] for row in rows}}
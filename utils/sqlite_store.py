@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+# Every database of this process, so they can all be closed before a fork (see close_all)
+_databases = weakref.WeakSet()
+
+
+class SQLiteDatabase:
+    """
+    A SQLite database file shared by every gunicorn worker on the host.
+    Runs in WAL mode so readers never block the writer, and hands out one connection per
+    thread (re-opened after a fork, since SQLite connections must not cross processes).
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {} # thread id -> connection opened by this process for that thread
+        self._connections_pid = os.getpid()
+        self._generation = 0 # Bumped by close(), so threads open a new connection afterwards
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _databases.add(self)
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid() or self._local.generation != self._generation:
+            # isolation_level=None: we issue BEGIN ourselves (see transaction())
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL') # Durable enough with WAL, much cheaper than FULL
+            conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+            self._track(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.generation = self._generation
+        return conn
+
+    def _track(self, conn):
+        with self._lock:
+            if self._connections_pid != os.getpid():
+                # Inherited through fork: the parent's connections are not ours to close
+                self._connections, self._connections_pid = {}, os.getpid()
+            # Connections of threads that have exited are closed here rather than left to the GC
+            alive = {thread.ident for thread in threading.enumerate()}
+            for ident in [ident for ident in self._connections if ident not in alive]:
+                self._connections.pop(ident).close()
+            previous = self._connections.get(threading.get_ident())
+            if previous is not None and previous is not conn:
+                previous.close()
+            self._connections[threading.get_ident()] = conn
+
+    def close(self):
+        """
+        Closes every connection this process opened on the database; the next use opens new ones.
+        Only call it while no other thread is using the database (e.g. in the gunicorn master before forking).
+        """
+        with self._lock:
+            connections, self._connections = self._connections, {}
+            inherited, self._connections_pid = self._connections_pid != os.getpid(), os.getpid()
+            self._generation += 1
+        if inherited:
+            return # Closing a parent's connection in a forked child could release the parent's locks
+        for conn in connections.values():
+            conn.close()
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+    def executescript(self, sql):
+        return self.connection().executescript(sql)
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT. Takes the write lock up front, so read-modify-write
+        sequences inside the block are atomic across threads and processes.
+        """
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+
+def close_all():
+    """
+    Closes the connections of every SQLiteDatabase in this process. Called in the gunicorn master
+    before it forks workers (pre_fork in gunicorn.conf.py), so that no open SQLite handle is
+    inherited across fork(), which SQLite does not support; each worker opens its own.
+    """
+    for database in list(_databases):
+        database.close()